@@ -0,0 +1,140 @@
+import numpy as np
+
+from functools import partial
+from os import makedirs, remove
+from os.path import join
+from uuid import uuid4
+
+import rasterio as rio
+from rasterio.errors import RasterioIOError
+from rasterio.io import MemoryFile
+from rasterio.warp import transform_bounds
+from shapely.geometry import MultiLineString
+
+from hrdem import config
+from hrdem.config import AREA_STORAGE, AREA_SCRATCH_FOLDER, AREA_MARGIN, AREA_STRIP_ROWS
+from hrdem.dataset_pool import open_dataset, register_area_dataset, unregister_area_datasets
+from hrdem.elevation import is_missing_tile
+from hrdem.hrdem_esa import get_hrdem_footprints, get_esa_along_path, set_area_footprints
+from hrdem.transform import WGS84
+from hrdem.window_cache import read_window
+
+def missing_tile(message):
+    raise RasterioIOError(message)
+
+
+class AreaOfInterest:
+    # Reads the HRDEM and ESA rasters under all the links of one Tx once (in memory or in scratch GeoTIFFs),
+    # so the links extracted inside the context are sampled from local copies instead of the remote tiles
+    def __init__(self, tx, rx_list, storage=AREA_STORAGE):
+        self.tx = tx
+        self.rx_list = rx_list
+        self.storage = storage
+        self.read_stats = {'bytes_read': 0}
+        self.memfiles = []
+        self.scratch_paths = []
+
+    def __enter__(self):
+        try:
+            self.load()
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self):
+
+        # Bounding box (lon/lat) of the Tx and all the Rx, with a margin so pixels on the edges are included
+        lats = [self.tx.lat] + [rx.lat for rx in self.rx_list]
+        lons = [self.tx.lon] + [rx.lon for rx in self.rx_list]
+        self.bounds = (min(lons) - AREA_MARGIN, min(lats) - AREA_MARGIN, max(lons) + AREA_MARGIN, max(lats) + AREA_MARGIN)
+
+        # HRDEM projects under any of the links, queried once for the area
+        links = MultiLineString([[(self.tx.lon, self.tx.lat), (rx.lon, rx.lat)] for rx in self.rx_list])
+        footprints = get_hrdem_footprints(links)
+        self.projects = list(footprints['project_name'])
+
+        for project_id in self.projects:
+            for band, path in (('dsm', config.HRDEM_DSM_PATH), ('dtm', config.HRDEM_DTM_PATH)):
+                self.extract(path.format(project_id=project_id), project_id, band)
+
+        # ESA tiles under any of the links
+        tiles = []
+        for rx in self.rx_list:
+            tiles += [tile for tile in get_esa_along_path((rx.lat, rx.lon), (self.tx.lat, self.tx.lon)) if tile not in tiles]
+
+        self.tiles = tiles
+
+        for tile in tiles:
+            path = config.ESA_TILE_PATH.format(tile=tile)
+            try:
+                self.extract(path)
+            except RasterioIOError as error:
+                if not is_missing_tile(error):
+                    raise
+                # No tile over open water, remember it so the links do not request it again
+                register_area_dataset(path, partial(missing_tile, str(error)), None)
+
+        # Links now find their HRDEM projects in the area footprints
+        footprints.sindex
+        set_area_footprints(footprints)
+
+    def extract(self, path, project_id=None, band=None):
+
+        with open_dataset(path) as tif:
+
+            # Window of the source file covering the area (aligned on its pixel grid, with one pixel margin)
+            left, bottom, right, top = transform_bounds(WGS84, tif.crs, *self.bounds, densify_pts=21)
+            col_start, row_start = np.floor(~tif.transform * (left, top)).astype(int) - 1
+            col_stop, row_stop = np.ceil(~tif.transform * (right, bottom)).astype(int) + 1
+            row_start, col_start = max(row_start, 0), max(col_start, 0)
+            row_stop, col_stop = min(row_stop, tif.height), min(col_stop, tif.width)
+
+            if row_start >= row_stop or col_start >= col_stop:
+                return
+
+            window = rio.windows.Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+            profile = {
+                'driver': 'GTiff', 'count': 1, 'dtype': tif.dtypes[0], 'nodata': tif.nodata, 'crs': tif.crs,
+                'transform': tif.window_transform(window), 'width': window.width, 'height': window.height,
+                'tiled': True, 'blockxsize': 256, 'blockysize': 256
+            }
+
+            if self.storage == 'scratch':
+                makedirs(AREA_SCRATCH_FOLDER, exist_ok=True)
+                name = join(AREA_SCRATCH_FOLDER, f"{uuid4().hex}.tif")
+                self.scratch_paths.append(name)
+                dst = rio.open(name, 'w', **profile)
+                opener = lambda: rio.open(name)
+            else:
+                memfile = MemoryFile()
+                self.memfiles.append(memfile)
+                name = memfile.name
+                dst = memfile.open(**profile)
+                opener = memfile.open
+
+            # Copy the window in strips of rows (HRDEM reads go through the local block cache)
+            with dst:
+                for strip_start in range(row_start, row_stop, AREA_STRIP_ROWS):
+                    strip_stop = min(strip_start + AREA_STRIP_ROWS, row_stop)
+                    strip_window = ((strip_start, strip_stop), (col_start, col_stop))
+                    if project_id is None:
+                        array = tif.read(1, window=strip_window)
+                    else:
+                        array = read_window(tif, project_id, band, strip_window, self.read_stats)
+                    dst.write(array, 1, window=((strip_start - row_start, strip_stop - row_start), (0, col_stop - col_start)))
+
+        register_area_dataset(path, opener, name)
+
+    def close(self):
+        set_area_footprints(None)
+        unregister_area_datasets()
+        for memfile in self.memfiles:
+            memfile.close()
+        for path in self.scratch_paths:
+            remove(path)
+        self.memfiles = []
+        self.scratch_paths = []
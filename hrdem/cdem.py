@@ -1,9 +1,20 @@
+import hashlib
+import json
 import numpy as np
-import requests
 
+from os import makedirs, replace
+from os.path import exists, join
+from geographiclib.geodesic import Geodesic as geo
 from geopy.distance import geodesic
+
+from hrdem.config import CDEM_BACKEND, CDEM_RASTER_PATH, CDEM_PROFILE_URL, CDEM_RESOLUTION, CDEM_MAX_STEPS, CDEM_TIMEOUT, CDEM_RETRIES, CDEM_CACHE_ENABLED, CDEM_CACHE_FOLDER
+from hrdem.dataset_pool import open_dataset
+from hrdem.sampling import pixel_indices
+from hrdem.transform import WGS84, get_transformer
 from propagation.tower import get_heading
 
+_session = None
+
 def clustering_algorithm(points, eps = 1):
     clusters = []
     if points:
@@ -21,46 +32,143 @@ def clustering_algorithm(points, eps = 1):
     return clusters
 
 
-def replace_terrain_if_no_hrdem(tx, rx, surface_h, terrain_h):
+def merge_groups(groups, max_steps = CDEM_MAX_STEPS):
+    # Merge neighbouring gaps so a single profile request covers them, as long as it stays under max_steps
+    spans = []
+    for group in groups:
+        if spans and (group[-1] - spans[-1][0][0]) / CDEM_RESOLUTION <= max_steps:
+            spans[-1].append(group)
+        else:
+            spans.append([group])
+
+    return spans
+
+
+def replace_terrain_if_no_hrdem(tx, rx, profile):
+    # Fills the terrain of the profile where HRDEM is not available (in place). Returns whether HRDEM is available
+    # and whether every gap was filled
+
     # Get heading in order to get elevation in a direction
     direction = get_heading((tx.lat, tx.lon), (rx.lat, rx.lon))
 
     hrdem_available = True
+    filled = True
 
-    if 0 in terrain_h:
+    if profile.nodata.any():
         hrdem_available = False
-        points = list(np.where(terrain_h==0)[0])
+        points = list(np.where(profile.nodata)[0])
         groups = clustering_algorithm(points)
-        for group in groups : 
-            terrain_h = replace_elevation_profile(terrain_h, group, direction, (tx.lat, tx.lon))
+        for span in merge_groups(groups):
+            profile.terrain, span_filled = replace_elevation_profile(profile.terrain, span, direction, (tx.lat, tx.lon))
+            filled = filled and span_filled
     
-    surface_h = np.where(surface_h < terrain_h, terrain_h, surface_h)
+    profile.surface = np.where(profile.surface < profile.terrain, profile.terrain, profile.surface)
+
+    return hrdem_available, filled
+
+
+def get_session():
+    # Pooled HTTP session, retrying transient failures of the profile service
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retries = Retry(total=CDEM_RETRIES, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        _session = requests.Session()
+        _session.mount("http://", HTTPAdapter(max_retries=retries))
+        _session.mount("https://", HTTPAdapter(max_retries=retries))
+    return _session
+
+
+def request_elevation_profile(pointA, pointB, steps, surface='cdem'):
+
+    url_terrain = CDEM_PROFILE_URL.format(surface=surface) + f"?path=LINESTRING({pointA[1]}%20{pointA[0]},%20{pointB[1]}%20{pointB[0]})&steps={steps}"
+
+    # Serve the profile from the local cache (keyed by geometry and steps) when it was already requested
+    cache_path = None
+    if CDEM_CACHE_ENABLED:
+        key = f"{surface}_{pointA[0]:.6f}_{pointA[1]:.6f}_{pointB[0]:.6f}_{pointB[1]:.6f}_{steps}"
+        cache_path = join(CDEM_CACHE_FOLDER, hashlib.sha1(key.encode()).hexdigest() + ".json")
+        if exists(cache_path):
+            with open(cache_path) as f:
+                return json.load(f)
+
+    print("Accessing Geogratis API for elevation at 30m resolution (Could take longer...)")
+    request_terrain = get_session().get(url_terrain, timeout=CDEM_TIMEOUT)
 
-    return hrdem_available, surface_h, terrain_h
+    # Connection errors are raised, a failed request leaves the gaps unfilled
+    if request_terrain.status_code != 200:
+        print(f"Geogratis API request failed ({request_terrain.status_code}), the terrain is left unfilled")
+        return []
 
+    terrain_ld = [element['altitude'] if element['altitude'] is not None else 0 for element in request_terrain.json()]
 
-def replace_elevation_profile(full_terrain, group, direction_LOS, tx_point, surface='cdem'):
+    if cache_path is not None and terrain_ld:
+        makedirs(CDEM_CACHE_FOLDER, exist_ok=True)
+        with open(cache_path + ".tmp", "w") as f:
+            json.dump(terrain_ld, f)
+        replace(cache_path + ".tmp", cache_path)
 
-    destinationA = geodesic(kilometers=float(group[0] / 1000)).destination(tx_point, direction_LOS)
-    destinationB = geodesic(kilometers=float(group[-1] / 1000)).destination(tx_point, direction_LOS)
+    return terrain_ld
+
+
+def sample_elevation_raster(pointA, pointB, steps):
+
+    # Same points as the profile service: steps + 1 points equally spaced along the geodesic from pointA to pointB
+    line = geo.WGS84.InverseLine(pointA[0], pointA[1], pointB[0], pointB[1])
+    positions = [line.Position(s) for s in np.linspace(0, line.s13, steps + 1)]
+    lats = np.array([position['lat2'] for position in positions])
+    lons = np.array([position['lon2'] for position in positions])
+
+    with open_dataset(CDEM_RASTER_PATH) as cdem_tif:
+
+        # Get the row and column of every point in the local CDEM raster (x, y order, the CDEM grid is geographic)
+        x_coords, y_coords = get_transformer(WGS84, cdem_tif.crs, always_xy=True).transform(lons, lats)
+        row_indices, col_indices = pixel_indices(cdem_tif.transform, x_coords, y_coords)
+        inside = (row_indices >= 0) & (row_indices < cdem_tif.height) & (col_indices >= 0) & (col_indices < cdem_tif.width)
+
+        # Read the window covering the segment and gather the points (no data and points outside the raster are set to 0)
+        terrain_ld = np.zeros(len(lats))
+        if inside.any():
+            min_row, max_row = row_indices[inside].min(), row_indices[inside].max()
+            min_col, max_col = col_indices[inside].min(), col_indices[inside].max()
+            cdem_array = cdem_tif.read(1, window=((min_row, max_row + 1), (min_col, max_col + 1)), masked=True).filled(0)
+            terrain_ld[inside] = cdem_array[row_indices[inside] - min_row, col_indices[inside] - min_col]
+
+    return list(terrain_ld)
+
+
+def get_elevation_profile(pointA, pointB, steps, surface='cdem'):
+    # Elevation at steps + 1 points from pointA to pointB, from the local raster or the profile service
+    if CDEM_BACKEND == 'raster':
+        return sample_elevation_raster(pointA, pointB, steps)
+    return request_elevation_profile(pointA, pointB, steps, surface)
+
+
+def replace_elevation_profile(full_terrain, groups, direction_LOS, tx_point, surface='cdem'):
+    # Returns the terrain with the gaps of groups filled, and whether they were
+
+    # One profile from the start of the first gap to the end of the last one
+    start = groups[0][0]
+    end = groups[-1][-1]
+
+    destinationA = geodesic(kilometers=float(start / 1000)).destination(tx_point, direction_LOS)
+    destinationB = geodesic(kilometers=float(end / 1000)).destination(tx_point, direction_LOS)
     pointA = (destinationA.latitude, destinationA.longitude)
     pointB = (destinationB.latitude, destinationB.longitude)
 
     # Number of steps to API
-    distance = (group[-1]-group[0])
-    steps = int(distance / 30)
-
-    print("Accessing Geogratis API for elevation at 30m resolution (Could take longer...)")
-    url_terrain = f"http://geogratis.gc.ca/services/elevation/{surface}/profile?path=LINESTRING({pointA[1]}%20{pointA[0]},%20{pointB[1]}%20{pointB[0]})&steps={steps}"
-    request_terrain = requests.get(url_terrain)
+    distance = (end - start)
+    steps = max(int(distance / CDEM_RESOLUTION), 1)
 
-    if request_terrain.status_code == 200:
+    terrain_ld = get_elevation_profile(pointA, pointB, steps, surface)
 
-        terrain_ld = [element['altitude'] if element['altitude'] is not None else 0 for element in
-                      request_terrain.json()]
-        if terrain_ld:
-            xvals = np.linspace(0, len(terrain_ld), distance+1)
-            new_terrain = np.interp(xvals, range(len(terrain_ld)), terrain_ld)
-            full_terrain[group[0]:(group[-1]+1)] = new_terrain
+    if terrain_ld:
+        # Profile points are equally spaced from pointA to pointB, interpolate them at every point of the gaps
+        profile_positions = np.linspace(start, end, len(terrain_ld))
+        for group in groups:
+            full_terrain[group[0]:(group[-1]+1)] = np.interp(np.arange(group[0], group[-1]+1), profile_positions, terrain_ld)
 
-    return full_terrain
\ No newline at end of file
+    return full_terrain, len(terrain_ld) > 0
@@ -0,0 +1,81 @@
+from os.path import join, dirname, realpath
+
+## Data sources
+
+# HRDEM DSM and DTM tiles (formatted with the STAC project id)
+HRDEM_DSM_PATH = "s3://datacube-prod-data-public/store/elevation/hrdem/hrdem-lidar/{project_id}-dsm.tif"
+HRDEM_DTM_PATH = "s3://datacube-prod-data-public/store/elevation/hrdem/hrdem-lidar/{project_id}-dtm.tif"
+
+# HRDEM STAC catalog
+HRDEM_STAC_API_URL = "https://datacube.services.geo.ca/api/"
+HRDEM_STAC_COLLECTION = "hrdem-lidar"
+
+# Local footprint index of the HRDEM projects (used instead of the STAC search once built, see hrdem/footprint_index.py)
+HRDEM_FOOTPRINT_INDEX = join(dirname(dirname(realpath(__file__))), "data", "hrdem_footprints.gpkg")
+
+# ESA WorldCover tiles (formatted with the tile id, e.g. N45W078)
+ESA_TILE_PATH = "s3://esa-worldcover/v200/2021/map/ESA_WorldCover_10m_2021_v200_{tile}_Map.tif"
+ESA_TILE_SIZE = 3 # degrees
+
+## HRDEM reads
+
+# 'blocks' reads only the internal raster blocks crossed by the path, 'window' reads the bounding box of every 1000 point chunk
+HRDEM_READ_MODE = 'window'
+
+# Number of DSM/DTM reads running in parallel (tune to the storage backend, 1 reads one file at a time)
+HRDEM_FETCH_WORKERS = 4
+
+# HRDEM window cache
+
+# Raster blocks read from the DSM/DTM tiles are kept on local disk and evicted least recently used first
+WINDOW_CACHE_ENABLED = True
+WINDOW_CACHE_FOLDER = join(dirname(dirname(realpath(__file__))), "data", "cache", "hrdem")
+WINDOW_CACHE_MAX_BYTES = 2 * 1024 ** 3 # bytes
+
+## Area pre-extraction (see hrdem/area.py)
+
+# 'memory' keeps the area rasters in memory, 'scratch' writes them as GeoTIFFs in AREA_SCRATCH_FOLDER (for areas larger than memory)
+AREA_STORAGE = 'memory'
+AREA_SCRATCH_FOLDER = join(dirname(dirname(realpath(__file__))), "data", "cache", "area")
+AREA_MARGIN = 0.0005 # degrees added around the bounding box of the links
+AREA_STRIP_ROWS = 1024 # rows copied at a time from the source tiles
+
+## Dataset handle pool
+
+# Opened DSM/DTM/ESA datasets are kept open across links (remote headers are only fetched once)
+DATASET_POOL_ENABLED = True
+DATASET_POOL_SIZE = 32 # maximum number of idle handles kept open
+DATASET_POOL_MAX_IDLE = 300 # seconds before an unused handle is closed
+
+## CDEM fallback (used where HRDEM is not available)
+
+# 'http' requests the geogratis profile service, 'raster' samples a locally mounted CDEM GeoTIFF or VRT
+CDEM_BACKEND = 'http'
+CDEM_RASTER_PATH = join(dirname(dirname(realpath(__file__))), "data", "cdem.vrt")
+
+# Geogratis elevation profile service (can point to a local stand-in server)
+CDEM_PROFILE_URL = "http://geogratis.gc.ca/services/elevation/{surface}/profile"
+CDEM_RESOLUTION = 30 # meters between two points of the requested profile
+CDEM_MAX_STEPS = 1000 # gaps of a link are merged into one request up to this number of steps
+CDEM_TIMEOUT = 30 # seconds
+CDEM_RETRIES = 3
+
+# Responses are cached on local disk by geometry and steps
+CDEM_CACHE_ENABLED = True
+CDEM_CACHE_FOLDER = join(dirname(dirname(realpath(__file__))), "data", "cache", "cdem")
+
+## Extracted profile cache
+
+# Surface, terrain and clutter profiles of a link (after the CDEM fallback) are kept on local disk as compressed arrays,
+# keyed by the Tx/Rx coordinates rounded to PROFILE_CACHE_PRECISION decimals and the data source versions below
+PROFILE_CACHE_ENABLED = True
+PROFILE_CACHE_FOLDER = join(dirname(dirname(realpath(__file__))), "data", "cache", "profiles")
+PROFILE_CACHE_PRECISION = 6 # decimals of degrees (~0.1m)
+
+# Change any of these (e.g. a new HRDEM or WorldCover release) to invalidate the cached profiles
+PROFILE_DATA_VERSIONS = {
+    'hrdem': HRDEM_DSM_PATH,
+    'esa': ESA_TILE_PATH,
+    'cdem': f"{CDEM_BACKEND}_{CDEM_RESOLUTION}",
+    'profile': 2
+}
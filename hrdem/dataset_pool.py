@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from hrdem.config import DATASET_POOL_ENABLED, DATASET_POOL_SIZE, DATASET_POOL_MAX_IDLE
+from hrdem.remote import configure_remote_access
+
+class PooledDataset:
+    # Context manager handing a pooled handle back to its pool instead of closing it
+    def __init__(self, pool, path, dataset):
+        self.pool = pool
+        self.path = path
+        self.dataset = dataset
+
+    def __enter__(self):
+        return self.dataset
+
+    def __exit__(self, *exc):
+        self.pool.release(self.path, self.dataset)
+
+
+class DatasetPool:
+    # Process-wide pool of open rasterio datasets, bounded in size and closing handles left idle too long
+    def __init__(self, max_size, max_idle):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.opens = 0
+        self.saved_opens = 0
+        self.idle = OrderedDict() # (path, id(dataset)) -> (dataset, released at), least recently used first
+        self.lock = Lock()
+
+    def stats(self):
+        return {"opens": self.opens, "saved_opens": self.saved_opens, "idle_handles": len(self.idle)}
+
+    def acquire(self, path):
+        with self.lock:
+            self.evict()
+            for key, (dataset, _) in self.idle.items():
+                if key[0] == path:
+                    del self.idle[key]
+                    self.saved_opens += 1
+                    return dataset
+
+        # A handle is only used by one caller at a time (GDAL handles are not thread safe)
+        import rasterio as rio
+        dataset = rio.open(path)
+        with self.lock:
+            self.opens += 1
+        return dataset
+
+    def release(self, path, dataset):
+        with self.lock:
+            self.idle[(path, id(dataset))] = (dataset, monotonic())
+            self.evict()
+
+    def evict(self):
+        # Close handles idle for too long, then the least recently used ones above the pool size
+        now = monotonic()
+        for key, (dataset, released_at) in list(self.idle.items()):
+            if now - released_at > self.max_idle or len(self.idle) > self.max_size:
+                del self.idle[key]
+                dataset.close()
+
+    def close(self):
+        with self.lock:
+            for dataset, _ in self.idle.values():
+                dataset.close()
+            self.idle.clear()
+
+
+_dataset_pool = None
+
+# Datasets of the area being processed (see hrdem/area.py), opened instead of the remote files: path -> opener
+_area_datasets = {}
+_area_dataset_names = set()
+
+def get_dataset_pool():
+    global _dataset_pool
+    if _dataset_pool is None:
+        _dataset_pool = DatasetPool(DATASET_POOL_SIZE, DATASET_POOL_MAX_IDLE)
+    return _dataset_pool
+
+
+def register_area_dataset(path, opener, name):
+    _area_datasets[path] = opener
+    _area_dataset_names.add(name)
+
+
+def unregister_area_datasets():
+    _area_datasets.clear()
+    _area_dataset_names.clear()
+
+
+def is_area_dataset(dataset):
+    # Area datasets are already local (and their block grid differs from the remote file), so they bypass the block cache
+    return dataset.name in _area_dataset_names
+
+
+def open_dataset(path):
+    # Drop-in replacement for rio.open(path) as a context manager, reusing pooled handles when enabled
+    if path in _area_datasets:
+        return _area_datasets[path]()
+    configure_remote_access()
+    if not DATASET_POOL_ENABLED:
+        import rasterio as rio
+        return rio.open(path)
+    pool = get_dataset_pool()
+    return PooledDataset(pool, path, pool.acquire(path))
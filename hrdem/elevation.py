@@ -1,8 +1,13 @@
 import numpy as np
-import pyproj
-import rasterio as rio
 
+from concurrent.futures import ThreadPoolExecutor
+
+from hrdem import config
+from hrdem.dataset_pool import open_dataset
 from hrdem.hrdem_esa import get_hrdem_along_path, get_esa_along_path
+from hrdem.sampling import pixel_indices, pixel_runs
+from hrdem.transform import ProjectedPath
+from hrdem.window_cache import read_path, read_window
 
 def compute_tx_rx_path(lat_lon, tower_latlon, distance_to_tower):
     # Linearly interpolate the path between the tower and receiver at 1m intervals
@@ -11,124 +16,171 @@ def compute_tx_rx_path(lat_lon, tower_latlon, distance_to_tower):
     return path_coords
 
 
-def return_elevation_profile(lat_lon, tower_latlon, distance_to_tower):
+def read_hrdem_band(project_id, band, projected_path):
 
-    # Get the HRDEM tiles that intersect the path
-    hrdem_intersection_line = get_hrdem_along_path(lat_lon, tower_latlon)
+    # Returns the indices of the path points inside the tile, their DSM or DTM values and the bytes read
+    read_stats = {'bytes_read': 0}
+    # (the tile paths are read from the config at call time, so they can point to local copies)
+    s3_path = (config.HRDEM_DSM_PATH if band == 'dsm' else config.HRDEM_DTM_PATH).format(project_id=project_id)
 
-    # Return if no HRDEM tiles are available
-    if len(hrdem_intersection_line) == 0:
-        return np.zeros(distance_to_tower), np.zeros(distance_to_tower)
+    with open_dataset(s3_path) as tif:
 
-    # Initialize HRDEM surface and terrain height arrays
-    full_surface_h = np.zeros(distance_to_tower)
-    full_terrain_h = np.zeros(distance_to_tower)
-    segment_already_full = []
+        # Get the bounds of the file
+        bounds = tif.bounds
 
-    # Get the interpolated lat lon coordinates along the path from the tower to the receiver
-    tx_rx_path_lat_lon = compute_tx_rx_path(lat_lon, tower_latlon, distance_to_tower)
+        # Transform the lat lon coordinates to the HRDEM tile's CRS (once per CRS for the link)
+        x_coords, y_coords = projected_path.transform(tif.crs)
 
-    # Loop through tiles that intersect the path (multiple HRDEM could be on top of each other (newest tiles sorted first))
-    for project_id, itrsct in hrdem_intersection_line.values:
+        # Extract indices that fall within the tile
+        tx_rx_path_indices = np.where((x_coords >= bounds[0]) & (x_coords <= bounds[2]) & (y_coords >= bounds[1]) & (
+                y_coords <= bounds[3]))[0]
 
-        # If more recent HRDEM points already have been added
-        if itrsct in segment_already_full: continue
+        values = np.zeros(len(tx_rx_path_indices))
+        if len(tx_rx_path_indices) == 0:
+            return tx_rx_path_indices, values, read_stats
 
-        dsm_s3_path = f"s3://datacube-prod-data-public/store/elevation/hrdem/hrdem-lidar/{project_id}-dsm.tif"
-        dtm_s3_path = f"s3://datacube-prod-data-public/store/elevation/hrdem/hrdem-lidar/{project_id}-dtm.tif"
+        # Get the row and column file indices of the pixels under the path, one entry per run of points in the same pixel
+        run_rows, run_cols, run_of_point = pixel_runs(*pixel_indices(tif.transform, x_coords[tx_rx_path_indices], y_coords[tx_rx_path_indices]))
+        run_values = np.zeros(len(run_rows))
 
-        with rio.open(dsm_s3_path) as dsm_tif:
-            with rio.open(dtm_s3_path) as dtm_tif:
+        if config.HRDEM_READ_MODE == 'blocks':
+            # Read only the blocks crossed by the path and gather the samples from them
+            run_values[:] = read_path(tif, project_id, band, run_rows, run_cols, read_stats)
 
-                # Get the bounds and CRS of the DSM file
-                bounds = dsm_tif.bounds
+        else:
+            step = 1000
 
-                # CRS for WGS84 (lat lon coordinate system)
-                src_crs = pyproj.CRS.from_epsg(4326)
+            # Read the window from the file in chunks (speeds up the download process)
+            for i in range(0, len(run_rows), step):
+                # Get the file coordinates for the chunk
+                chunk_row_indices = run_rows[i:i + step]
+                chunk_col_indices = run_cols[i:i + step]
 
-                # CRS for current HRDEM tile
-                dst_crs = dsm_tif.crs
+                # Get the min and max file indices to download for the chunk
+                min_col_index = chunk_col_indices.min()
+                max_col_index = chunk_col_indices.max()
+                min_row_index = chunk_row_indices.min()
+                max_row_index = chunk_row_indices.max()
+
+                # Download the chunk of the file (served from the local block cache when already read)
+                array = read_window(tif, project_id, band, (
+                (min_row_index, max_row_index + 1), (min_col_index, max_col_index + 1)), read_stats)
+
+                # Gather each pixel once, with the row and col indices adjusted to the downloaded chunk's array
+                run_values[i:i + step] = array[chunk_row_indices - min_row_index, chunk_col_indices - min_col_index]
+
+        # Expand the pixel values back to every point of the path
+        values[:] = run_values[run_of_point]
+
+    # Replace negative elevation values
+    values[values < 0] = 0
+
+    return tx_rx_path_indices, values, read_stats
+
+
+def return_elevation_profile(lat_lon, tower_latlon, distance_to_tower, read_stats=None):
+    # read_stats: optional dict, receives the bytes of the DSM/DTM blocks fetched from the tiles under 'bytes_read'
+
+    # Get the HRDEM tiles that intersect the path
+    hrdem_intersection_line = get_hrdem_along_path(lat_lon, tower_latlon)
 
-                # Define the transformer to convert from the source CRS to the tile's CRS
-                transformer = pyproj.Transformer.from_crs(src_crs, dst_crs)
+    # Return if no HRDEM tiles are available
+    if len(hrdem_intersection_line) == 0:
+        return np.zeros(distance_to_tower, dtype=np.float32), np.zeros(distance_to_tower, dtype=np.float32)
 
-                # Transform the lat lon coordinates to the HRDEM tile's CRS
-                x_coords, y_coords = transformer.transform(tx_rx_path_lat_lon[0], tx_rx_path_lat_lon[1])
+    # Get the interpolated lat lon coordinates along the path from the tower to the receiver
+    path_coords = compute_tx_rx_path(lat_lon, tower_latlon, distance_to_tower)
 
-                # Extract indices that fall within the tile
-                tx_rx_path_indices = np.where((x_coords >= bounds[0]) & (x_coords <= bounds[2]) & (y_coords >= bounds[1]) & (
-                        y_coords <= bounds[3]))[0]
+    # Tiles that intersect the path (multiple HRDEM could be on top of each other (highest resolution and newest tiles sorted first))
+    return return_elevation_points(path_coords, list(hrdem_intersection_line.values), read_stats)
 
-                # Get the row and column DTM and DSM file indices for the indices on the path that fall within the tile
-                row_indices, col_indices = dsm_tif.index(x_coords[tx_rx_path_indices], y_coords[tx_rx_path_indices])
 
-                if len(tx_rx_path_indices) == 0:
-                    continue
+def return_elevation_points(path_coords, projects, read_stats=None):
+    # Surface and terrain heights at the lat lon points path_coords, from the HRDEM projects (project_id, intersection)
+    # in priority order. Projects are skipped once the points of an earlier project with the same intersection are full
 
-                step = 1000
+    # Initialize HRDEM surface and terrain height arrays
+    full_surface_h = np.zeros(len(path_coords[0]), dtype=np.float32)
+    full_terrain_h = np.zeros(len(path_coords[0]), dtype=np.float32)
+    segment_already_full = []
 
-                # Read the window from the DSM and DTM files in chunks (speeds up the download process)
-                for i in range(0, len(tx_rx_path_indices), step):
-                    # Get the indices and file coordinates for the chunk
-                    tx_rx_path_chunk_indices = tx_rx_path_indices[i:i + step] if i + step < len(tx_rx_path_indices) else tx_rx_path_indices[i:]
-                    chunk_row_indices = row_indices[i:i + step] if i + step < len(tx_rx_path_indices) else row_indices[i:]
-                    chunk_col_indices = col_indices[i:i + step] if i + step < len(tx_rx_path_indices) else col_indices[i:]
+    projected_path = ProjectedPath(path_coords)
 
-                    # Get the min and max file indices to download for the chunk
-                    min_col_index = min(chunk_col_indices)
-                    max_col_index = max(chunk_col_indices)
-                    min_row_index = min(chunk_row_indices)
-                    max_row_index = max(chunk_row_indices)
+    fetches = {}
+    next_fetch = 0
 
-                    # Download the chunk of the DSM and DTM files
-                    dsm_array = dsm_tif.read(1, window=(
-                    (min_row_index, max_row_index + 1), (min_col_index, max_col_index + 1)))
+    # Number of tiles read ahead, read from the config at call time like the read mode
+    workers = config.HRDEM_FETCH_WORKERS
 
-                    dtm_array = dtm_tif.read(1, window=(
-                    (min_row_index, max_row_index + 1), (min_col_index, max_col_index + 1)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for position, (project_id, itrsct) in enumerate(projects):
 
-                    # Replace negative elevation values
-                    dsm_array[dsm_array < 0] = 0
-                    dtm_array[dtm_array < 0] = 0
+            # Keep the DSM and DTM reads of the next tiles running in parallel, ahead of the merge
+            while next_fetch < len(projects) and next_fetch < position + workers:
+                if projects[next_fetch][1] not in segment_already_full:
+                    fetches[next_fetch] = [executor.submit(read_hrdem_band, projects[next_fetch][0], band, projected_path) for band in ('dsm', 'dtm')]
+                next_fetch += 1
 
-                    # Adjust the row and col indices to match the index of the downloaded chunk's array
-                    chunk_row_indices = [row - min_row_index for row in chunk_row_indices]
-                    chunk_col_indices = [col - min_col_index for col in chunk_col_indices]
+            # If more recent HRDEM points already have been added
+            if itrsct in segment_already_full or position not in fetches: continue
 
-                    # Replace empty (represented as 0) values with the new DSM and DTM values
-                    full_surface_h[tx_rx_path_chunk_indices] = np.where(full_surface_h[tx_rx_path_chunk_indices] == 0,
-                                                           dsm_array[(chunk_row_indices, chunk_col_indices)],
-                                                           full_surface_h[tx_rx_path_chunk_indices])
+            # Merge the tiles one at a time in priority order, so the result does not depend on which read finishes first
+            (dsm_indices, dsm_values, dsm_stats), (dtm_indices, dtm_values, dtm_stats) = [fetch.result() for fetch in fetches.pop(position)]
+            if read_stats is not None:
+                read_stats['bytes_read'] = read_stats.get('bytes_read', 0) + dsm_stats['bytes_read'] + dtm_stats['bytes_read']
 
-                    full_terrain_h[tx_rx_path_chunk_indices] = np.where(full_terrain_h[tx_rx_path_chunk_indices] == 0,
-                                                           dtm_array[(chunk_row_indices, chunk_col_indices)],
-                                                           full_terrain_h[tx_rx_path_chunk_indices])
+            if len(dsm_indices) == 0:
+                continue
 
+            # Replace empty (represented as 0) values with the new DSM and DTM values
+            full_surface_h[dsm_indices] = np.where(full_surface_h[dsm_indices] == 0, dsm_values, full_surface_h[dsm_indices])
+            full_terrain_h[dtm_indices] = np.where(full_terrain_h[dtm_indices] == 0, dtm_values, full_terrain_h[dtm_indices])
 
             # If surface already completed for that segment, break out of that segment (speeds up the process)
-            if 0 not in full_surface_h[tx_rx_path_indices]:
+            if 0 not in full_surface_h[dsm_indices]:
                 segment_already_full.append(itrsct)
 
     return full_surface_h, full_terrain_h
 
 
+def is_missing_tile(error):
+    # GDAL reports a file that does not exist locally, on S3 or over HTTP with one of these messages
+    message = str(error)
+    return any(text in message for text in ("No such file or directory", "does not exist in the file system", "HTTP response code: 404"))
+
+
 def return_land_cover_profile(lat_lon, tower_latlon, distance_to_tower):
 
     # Get the interpolated lat lon coordinates along the path from the tower to the receiver
     tx_rx_path_lat_lon = compute_tx_rx_path(lat_lon, tower_latlon, distance_to_tower)
 
-    # Initialize ESA profile array
-    dlu_profile = np.zeros(distance_to_tower)
-
     # Get the ESA tiles that intersect the path from the tower to the receiver
-    esa_intersection_line = get_esa_along_path(lat_lon, tower_latlon)
+    return return_land_cover_points(tx_rx_path_lat_lon, get_esa_along_path(lat_lon, tower_latlon))
+
+
+def return_land_cover_points(tx_rx_path_lat_lon, esa_intersection_line):
+    # ESA land cover at the lat lon points tx_rx_path_lat_lon, from the ESA tiles esa_intersection_line
+
+    from rasterio.errors import RasterioIOError
+
+    # Initialize ESA profile array (class codes fit in a byte)
+    dlu_profile = np.zeros(len(tx_rx_path_lat_lon[0]), dtype=np.uint8)
 
     # Loop through the ESA tiles that intersect the path
     for tile in esa_intersection_line:
-        # Get the ESA tile's S3 path
-        esa_tile_s3_path = f"s3://esa-worldcover/v200/2021/map/ESA_WorldCover_10m_2021_v200_{tile}_Map.tif"
+        # Get the ESA tile's S3 path (read from the config at call time, so it can point to local copies)
+        esa_tile_s3_path = config.ESA_TILE_PATH.format(tile=tile)
 
-        with rio.open(esa_tile_s3_path) as esa_tif:
+        # Tiles are resolved from the WorldCover grid, which has no tile over open water: only a missing tile is skipped
+        try:
+            esa_dataset = open_dataset(esa_tile_s3_path)
+        except RasterioIOError as error:
+            if not is_missing_tile(error):
+                raise
+            print(f"No ESA WorldCover tile {tile}, its land cover is left empty")
+            continue
+
+        with esa_dataset as esa_tif:
 
             bounds = esa_tif.bounds
 
@@ -136,26 +188,22 @@ def return_land_cover_profile(lat_lon, tower_latlon, distance_to_tower):
             tx_rx_path_indices = np.where((tx_rx_path_lat_lon[1] >= bounds[0]) & (tx_rx_path_lat_lon[1] <= bounds[2]) & (tx_rx_path_lat_lon[0] >= bounds[1]) & (
                     tx_rx_path_lat_lon[0] <= bounds[3]))[0]
 
-            # Get the row and column ESA file indices for the indices that fall within the tile
-            row_indices, col_indices = esa_tif.index(tx_rx_path_lat_lon[1][tx_rx_path_indices], tx_rx_path_lat_lon[0][tx_rx_path_indices])
-
             if len(tx_rx_path_indices) == 0:
                 continue
 
+            # Get the row and column ESA file indices of the pixels under the path (10m pixels hold up to 10 consecutive points)
+            row_indices, col_indices, run_of_point = pixel_runs(*pixel_indices(esa_tif.transform, tx_rx_path_lat_lon[1][tx_rx_path_indices], tx_rx_path_lat_lon[0][tx_rx_path_indices]))
+
             # Get the min and max ESA file indices to download for the ESA tile
-            min_col_index = min(col_indices)
-            max_col_index = max(col_indices)
-            min_row_index = min(row_indices)
-            max_row_index = max(row_indices)
+            min_col_index = col_indices.min()
+            max_col_index = col_indices.max()
+            min_row_index = row_indices.min()
+            max_row_index = row_indices.max()
 
             # Download the ESA tile within the specified bounds
             esa_tile_array = esa_tif.read(1, window=((min_row_index, max_row_index + 1), (min_col_index, max_col_index + 1)))
 
-            # Adjust the row and col indices to match the index of the downloaded tile array
-            row_indices = [row - min_row_index for row in row_indices]
-            col_indices = [col - min_col_index for col in col_indices]
-
-            # Set the dlu profile values to the corresponding ESA tile values
-            dlu_profile[tx_rx_path_indices] = esa_tile_array[(row_indices, col_indices)]
+            # Gather each pixel once (indices adjusted to the downloaded tile array) and expand to every point of the path
+            dlu_profile[tx_rx_path_indices] = esa_tile_array[row_indices - min_row_index, col_indices - min_col_index][run_of_point]
 
     return dlu_profile
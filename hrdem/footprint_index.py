@@ -0,0 +1,77 @@
+import json
+import geopandas as gpd
+import pandas as pd
+
+from os.path import exists
+from shapely.geometry import shape
+
+from hrdem.config import HRDEM_STAC_API_URL, HRDEM_STAC_COLLECTION, HRDEM_FOOTPRINT_INDEX
+from hrdem.remote import configure_remote_access
+
+pd.options.mode.chained_assignment = None  # default='warn'
+
+_footprints = None
+
+def sort_footprints(footprints):
+    # Highest resolution first, then newest project first (priority order of the HRDEM tiles)
+    footprints['date'] = pd.to_datetime(footprints['date'], utc=True)
+    footprints['resolution'] = footprints['project_name'].str[-2].astype(int)
+    footprints.sort_values(["resolution", "date"], ascending=[True, False], inplace=True, ignore_index=True, kind='stable')
+    return footprints
+
+
+def read_stac_items(items):
+    # Build the footprint table in one go from STAC item dictionaries
+    return gpd.GeoDataFrame({
+        'project_name': [item['id'] for item in items],
+        'date': [item['properties'].get('datetime') for item in items],
+        'geometry': [shape(item['geometry']) for item in items]
+    }, crs="EPSG:4326")
+
+
+def build_footprint_index(source=None, index_path=HRDEM_FOOTPRINT_INDEX):
+    # source: STAC catalog export (.json/.geojson item collection), any file readable by geopandas
+    # with project_name, date and geometry columns (e.g. GeoPackage), or None to export the whole collection from the STAC API
+    if source is None:
+        from pystac_client import Client
+        configure_remote_access()
+        client = Client.open(HRDEM_STAC_API_URL)
+        footprints = read_stac_items([item.to_dict() for item in client.search(collections=[HRDEM_STAC_COLLECTION]).items()])
+    elif source.endswith(('.json', '.geojson')):
+        with open(source) as f:
+            catalog = json.load(f)
+        footprints = read_stac_items(catalog['features'] if 'features' in catalog else catalog)
+    else:
+        footprints = gpd.read_file(source)[['project_name', 'date', 'geometry']]
+
+    footprints = sort_footprints(footprints)
+
+    # Dates are stored as ISO strings so every driver can round-trip them
+    stored = footprints.copy()
+    stored['date'] = stored['date'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    stored.to_file(index_path, driver="GPKG")
+
+    return footprints
+
+
+def load_footprint_index(index_path=HRDEM_FOOTPRINT_INDEX):
+    # Load the persisted footprints once per process, with their spatial index (R-tree) built up front
+    global _footprints
+    if _footprints is None:
+        if not exists(index_path):
+            return None
+        _footprints = sort_footprints(gpd.read_file(index_path))
+        _footprints.sindex
+    return _footprints
+
+
+def query_footprint_index(footprints, shapely_line):
+    # Footprints are stored in priority order, so sorting the candidate positions keeps that order
+    candidates = footprints.sindex.query(shapely_line, predicate='intersects')
+    if len(candidates) == 0:
+        return []
+    candidates = sorted(candidates)
+    return pd.DataFrame({
+        'project_name': footprints['project_name'].values[candidates],
+        'intersection_line': [geometry.intersection(shapely_line) for geometry in footprints.geometry.values[candidates]]
+    })
@@ -1,63 +1,89 @@
-import geopandas as gpd
-import pandas as pd
-import ssl
+from math import ceil, floor
 
-from os import environ
-from pystac_client import Client
-from shapely.geometry import LineString, shape
+from hrdem.config import HRDEM_STAC_API_URL, HRDEM_STAC_COLLECTION, ESA_TILE_SIZE
+from hrdem.remote import configure_remote_access
 
-environ['AWS_NO_SIGN_REQUEST'] = 'YES'
-environ['AWS_REGION'] = 'ca-central-1'
+# Footprints of the area being processed (see hrdem/area.py), queried instead of the index or the STAC API
+_area_footprints = None
 
-ssl._create_default_https_context = ssl._create_unverified_context
-pd.options.mode.chained_assignment = None  # default='warn'
+def set_area_footprints(footprints):
+    global _area_footprints
+    _area_footprints = footprints
 
-def get_hrdem_along_path(lat_lon, tower_lat_lon):
 
-    # Perform spatial search against the STAC API
-    collections = ['hrdem-lidar']
-    stac_api_url = "https://datacube.services.geo.ca/api/"
+def get_hrdem_footprints(geometry):
 
-    client = Client.open(stac_api_url)
+    # geopandas, shapely and pystac_client are only loaded when HRDEM footprints are looked up
+    from hrdem.footprint_index import load_footprint_index, read_stac_items, sort_footprints
 
-    # Get intersection between line and all hrdem footprints
-    shapely_line = LineString([(lat_lon[1], lat_lon[0]), (tower_lat_lon[1], tower_lat_lon[0])])
+    # Sorted footprints (project_name, date, geometry) of the HRDEM projects intersecting the geometry
+    footprints = load_footprint_index()
+    if footprints is not None:
+        return footprints.iloc[sorted(footprints.sindex.query(geometry, predicate='intersects'))].reset_index(drop=True)
+
+    # Perform spatial search against the STAC API
+    from pystac_client import Client
+    configure_remote_access()
+    client = Client.open(HRDEM_STAC_API_URL)
 
     results = client.search(
-        collections=collections,
-        intersects=shapely_line
+        collections=[HRDEM_STAC_COLLECTION],
+        intersects=geometry
     )
 
-    intersection_poly = gpd.GeoDataFrame(columns=['project_name', 'date', 'geometry'])
-    
-    # Get DTM/DSM asset links from STAC results
-    for i, item in enumerate(results.items()):
+    # Get DTM/DSM asset links from STAC results, sorted by resolution and year
+    return sort_footprints(read_stac_items([item.to_dict() for item in results.items()]))
+
+
+def get_hrdem_along_path(lat_lon, tower_lat_lon):
+
+    from shapely.geometry import LineString
+    from hrdem.footprint_index import load_footprint_index, query_footprint_index
 
-        # Append the new row to the DataFrame using append()
-        intersection_poly.loc[i] = [item.id, item.datetime, shape(item.geometry)]
+    # Get intersection between line and all hrdem footprints
+    shapely_line = LineString([(lat_lon[1], lat_lon[0]), (tower_lat_lon[1], tower_lat_lon[0])])
+
+    # Query the footprints already loaded for the area, or the local footprint index when it has been built (no network access)
+    footprints = _area_footprints if _area_footprints is not None else load_footprint_index()
+    if footprints is not None:
+        return query_footprint_index(footprints, shapely_line)
+
+    intersection_poly = get_hrdem_footprints(shapely_line)
 
     # If still empty
     if intersection_poly.empty:
         return []
     else:
-
-        # Sort by distance to tower and year
-        intersection_poly['intersection_line'] = intersection_poly[['geometry']].intersection(shapely_line)
-        intersection_poly['date'] = pd.to_datetime(intersection_poly['date'])
-        intersection_poly['resolution'] = intersection_poly['project_name'].str[-2].astype(int)
-        intersection_poly.sort_values(["resolution", "date"], ascending=[True, False], inplace=True, ignore_index=True)
+        intersection_poly['intersection_line'] = intersection_poly.geometry.intersection(shapely_line)
         return intersection_poly[['project_name', 'intersection_line']]
 
 
-def get_esa_along_path(lat_lon, tower_lat_lon):
+def esa_tile_id(lat, lon):
 
-    catalog = Client.open("https://planetarycomputer.microsoft.com/api/stac/v1")
+    # ESA WorldCover tiles are 3x3 degrees, named after their south-west corner (e.g. N45W078)
+    tile_lat = int(floor(lat / ESA_TILE_SIZE) * ESA_TILE_SIZE)
+    tile_lon = int(floor(lon / ESA_TILE_SIZE) * ESA_TILE_SIZE)
 
-    shapely_line = LineString([(lat_lon[1], lat_lon[0]), (tower_lat_lon[1], tower_lat_lon[0])])
+    return f"{'N' if tile_lat >= 0 else 'S'}{abs(tile_lat):02d}{'E' if tile_lon >= 0 else 'W'}{abs(tile_lon):03d}"
 
-    search = catalog.search(
-        collections=["esa-worldcover"],
-        intersects=shapely_line,
-    )
 
-    return [str(item).split("_")[-1].split(">")[0] for item in list(search.items()) if "2021" in str(item)]
+def get_esa_along_path(lat_lon, tower_lat_lon):
+
+    # Fractions of the segment (from the tower) where it crosses a tile boundary
+    crossings = {0.0, 1.0}
+    for start, end in [(tower_lat_lon[0], lat_lon[0]), (tower_lat_lon[1], lat_lon[1])]:
+        if start == end: continue
+        low, high = sorted((start, end))
+        for boundary in range(int(ceil(low / ESA_TILE_SIZE)), int(floor(high / ESA_TILE_SIZE)) + 1):
+            crossings.add((boundary * ESA_TILE_SIZE - start) / (end - start))
+    crossings = sorted(crossings)
+
+    # Tiles containing the endpoints and the middle of every piece between two crossings, ordered from the tower
+    fractions = [0.0] + [(t0 + t1) / 2 for t0, t1 in zip(crossings[:-1], crossings[1:])] + [1.0]
+    tiles = []
+    for t in fractions:
+        tile = esa_tile_id(tower_lat_lon[0] + t * (lat_lon[0] - tower_lat_lon[0]), tower_lat_lon[1] + t * (lat_lon[1] - tower_lat_lon[1]))
+        if tile not in tiles:
+            tiles.append(tile)
+
+    return tiles
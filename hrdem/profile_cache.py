@@ -0,0 +1,53 @@
+import hashlib
+import json
+import numpy as np
+
+from os import makedirs, replace
+from os.path import exists, join
+
+from hrdem.config import PROFILE_CACHE_ENABLED, PROFILE_CACHE_FOLDER, PROFILE_CACHE_PRECISION, PROFILE_DATA_VERSIONS
+from propagation.profile import PathProfile
+
+def profile_key(tower_latlon, lat_lon):
+
+    # Both directions of a link share one entry, stored from the lowest of the two rounded points
+    first = (round(tower_latlon[0], PROFILE_CACHE_PRECISION), round(tower_latlon[1], PROFILE_CACHE_PRECISION))
+    second = (round(lat_lon[0], PROFILE_CACHE_PRECISION), round(lat_lon[1], PROFILE_CACHE_PRECISION))
+    flipped = second < first
+    if flipped:
+        first, second = second, first
+
+    key = json.dumps([first, second, PROFILE_DATA_VERSIONS], sort_keys=True)
+    return join(PROFILE_CACHE_FOLDER, hashlib.sha1(key.encode()).hexdigest() + ".npz"), flipped
+
+
+def load_profile(tower_latlon, lat_lon):
+
+    # Returns the PathProfile from the tower to the receiver, or None when not cached
+    if not PROFILE_CACHE_ENABLED:
+        return None
+
+    cache_path, flipped = profile_key(tower_latlon, lat_lon)
+    if not exists(cache_path):
+        return None
+
+    with np.load(cache_path) as cached:
+        profile = PathProfile(cached['surface'], cached['terrain'], cached['clutter'], cached['nodata'], float(cached['spacing']))
+
+    # Profiles cached for the reversed link are read backwards
+    return profile.reversed() if flipped else profile
+
+
+def save_profile(tower_latlon, lat_lon, profile):
+
+    if not PROFILE_CACHE_ENABLED:
+        return
+
+    cache_path, flipped = profile_key(tower_latlon, lat_lon)
+    if flipped:
+        profile = profile.reversed()
+
+    makedirs(PROFILE_CACHE_FOLDER, exist_ok=True)
+    with open(cache_path + ".tmp", "wb") as f:
+        np.savez_compressed(f, surface=profile.surface, terrain=profile.terrain, clutter=profile.clutter, nodata=profile.nodata, spacing=profile.spacing)
+    replace(cache_path + ".tmp", cache_path)
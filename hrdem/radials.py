@@ -0,0 +1,69 @@
+import numpy as np
+
+from geographiclib.geodesic import Geodesic as geo
+
+from hrdem.area import AreaOfInterest
+from hrdem.elevation import return_elevation_points, return_land_cover_points
+from propagation.profile import PathProfile
+from propagation.tower import Rx
+
+class RadialProfiles:
+    # Surface, terrain and clutter profiles along radials out of a Tx, one row per radial sampled from the tower
+    # (same sampling as a link from the Tx to the end of the radial, so a Rx on a radial reuses a prefix of it)
+    def __init__(self, tx, azimuths, ends, surface, terrain, clutter):
+        self.tx = tx
+        self.azimuths = azimuths
+        self.ends = ends
+        self.surface = surface
+        self.terrain = terrain
+        self.clutter = clutter
+        self.spacing = np.array([end[2] / (surface.shape[1] - 1) for end in ends]) # meters between two samples
+
+    def samples(self, radial, distance):
+        # Number of samples of the link from the Tx to the Rx at distance (m) along the radial (as for a link, one
+        # sample per spacing)
+        if distance > self.ends[radial][2]:
+            raise ValueError(f"Rx at {distance} m beyond the end of the radials ({self.ends[radial][2]:.1f} m)")
+        return int(round(distance / self.spacing[radial], 6))
+
+    def rx_position(self, radial, distance):
+        # Lat lon of the last sample of the link to the Rx at distance (m) along the radial
+        sample = self.samples(radial, distance) - 1
+        end_lat, end_lon, _ = self.ends[radial]
+        t = sample / (self.surface.shape[1] - 1)
+        return self.tx.lat + t * (end_lat - self.tx.lat), self.tx.lon + t * (end_lon - self.tx.lon)
+
+    def profile(self, radial, distance):
+        # Profile of the link from the Tx to the Rx at distance (m) along the radial
+        samples = self.samples(radial, distance)
+        return PathProfile(self.surface[radial, :samples].copy(), self.terrain[radial, :samples].copy(), self.clutter[radial, :samples].copy(),
+                           spacing=self.spacing[radial])
+
+
+def extract_radials(tx, radius, n_radials=360):
+
+    # Radial ends at radius (m) from the Tx, clockwise from the north
+    azimuths = np.arange(n_radials) * 360 / n_radials
+    ends = []
+    for azimuth in azimuths:
+        end = geo.WGS84.Direct(tx.lat, tx.lon, azimuth, radius)
+        ends.append((end['lat2'], end['lon2'], end['s12']))
+
+    # Points of every radial, sampled from the tower like a link to its end. Every other radial is walked back to the
+    # tower, so that consecutive points (read in windows of consecutive pixels) stay close across radials
+    n_samples = int(radius)
+    lats = np.linspace(tx.lat, [end[0] for end in ends], n_samples, axis=1)
+    lons = np.linspace(tx.lon, [end[1] for end in ends], n_samples, axis=1)
+    lats[1::2], lons[1::2] = lats[1::2, ::-1], lons[1::2, ::-1]
+    path_coords = (lats.ravel(), lons.ravel())
+
+    # Read the rasters under all the radials once, then sample the points of all the radials at once from the local copies
+    rx_list = [Rx(lat, lon, height=1) for lat, lon, _ in ends]
+    with AreaOfInterest(tx, rx_list) as aoi:
+        surface, terrain = [heights.reshape(n_radials, n_samples) for heights in return_elevation_points(path_coords, [(project_id, project_id) for project_id in aoi.projects])]
+        clutter = return_land_cover_points(path_coords, aoi.tiles).reshape(n_radials, n_samples)
+
+    for heights in (surface, terrain, clutter):
+        heights[1::2] = heights[1::2, ::-1]
+
+    return RadialProfiles(tx, azimuths, ends, surface, terrain, clutter)
@@ -0,0 +1,17 @@
+import ssl
+
+from os import environ
+
+_configured = False
+
+def configure_remote_access():
+    # Anonymous access to the public S3 buckets and to the STAC API, set up once before the first remote read
+    global _configured
+    if _configured:
+        return
+
+    environ['AWS_NO_SIGN_REQUEST'] = 'YES'
+    environ['AWS_REGION'] = 'ca-central-1'
+
+    ssl._create_default_https_context = ssl._create_unverified_context
+    _configured = True
@@ -0,0 +1,20 @@
+import numpy as np
+import sys
+
+def pixel_indices(transform, x_coords, y_coords):
+    # Vectorized equivalent of dataset.index(x, y): row and column of the pixel containing every point
+    eps = sys.float_info.epsilon
+    cols, rows = ~transform * (np.asarray(x_coords) + eps, np.asarray(y_coords) - eps)
+    return np.floor(rows).astype(np.int64), np.floor(cols).astype(np.int64)
+
+
+def pixel_runs(row_indices, col_indices):
+    # The path is sampled every meter, so consecutive points often fall in the same pixel (up to 10 in a row for ESA).
+    # Returns the pixel of every run of consecutive points and, for every point, the index of its run
+    rows = np.asarray(row_indices)
+    cols = np.asarray(col_indices)
+    run_starts = np.ones(len(rows), dtype=bool)
+    run_starts[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    run_of_point = np.cumsum(run_starts) - 1
+
+    return rows[run_starts], cols[run_starts], run_of_point
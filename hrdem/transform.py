@@ -0,0 +1,32 @@
+from threading import Lock
+
+# CRS for WGS84 (lat lon coordinate system)
+WGS84 = "EPSG:4326"
+
+_transformers = {}
+_transformers_lock = Lock()
+
+def get_transformer(src_crs, dst_crs, always_xy=False):
+    # Transformers are built once per CRS pair for the whole process and shared by all the tiles, links and threads
+    # (pyproj transformers are thread safe since pyproj 3.1)
+    key = (str(src_crs), str(dst_crs), always_xy)
+    with _transformers_lock:
+        if key not in _transformers:
+            import pyproj
+            _transformers[key] = pyproj.Transformer.from_crs(src_crs, dst_crs, always_xy=always_xy)
+        return _transformers[key]
+
+
+class ProjectedPath:
+    # Lat lon coordinates of one link, transformed once per tile CRS and shared by the tiles (and threads) of that link
+    def __init__(self, path_lat_lon):
+        self.path_lat_lon = path_lat_lon
+        self.coords = {}
+        self.lock = Lock()
+
+    def transform(self, dst_crs):
+        key = str(dst_crs)
+        with self.lock:
+            if key not in self.coords:
+                self.coords[key] = get_transformer(WGS84, dst_crs).transform(self.path_lat_lon[0], self.path_lat_lon[1])
+            return self.coords[key]
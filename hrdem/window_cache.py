@@ -0,0 +1,172 @@
+import hashlib
+import numpy as np
+
+from collections import OrderedDict
+from os import listdir, makedirs, remove, replace, utime
+from os.path import getmtime, getsize, join
+from threading import Lock, get_ident
+
+from hrdem import config
+from hrdem.config import WINDOW_CACHE_FOLDER, WINDOW_CACHE_MAX_BYTES
+from hrdem.dataset_pool import is_area_dataset
+
+class WindowCache:
+    # Size-bounded on-disk cache of raster blocks, keyed by source file, project id, band (dsm/dtm) and block (safe to share between threads)
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self.lock = Lock()
+
+        # Rebuild the LRU order from the files left by previous runs (oldest first)
+        makedirs(folder, exist_ok=True)
+        self.entries = OrderedDict()
+        files = [name for name in listdir(folder) if name.endswith(".npy")]
+        for name in sorted(files, key=lambda name: getmtime(join(folder, name))):
+            self.entries[name] = getsize(join(folder, name))
+            self.size += self.entries[name]
+        self.evict()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "size": self.size}
+
+    def read_block(self, dataset, project_id, band, block_row, block_col, read_stats=None):
+        # The source file is part of the key, so tiles read from another location (e.g. local copies) never get stale blocks
+        source = hashlib.sha1(dataset.name.encode()).hexdigest()[:16]
+        key = f"{project_id}_{band}_{source}_{block_row}_{block_col}.npy"
+        path = join(self.folder, key)
+
+        # Serve the block from local disk and mark it as most recently used
+        with self.lock:
+            if key in self.entries:
+                try:
+                    block = np.load(path)
+                except (OSError, ValueError):
+                    self.discard(key)
+                else:
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                    utime(path)
+                    return block
+            self.misses += 1
+
+        # Read the block from the dataset and store it (written to a temporary file first so readers never see a partial block)
+        block = dataset.read(1, window=dataset.block_window(1, block_row, block_col))
+        count_bytes_read(read_stats, dataset, [(block_row, block_col)])
+        tmp_path = f"{path}.{get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, block)
+        replace(tmp_path, path)
+
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries[key]
+            self.entries[key] = getsize(path)
+            self.entries.move_to_end(key)
+            self.size += self.entries[key]
+            self.evict()
+
+        return block
+
+    def read_window(self, dataset, project_id, band, window, read_stats=None):
+        (min_row, max_row), (min_col, max_col) = clip_window(dataset, window)
+        array = np.empty((max(max_row - min_row, 0), max(max_col - min_col, 0)), dtype=dataset.dtypes[0])
+
+        # Assemble the window from every block it overlaps
+        block_h, block_w = dataset.block_shapes[0]
+        for block_row, block_col in window_blocks(dataset, window):
+            block = self.read_block(dataset, project_id, band, block_row, block_col, read_stats)
+            row0, col0 = block_row * block_h, block_col * block_w
+            r0, r1 = max(min_row, row0), min(max_row, row0 + block.shape[0])
+            c0, c1 = max(min_col, col0), min(max_col, col0 + block.shape[1])
+            array[r0 - min_row:r1 - min_row, c0 - min_col:c1 - min_col] = block[r0 - row0:r1 - row0, c0 - col0:c1 - col0]
+
+        return array
+
+    def discard(self, key):
+        self.size -= self.entries.pop(key)
+        try:
+            remove(join(self.folder, key))
+        except OSError:
+            pass
+
+    def evict(self):
+        # Drop least recently used blocks until the cache fits in its size budget
+        while self.size > self.max_bytes and self.entries:
+            self.discard(next(iter(self.entries)))
+
+
+_window_cache = None
+
+def get_window_cache():
+    global _window_cache
+    if _window_cache is None:
+        _window_cache = WindowCache(WINDOW_CACHE_FOLDER, WINDOW_CACHE_MAX_BYTES)
+    return _window_cache
+
+
+def clip_window(dataset, window):
+    # Clip a ((row_start, row_stop), (col_start, col_stop)) window to the dataset extent (same behaviour as a non-boundless rasterio read)
+    (min_row, max_row), (min_col, max_col) = window
+    return (max(min_row, 0), min(max_row, dataset.height)), (max(min_col, 0), min(max_col, dataset.width))
+
+
+def window_blocks(dataset, window):
+    # (row, col) of the internal blocks overlapped by the window
+    (min_row, max_row), (min_col, max_col) = clip_window(dataset, window)
+    if min_row >= max_row or min_col >= max_col:
+        return []
+
+    block_h, block_w = dataset.block_shapes[0]
+    return [(block_row, block_col) for block_row in range(min_row // block_h, (max_row - 1) // block_h + 1)
+            for block_col in range(min_col // block_w, (max_col - 1) // block_w + 1)]
+
+
+def count_bytes_read(read_stats, dataset, blocks):
+    # Bytes of the internal blocks fetched from a dataset, accumulated per link by the caller. GDAL fetches whole blocks
+    # whatever the window, so both read modes are counted in blocks (cache hits and local area datasets are free)
+    if read_stats is not None and not is_area_dataset(dataset):
+        itemsize = np.dtype(dataset.dtypes[0]).itemsize
+        for block_row, block_col in blocks:
+            block_window = dataset.block_window(1, block_row, block_col)
+            read_stats['bytes_read'] = read_stats.get('bytes_read', 0) + int(block_window.width * block_window.height) * itemsize
+
+
+def read_block(dataset, project_id, band, block_row, block_col, read_stats=None):
+    if config.WINDOW_CACHE_ENABLED and not is_area_dataset(dataset):
+        return get_window_cache().read_block(dataset, project_id, band, block_row, block_col, read_stats)
+    block = dataset.read(1, window=dataset.block_window(1, block_row, block_col))
+    count_bytes_read(read_stats, dataset, [(block_row, block_col)])
+    return block
+
+
+def read_window(dataset, project_id, band, window, read_stats=None):
+    # Read a ((row_start, row_stop), (col_start, col_stop)) window, through the local block cache when enabled
+    if config.WINDOW_CACHE_ENABLED and not is_area_dataset(dataset):
+        return get_window_cache().read_window(dataset, project_id, band, window, read_stats)
+    array = dataset.read(1, window=window)
+    count_bytes_read(read_stats, dataset, window_blocks(dataset, window))
+    return array
+
+
+def read_path(dataset, project_id, band, row_indices, col_indices, read_stats=None):
+    # Gather the pixels at (row, col) by reading only the internal blocks the path goes through
+    rows = np.clip(np.asarray(row_indices), 0, dataset.height - 1)
+    cols = np.clip(np.asarray(col_indices), 0, dataset.width - 1)
+    values = np.empty(len(rows), dtype=dataset.dtypes[0])
+    if len(rows) == 0:
+        return values
+
+    # Group the samples by block
+    block_h, block_w = dataset.block_shapes[0]
+    blocks, block_of_sample = np.unique(np.stack([rows // block_h, cols // block_w], axis=1), axis=0, return_inverse=True)
+    order = np.argsort(block_of_sample.ravel(), kind='stable')
+    samples_by_block = np.split(order, np.cumsum(np.bincount(block_of_sample.ravel(), minlength=len(blocks)))[:-1])
+
+    for (block_row, block_col), samples in zip(blocks, samples_by_block):
+        block = read_block(dataset, project_id, band, block_row, block_col, read_stats)
+        values[samples] = block[rows[samples] - block_row * block_h, cols[samples] - block_col * block_w]
+
+    return values
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+from time import perf_counter
+
+# Entry points timed by the import benchmark (each one in a fresh interpreter)
+ENTRY_POINTS = ["main", "safe_metrics", "propagation.pathloss", "hrdem.elevation", "hrdem.cdem", "plot"]
+
+# Modules that should only be loaded by the stage that needs them
+HEAVY_MODULES = ["geopandas", "pandas", "rasterio", "pystac_client", "shapely", "pyproj", "matplotlib", "requests"]
+
+def time_import(module, repeat=5):
+
+    # Best wall time of a fresh interpreter importing the module, and the heavy modules it loaded
+    code = f"import sys; import {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, loaded
+
+
+if __name__ == '__main__':
+
+    baseline = time_import("numpy")[0]
+    print(f"{'python + numpy':<24}{baseline * 1000:8.0f} ms")
+    for module in ENTRY_POINTS:
+        elapsed, loaded = time_import(module)
+        print(f"{module:<24}{elapsed * 1000:8.0f} ms   {loaded}")
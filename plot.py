@@ -1,9 +1,13 @@
 from os.path import join
-import matplotlib.pyplot as plt
 
 land_cover_colors = {0: "#000000", 10: "#006400", 20: "#ffbb22", 30: "#ffff4c", 40: "#f096ff", 50: "#fa0000", 60: "#b4b4b4", 70: "#f0f0f0", 80: "#0064c8", 90: "#0096a0", 95: "#00cf75", 100: "#fae6a0"}
 
-def plot_tx_to_rx_path(surface_height, terrain_height, clutter_path, tx_height, rx_height, save_folder, index):
+def plot_tx_to_rx_path(profile, tx_height, rx_height, save_folder, index):
+
+    # matplotlib is only loaded when a profile is plotted
+    import matplotlib.pyplot as plt
+
+    surface_height, terrain_height, clutter_path = profile.surface, profile.terrain, profile.clutter
 
     fig, ax = plt.subplots(figsize=(15,5))
     ax.set_title(f"2D elevation profile - Index {index}")
@@ -5,6 +5,9 @@ RET_DB_LIMIT = 30 # dB
 MINIMAL_CLUTTER_DEPTH = 2 # meters
 MINIMAL_CLUTTER_HEIGHT = 2 # meters
 
+# Compile the scalar loops of the RET, top diffraction and P.1812 models with Numba when it is installed
+USE_NUMBA = True
+
 ## P1812 parameters
 
 # Climatic zones
@@ -17,4 +20,11 @@ CLUTTER_VALUES = {2: 0, 3: 10, 4: 15, 5:20}
 
 # Time and location percentage for P1812
 TIME_PERCENTAGE_P1812 = 50
-LOCATION_PERCENTAGE_P1812 = 50
\ No newline at end of file
+LOCATION_PERCENTAGE_P1812 = 50
+
+# Location variability standard deviation sigmaL for P1812 (dB), 0 ignores the location percentage
+LOCATION_VARIABILITY_P1812 = 0
+
+# Compute the P.1812 losses of all the Rx of a radial at once in compute_radial_safe_metrics (compute_p1812_radial),
+# about 5 times faster but approximate: a few dB off for the Rx whose path points fall across a clutter edge
+P1812_RADIAL = False
\ No newline at end of file
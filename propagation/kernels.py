@@ -0,0 +1,227 @@
+import numpy as np
+
+from importlib.util import find_spec
+
+from propagation.config import USE_NUMBA
+
+# Scalar loops of the RET, top diffraction and P.1812 models, compiled with Numba when it is installed
+# (and USE_NUMBA is set), run as plain Python otherwise. Numba is only imported, and the kernels compiled,
+# on the first call of a kernel; the Python version of a kernel is kept in .py_func
+NUMBA_ENABLED = USE_NUMBA and find_spec("numba") is not None
+
+_kernels = {}
+_compiled = None
+
+def kernel(function):
+    if not NUMBA_ENABLED:
+        return function
+
+    _kernels[function.__name__] = function
+
+    def dispatch(*args):
+        return compile_kernels()[function.__name__](*args)
+
+    dispatch.py_func = function
+    return dispatch
+
+
+def compile_kernels():
+    # Kernels calling each other find the compiled version in the module globals
+    global _compiled
+    if _compiled is None:
+        from numba import njit
+        _compiled = {name: njit(cache=True)(function) for name, function in _kernels.items()}
+        globals().update(_compiled)
+    return _compiled
+
+
+@kernel
+def fn(idxn, mu, mu_n, N):
+    # ret_model.Fn for a vector mu_n of N+1 values
+    smalleps = 1e-9
+    yy = 0.0
+
+    if idxn == 0:
+        if ((abs(mu + 1) < smalleps or mu > -1) and (mu < mu_n[1] or abs(mu - mu_n[1]) < smalleps)):
+            yy = (mu_n[1] - mu) / (mu_n[1] + 1)
+
+    elif idxn == N:
+        if ((abs(mu - 1) < smalleps or mu < 1) and (mu > mu_n[N-1] or abs(mu - mu_n[N-1]) < smalleps)):
+            yy = (mu - mu_n[N-1]) / (1 - mu_n[N-1])
+
+    else:
+        if ((abs(mu - mu_n[idxn-1]) < smalleps or mu > mu_n[idxn-1]) and (mu < mu_n[idxn] or abs(mu - mu_n[idxn]) < smalleps)):
+            yy = (mu - mu_n[idxn-1]) / (mu_n[idxn] - mu_n[idxn-1])
+
+        if ((abs(mu - mu_n[idxn]) < smalleps or mu > mu_n[idxn]) and (mu < mu_n[idxn+1] or abs(mu - mu_n[idxn+1]) < smalleps)):
+            yy = (mu_n[idxn+1] - mu) / (mu_n[idxn+1] - mu_n[idxn])
+
+    return yy
+
+
+@kernel
+def eigenvalues(Pn, mu_n, N, What, kMin):
+    # Attenuation coefficients s_k of ret_model_computation, as the crossings of 1 by the LHS of eq.(12), P.833-9
+    # evaluated for 300N values of s between 0 and +1. Returns sk, lk and the index k of the last one found
+    sk = np.zeros(kMin)
+    lk = np.zeros(kMin)
+    k = -1
+
+    L12_prev = 0.0
+    s_prev = 0.0
+    for j in range(0, 300*N):
+        s = (j+1-0.3)/(50*N)
+
+        L12 = 0.0
+        for n in range(N+1):
+            L12 = L12 + Pn[n]/(1-mu_n[n]/s)
+
+        L12 = L12*What/2
+
+        if j > 0:
+            if L12 <= 1 and L12_prev >= 1:
+                if k == kMin - 1:
+                    raise IndexError("More eigenvalues found than expected")
+                k = k + 1
+                lk[k] = 1
+                sk[k] = (s*(L12_prev-1)+s_prev*(1-L12))/(L12_prev-L12)
+
+        L12_prev = L12
+        s_prev = s
+
+    return sk, lk, k
+
+
+@kernel
+def scattered_sum(A, tauHat, sk, muR, mu_n, N):
+    # Sum over the attenuation coefficients s_k of the scattered term of ret_model_computation
+    kSum = 0.0
+    for k in range(len(sk)):
+        nSum = 0.0
+        for n in range(N+1):
+            nSum = nSum + fn(n, muR, mu_n, N)/(1-(mu_n[n]/sk[k]))
+        kSum = kSum + A[k]*np.exp(-tauHat/sk[k])*nSum
+    return kSum
+
+
+@kernel
+def boersma_recurrence(IBnqof1Array, Nedges, rmaxgfzero):
+    # Columns 3 to rmaxgfzero+1 of the Boersma functions IB(n, q) of topDiffraction, from its first two columns
+    coeff11 = 1/(2*np.sqrt(np.pi))
+    for cc in range(3, rmaxgfzero+1):
+        for rr in range(Nedges):
+            sum1 = (1.0 if cc-1 == 0 else 0.0)/np.sqrt(rr+1)
+            for mmm in range(rr):
+                sum1 = sum1 + IBnqof1Array[mmm, cc-2] / np.sqrt(rr-mmm)
+            IBnqof1Array[rr, cc-1] = 0.5*(rr+1)*(cc-2)*IBnqof1Array[rr, cc-3] + coeff11*sum1
+    return IBnqof1Array
+
+
+@kernel
+def se_ft_terms(X, Bt, Br, K):
+    # Distance and height gain terms of dl_se_ft_inner for the two polarizations
+    Fx = np.zeros(2)
+    GYt = np.zeros(2)
+    GYr = np.zeros(2)
+
+    for ii in range(2):
+        if X[ii] >= 1.6:
+            Fx[ii] = 11 + 10 * np.log10(X[ii]) - 17.6 * X[ii]
+        else:
+            Fx[ii] = - 20 * np.log10(X[ii]) - 5.6488 * (X[ii]) ** 1.425
+
+    for ii in range(2):
+        if Bt[ii] > 2:
+            GYt[ii] = 17.6 * (Bt[ii] - 1.1) ** 0.5 - 5 * np.log10(Bt[ii] - 1.1) - 8
+        else:
+            GYt[ii] = 20 * np.log10(Bt[ii] + 0.1 * Bt[ii] ** 3)
+        if Br[ii] > 2:
+            GYr[ii] = 17.6 * (Br[ii] - 1.1) ** 0.5 - 5 * np.log10(Br[ii] - 1.1) - 8
+        else:
+            GYr[ii] = 20 * np.log10(Br[ii] + 0.1 * Br[ii] ** 3)
+        if GYr[ii] < 2 + 20 * np.log10(K[ii]):
+            GYr[ii] = 2 + 20 * np.log10(K[ii])
+        if GYt[ii] < 2 + 20 * np.log10(K[ii]):
+            GYt[ii] = 2 + 20 * np.log10(K[ii])
+
+    return Fx, GYt, GYr
+
+
+@kernel
+def upper_envelope(a, b, last, c):
+    # For each query j, the index i <= last[j] of the highest line a[i] - b[i] * c[j] (the first one on ties, -1 when
+    # last[j] < 0), for strictly increasing b. The upper envelope of the lines is built once, adding them in the order
+    # of the queries' last, and searched for each c[j]: O((n + m) log n) for n lines and m queries instead of O(n m)
+    best = np.full(len(c), -1)
+    hull = np.zeros(len(a), dtype=np.int64)
+    top = 0
+    i = 0
+
+    for j in np.argsort(last):
+        while i <= last[j]:
+            # Line i has the steepest descent so far: drop the lines it hides at every c where they were the highest
+            while top >= 2 and (a[i] - a[hull[top-1]]) * (b[hull[top-1]] - b[hull[top-2]]) >= (a[hull[top-1]] - a[hull[top-2]]) * (b[i] - b[hull[top-1]]):
+                top -= 1
+            hull[top] = i
+            top += 1
+            i += 1
+
+        if top == 0:
+            continue
+
+        # The lines of the envelope are the highest one after the other as c decreases
+        low, high = 0, top - 1
+        while low < high:
+            middle = (low + high) // 2
+            if a[hull[middle]] - b[hull[middle]] * c[j] >= a[hull[middle+1]] - b[hull[middle+1]] * c[j]:
+                high = middle
+            else:
+                low = middle + 1
+        best[j] = hull[low]
+
+    return best
+
+
+if __name__ == '__main__':
+
+    # Parity of the compiled kernels with their Python version, and timing of both
+    from timeit import repeat
+
+    N = 15
+    mu_n = -np.cos(np.arange(N+1)*np.pi/N)
+    Pn = np.sin(np.pi/N)*np.sin(np.arange(N+1)*np.pi/N)
+    Pn[0] = Pn[N] = np.sin(np.pi/(2*N))**2
+    What = ((1-0.92)*0.87)/(1-0.92*0.87)
+    sk = eigenvalues(Pn, mu_n, N, What, 8)[0]
+
+    IB = np.zeros((40, 196))
+    IB[:, 0] = np.random.default_rng(0).random(40)
+    IB[:, 1] = np.random.default_rng(1).random(40)
+
+    X, Bt, Br, K = np.array([0.8, 2.1]), np.array([1.5, 3.0]), np.array([2.5, 0.7]), np.array([0.01, 0.2])
+
+    x = np.arange(2000.0)
+    low = 100 + 10*np.sin(x/150) + np.random.default_rng(2).normal(0, 0.3, 2000).cumsum()
+
+    cases = {
+        'fn': (fn, (7, 0.3, mu_n, N)),
+        'eigenvalues': (eigenvalues, (Pn, mu_n, N, What, 8)),
+        'scattered_sum': (scattered_sum, (np.ones(8), 0.5, sk, 0.3, mu_n, N)),
+        'boersma_recurrence': (boersma_recurrence, (IB, 40, 195)),
+        'se_ft_terms': (se_ft_terms, (X, Bt, Br, K)),
+        'upper_envelope': (upper_envelope, (low - 100, x / 100, np.arange(0, 2000, 7), np.linspace(0, 2, 286))),
+    }
+
+    if not NUMBA_ENABLED:
+        print("Numba is not installed (or USE_NUMBA is off): the kernels run as plain Python")
+
+    for name, (function, args) in cases.items():
+        python_function = getattr(function, 'py_func', function)
+        expected = python_function(*[a.copy() if isinstance(a, np.ndarray) else a for a in args])
+        result = function(*[a.copy() if isinstance(a, np.ndarray) else a for a in args])
+        expected, result = (np.concatenate([np.ravel(x) for x in (r if isinstance(r, tuple) else (r,))]) for r in (expected, result))
+        match = np.allclose(expected, result, rtol=1e-12, atol=1e-12)
+
+        python_time = min(repeat(lambda: python_function(*args), number=20, repeat=3)) / 20
+        kernel_time = min(repeat(lambda: function(*args), number=20, repeat=3)) / 20
+        print(f"{name:20s} parity {match}   python {python_time*1e6:10.1f} us   kernel {kernel_time*1e6:10.1f} us   x{python_time/kernel_time:.1f}")
@@ -1,34 +1,49 @@
-
-from os.path import join, dirname, realpath
+from os.path import join, dirname, realpath, exists
 import numpy as np
 
-DN50 = np.loadtxt(join(dirname(realpath(__file__)),"DN50.txt"))
-N050 = np.loadtxt(join(dirname(realpath(__file__)),"N050.txt"))
-    
-def InterpolateDN50andN050CTR(lat = None,lon = None): 
+_maps = {}
+
+def load_refractivity_map(name):
+    # DN50/N050 maps are loaded on first use, memory-mapped from their binary (.npy) copy
+    # (written from the text map the first time when missing)
+    if name not in _maps:
+        path = join(dirname(realpath(__file__)), name)
+        if not exists(path + ".npy"):
+            np.save(path + ".npy", np.loadtxt(path + ".txt"))
+        _maps[name] = np.load(path + ".npy", mmap_mode='r')
+    return _maps[name]
+
+
+def InterpolateDN50andN050CTR(lat = None,lon = None):
     #import pdb;pdb.set_trace()
     # Computes the median annual refractivity gradient in the lowest first km of the troposphere (DN50) and the median annual refractivity at sea level (N050) given the lat/long coordinates
     # at the path centre using bilinear interpolation (see Section 1b of P.1144-11, on page 13).
     # Inputs:
     #   lat: latitude of the path centre (degrees);
     #   lon: longitude of the path centre (degrees). For negative longitudes, add 360 degrees. For example, for 75 degrees West (-75 degrees), lon is equal to 285 degrees.
+    #   lat and lon can also be arrays (one path centre per element), the outputs are then arrays of the same shape.
     # Outputs:
     #   DN50atthePathCentre in N-units/km;
     #   N050atthePathCentre in N-units.
     # Integral data products from P.1812-6:
-    
-    
+
+    DN50 = load_refractivity_map("DN50")
+    N050 = load_refractivity_map("N050")
+    scalar = np.ndim(lat) == 0 and np.ndim(lon) == 0
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+
     # The DN50 & N050 maps have a 1.5-degree resolution:
-    latCeilPos = int(np.floor((90 - lat) / 1.5)) + 1
-    latFloorPos =int(np.ceil((90 - lat) / 1.5)) + 1
-    lonCeilPos = int(np.ceil(lon / 1.5)) + 1
-    lonFloorPos = int(np.floor(lon / 1.5)) + 1
-    
+    latCeilPos = np.floor((90 - lat) / 1.5).astype(int) + 1
+    latFloorPos = np.ceil((90 - lat) / 1.5).astype(int) + 1
+    lonCeilPos = np.ceil(lon / 1.5).astype(int) + 1
+    lonFloorPos = np.floor(lon / 1.5).astype(int) + 1
+
     # Interpolating corners
     c = lon / 1.125 + 1
     r = (90 - lat) / 1.125 + 1
-    C = int(np.floor(lon / 1.125)) + 1
-    R = int(np.floor((90 - lat) / 1.125)) + 1
+    C = np.floor(lon / 1.125).astype(int) + 1
+    R = np.floor((90 - lat) / 1.125).astype(int) + 1
 
     # Bi-linear interpolation for median, annual refractivity gradient in the
     # lowest first km of the troposphere:
@@ -37,13 +52,15 @@ def InterpolateDN50andN050CTR(lat = None,lon = None):
     DNtopright = DN50[latCeilPos-1, lonCeilPos-1]
     DNbottomright = DN50[latFloorPos-1 ,lonCeilPos-1]
     DN50atthePathCentre = DNtopleft * (R + 1 - r) * (C + 1 - c) + DNbottomleft * (r - R) * (C + 1 - c) + DNtopright * (R + 1 - r) * (c - C) + DNbottomright * (r - R) * (c - C)
-    
+
     # Bi-linear interpolation for median, annual sea-level refractivity:
     N0topleft = N050[latCeilPos-1, lonFloorPos-1]
     N0bottomleft = N050[latFloorPos-1, lonFloorPos-1]
     N0topright = N050[latCeilPos-1, lonCeilPos-1]
     N0bottomright = N050[latFloorPos-1, lonCeilPos-1]
     N050atthePathCentre = N0topleft * (R + 1 - r) * (C + 1 - c) + N0bottomleft * (r - R) * (C + 1 - c) + N0topright * (R + 1 - r) * (c - C) + N0bottomright * (r - R) * (c - C)
-    
+
+    if scalar:
+        return float(DN50atthePathCentre), float(N050atthePathCentre)
+
     return DN50atthePathCentre, N050atthePathCentre
-    
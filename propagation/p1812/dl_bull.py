@@ -1,7 +1,9 @@
 
 import numpy as np
+
+from propagation.p1812.terrain_analysis import TerrainAnalysis
     
-def dl_bull(d = None,g = None,hts = None,hrs = None,ap = None,f = None): 
+def dl_bull(d = None,g = None,hts = None,hrs = None,ap = None,f = None,ta = None): 
     #import pdb;pdb.set_trace()
     #dl_bull Bullington part of the diffraction loss according to P.1812-4
 #   This function computes the Bullington part of the diffraction loss
@@ -16,6 +18,7 @@ def dl_bull(d = None,g = None,hts = None,hrs = None,ap = None,f = None):
 #     hrs     -   receiver antenna height in meters above sea level (i=n)
 #     ap      -   the effective earth radius in kilometers
 #     f       -   frequency expressed in GHz
+#     ta      -   TerrainAnalysis of the path (optional, computed from d and f when not given)
     
     #     Output parameters:
 #     Lbull   -   Bullington diffraction loss for a given path
@@ -25,42 +28,33 @@ def dl_bull(d = None,g = None,hts = None,hrs = None,ap = None,f = None):
     
     ## Body of function
     
-    # Effective Earth curvature Ce (km^-1)
+    # Profile-dependent terms (intermediate points, Earth curvature, Fresnel scale),
+    # shared with the other diffraction terms of the same path when ta is given
+    if ta is None:
+        ta = TerrainAnalysis(d, f)
     
-    Ce = 1 / ap
-    # Wavelength in meters
-# speed of light as per ITU.R P.2001
-    lambda_ = 0.2998 / f
     # Complete path length
     
-    dtot = d[-1] - d[0]
+    dtot = ta.dtot
     # Find the intermediate profile point with the highest slope of the line
-# from the transmitter to the point
+# from the transmitter to the point, and the slope of the line from
+# transmitter to receiver assuming a LoS path
     
-    di = d[1:len(d)-1]
     gi = g[1:len(d)-1]
-    Stim = max((gi + 500 * Ce * di * (dtot - di) - hts) / di)
-    
-    # Calculate the slope of the line from transmitter to receiver assuming a
-# LoS path
-    
-    Str = (hrs - hts) / dtot
+    Stim, Str, numax, Srim = ta.bullington(gi, hts, hrs, ap)
     
     if Stim < Str:
-        # Find the intermediate profile point with the highest diffraction
-# parameter nu:
-        numax = max((gi + 500 * Ce * di * (dtot - di) - (hts * (dtot - di) + hrs * di) / dtot) * np.sqrt(0.002 * dtot / (lambda_ * di * (dtot - di))))
+        # numax is the highest diffraction parameter nu of the intermediate profile points
         Luc = 0
         if numax > - 0.78:
             Luc = 6.9 + 20 * np.log10(np.sqrt((numax - 0.1) ** 2 + 1) + numax - 0.1)
     else:
         # Path is transhorizon
-        # Find the intermediate profile point with the highest slope of the
-# line from the receiver to the point
-        Srim = max((gi + 500 * Ce * di * (dtot - di) - hrs) / (dtot - di))
+        # Srim is the highest slope of the line from the receiver to an intermediate profile point
         # Calculate the distance of the Bullington point from the transmitter:
         dbp = (hrs - hts + Srim * dtot) / (Stim + Srim)
         # Calculate the diffraction parameter, nub, for the Bullington point
+        lambda_ = 0.2998 / f
         nub = (hts + Stim * dbp - (hts * (dtot - dbp) + hrs * dbp) / dtot) * np.sqrt(0.002 * dtot / (lambda_ * dbp * (dtot - dbp)))
         # The knife-edge loss for the Bullington point is given by
         Luc = 0
@@ -3,10 +3,11 @@
 from propagation.p1812.dl_bull import dl_bull
 
 from propagation.p1812.dl_se import dl_se
+from propagation.p1812.terrain_analysis import TerrainAnalysis
 
 import numpy as np
     
-def dl_delta_bull(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = None,ap = None,f = None,omega = None,flag4 = None): 
+def dl_delta_bull(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = None,ap = None,f = None,omega = None,flag4 = None,ta = None): 
     #import pdb;pdb.set_trace()
     #dl_delta_bull Complete 'delta-Bullington' diffraction loss model P.1812-4
 #   function Ld = dl_delta_bull( d, h, hts, hrs, hstd, hsrd, ap, f, omega, flag4 )
@@ -37,6 +38,7 @@ def dl_delta_bull(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = Non
 #     Ldshp  -   Spherical diffraction (4.3.2) for the actual path d and modified antenna heights
 #     flag4  -   Set to 1 if the alternative method is used to calculate Lbulls
 #                without using terrain profile analysis (Attachment 4 to Annex 1)
+#     ta     -   TerrainAnalysis of the path (optional), shared by the two Bullington computations
     
     #     Example:
 #     [Ld, Lbulla, Lbulls, Ldsph] = dl_delta_bull( d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4)
@@ -46,7 +48,10 @@ def dl_delta_bull(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = Non
 # heights. Set the resulting Bullington diffraction loss for the actual
 # path to Lbulla
     
-    Lbulla = dl_bull(d,g,hts,hrs,ap,f)
+    if ta is None:
+        ta = TerrainAnalysis(d, f)
+    
+    Lbulla = dl_bull(d,g,hts,hrs,ap,f,ta)
     # Use the method in 4.3.1 for a second time, with all profile heights gi
 # set to zero and modified antenna heights given by
     
@@ -58,24 +63,32 @@ def dl_delta_bull(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = Non
     dtot = d[-1] - d[0]
     # where hstd and hsrd are given in 5.6.2 of Attachment 1.
     
-    # Set the resulting Bullington diffraction loss for this smooth path to Lbulls
-    if (flag4 == 1):
-        # compute the spherical earth diffraction Lbuls using an
+    # The smooth path does not depend on the profile heights g: Lbulls and Ldsph
+    # are computed once per path (and effective Earth radius) and kept in the terrain analysis
+    key = (hts1, hrs1, ap, omega, flag4)
+    if key not in ta.smooth_path:
+        # Set the resulting Bullington diffraction loss for this smooth path to Lbulls
+        if (flag4 == 1):
+            # compute the spherical earth diffraction Lbuls using an
 # alternative method w/o terrain profile analysis
 # as defined in Attachment 4 to Annex 1 of ITU-R P.1812-5
-        Lbulls = dl_bull_att4(dtot,hts1,hrs1,ap,f)
-    else:
-        # Compute Lbuls using §4.3.1
-        Lbulls = dl_bull(d,h1,hts1,hrs1,ap,f)
+            Lbulls = dl_bull_att4(dtot,hts1,hrs1,ap,f)
+        else:
+            # Compute Lbuls using §4.3.1
+            Lbulls = dl_bull(d,h1,hts1,hrs1,ap,f,ta)
     
-    # Use the method in 4.3.2 to calculate the spherical-Earth diffraction loss
+        # Use the method in 4.3.2 to calculate the spherical-Earth diffraction loss
 # for the actual path length (dtot) with
     
-    hte = hts1
+        hte = hts1
+    
+        hre = hrs1
+    
+        Ldsph = dl_se(dtot,hte,hre,ap,f,omega)
+        ta.smooth_path[key] = Lbulls, Ldsph
     
-    hre = hrs1
+    Lbulls, Ldsph = ta.smooth_path[key]
     
-    Ldsph = dl_se(dtot,hte,hre,ap,f,omega)
     # Diffraction loss for the general paht is now given by
     
     Ld = np.array([0, 0])
@@ -1,10 +1,13 @@
 
 
+import numpy as np
+
 from propagation.p1812.earth_rad_eff import earth_rad_eff
 from propagation.p1812.dl_delta_bull import dl_delta_bull
 from propagation.p1812.inv_cum_norm import inv_cum_norm
+from propagation.p1812.terrain_analysis import TerrainAnalysis
 
-def dl_p(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = None,f = None,omega = None,p = None,b0 = None,DN = None,flag4 = None): 
+def dl_p(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = None,f = None,omega = None,p = None,b0 = None,DN = None,flag4 = None,ta = None): 
     #import pdb;pdb.set_trace()
     #dl_p Diffraction loss model not exceeded for p# of time according to P.1812-4
 #   function [Ldp, Ld50, Lbulla50, Lbulls50, Ldsph50] = dl_p( d, h, hts, hrs, hstd, hsrd, ap, f, omega, p, b0, DN, flag4 )
@@ -30,6 +33,7 @@ def dl_p(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = None,f = Non
 #                 quantity in this procedure
 #     flag4   -   Set to 1 if the alternative method is used to calculate Lbulls
 #                 without using terrain profile analysis (Attachment 4 to Annex 1)
+#     ta      -   TerrainAnalysis of the path (optional), shared by the diffraction computations
     
     
     #     Output parameters:
@@ -37,7 +41,7 @@ def dl_p(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = None,f = Non
 #                according to Section 4.3.4 of ITU-R P.1812-4.
 #                Ldp(1) is for the horizontal polarization
 #                Ldp(2) is for the vertical polarization
-#     Ldb    -   diffraction loss for p = beta_0#
+#     Ldb    -   diffraction loss for p = beta_0# (None for p = 50#, where it is not used)
 #     Ld50   -   diffraction loss for p = 50#
 #     Lbulla50 -   Bullington diffraction (4.3.1) for actual terrain profile g and antenna heights
 #     Lbulls50 -   Bullington diffraction (4.3.1) with all profile heights g set to zero and modified antenna heights
@@ -52,21 +56,24 @@ def dl_p(d = None,g = None,hts = None,hrs = None,hstd = None,hsrd = None,f = Non
 # Earth radius ap = ae as given by equation (7a). Set median diffraction
 # loss to Ldp50
     
+    if ta is None:
+        ta = TerrainAnalysis(d, f)
+    
     ae,ab = earth_rad_eff(DN)
-    ap = ae
-    Ld50,Lbulla50,Lbulls50,Ldsph50 = dl_delta_bull(d,g,hts,hrs,hstd,hsrd,ap,f,omega,flag4)
     if p == 50:
+        # Ldb is not used at 50% of time: only the median effective Earth radius ap = ae is needed
+        ap = ae
+        Ld50,Lbulla50,Lbulls50,Ldsph50 = dl_delta_bull(d,g,hts,hrs,hstd,hsrd,ap,f,omega,flag4,ta)
         Ldp = Ld50
-        ap = ab
-        Ldb = dl_delta_bull(d,g,hts,hrs,hstd,hsrd,ap,f,omega,flag4)
+        Ldb = None
         return Ldp,Ldb,Ld50,Lbulla50,Lbulls50,Ldsph50
     
     if p < 50:
         # Use the method in 4.3.4 to calculate diffraction loss Ld for effective
 # Earth radius ap = abeta, as given in equation (7b). Set diffraction loss
 # not exceeded for beta0# time Ldb = Ld
-        ap = ab
-        Ldb = dl_delta_bull(d,g,hts,hrs,hstd,hsrd,ap,f,omega,flag4)[0]
+        # Both effective Earth radii share the profile terms of the terrain analysis
+        (Ld50,Lbulla50,Lbulls50,Ldsph50), (Ldb,_,_,_) = [dl_delta_bull(d,g,hts,hrs,hstd,hsrd,ap,f,omega,flag4,ta) for ap in (ae, ab)]
         # Compute the interpolation factor Fi
         if p > b0:
             Fi = inv_cum_norm(p / 100) / inv_cum_norm(b0 / 100)
@@ -1,6 +1,8 @@
 
 
 import numpy as np
+
+from propagation.kernels import se_ft_terms
     
 def dl_se_ft_inner(epsr = None,sigma = None,d = None,hte = None,hre = None,adft = None,f = None): 
     #import pdb;pdb.set_trace()
@@ -51,37 +53,13 @@ def dl_se_ft_inner(epsr = None,sigma = None,d = None,hte = None,hre = None,adft
     
     Yr = 0.9575 * beta_dft * (f ** 2 / adft) ** (1 / 3) * hre
     
-    Fx = np.array([0,0])
-    Fx = Fx.astype(float)
-    GYt = np.array([0,0])
-    GYt = GYt.astype(float)
-    GYr = np.array([0,0])
-    GYr = GYr.astype(float)
-    # Calculate the distance term given by:
-    
-    for ii in range(2):
-        if X[ii] >= 1.6:
-            Fx[ii] = 11 + 10 * np.log10(X[ii]) - 17.6 * X[ii]
-        else:
-            Fx[ii] = - 20 * np.log10(X[ii]) - 5.6488 * (X[ii]) ** 1.425
-    
     Bt = beta_dft * Yt
     
     Br = beta_dft * Yr
     
-    for ii in range(2):
-        if Bt[ii] > 2:
-            GYt[ii] = 17.6 * (Bt[ii] - 1.1) ** 0.5 - 5 * np.log10(Bt[ii] - 1.1) - 8
-        else:
-            GYt[ii] = 20 * np.log10(Bt[ii] + 0.1 * Bt[ii] ** 3)
-        if Br[ii] > 2:
-            GYr[ii] = 17.6 * (Br[ii] - 1.1) ** 0.5 - 5 * np.log10(Br[ii] - 1.1) - 8
-        else:
-            GYr[ii] = 20 * np.log10(Br[ii] + 0.1 * Br[ii] ** 3)
-        if GYr[ii] < 2 + 20 * np.log10(K[ii]):
-            GYr[ii] = 2 + 20 * np.log10(K[ii])
-        if GYt[ii] < 2 + 20 * np.log10(K[ii]):
-            GYt[ii] = 2 + 20 * np.log10(K[ii])
+    # Calculate the distance term and the antenna height gain terms given by:
+    
+    Fx, GYt, GYr = se_ft_terms(X, Bt, Br, K)
     
     Ldft = - Fx - GYt - GYr
     
@@ -0,0 +1,59 @@
+import numpy as np
+
+from propagation.kernels import upper_envelope
+
+class RadialAnalysis:
+    #RadialAnalysis terms of the paths from the first point of a radial profile to its other points that only depend on the transmitter
+    #   radial = RadialAnalysis(d, h, g, hts)
+
+    #   The path to a receiver on the radial is the prefix d[0:n], h[0:n] of the radial. The sums of the
+    #   smooth-Earth regression, eqs (85) and (86), are cumulative sums along the radial. The horizon
+    #   elevation angle of the transmitter, eq (88), and the highest slope from the transmitter Stim of
+    #   the Bullington construction, eq (14), are maxima over the intermediate points of each path of
+    #       (hi + 500 di (dtot - di) / ap - hts) / di = (hi - hts) / di - (500 / ap) di + 500 dtot / ap
+    #   (the elevation angle is an increasing function of it, for dtot = 0). With the Earth curvature term
+    #   split, the maximum is the highest of the lines (hi - hts) / di - di c of the points walked so far at
+    #   c = 500 / ap: one walk along the radial (upper_envelope) serves every path, whatever the effective
+    #   Earth radius ap of the path. The terms depending on the receiver are derived for each path.
+
+    #     Input parameters:
+    #     d       -   vector of distances di of the i-th point of the radial (km)
+    #     h       -   vector of terrain heights hi of the i-th point of the radial (m amsl)
+    #     g       -   vector of the terrain heights with the representative clutter of the radial (m amsl)
+    #     hts     -   Tx antenna height above mean sea level (m)
+
+    def __init__(self, d = None, h = None, g = None, hts = None):
+        self.d = d
+        self.h = h
+        self.g = g
+        self.hts = hts
+
+        # Running sums of eqs (85) and (86), v1[n-1] and v2[n-1] for the path of n points
+        dd = np.diff(d)
+        self.v1 = np.concatenate(([0], np.cumsum(dd * (h[1:] + h[:-1]))))
+        self.v2 = np.concatenate(([0], np.cumsum(dd * (h[1:] * (2 * d[1:] + d[:-1]) + h[:-1] * (d[1:] + 2 * d[:-1])))))
+
+        # Lines (hi - hts) / di - di c of the points of the radial after the transmitter
+        self.terrain_lines = (h[1:] - hts) / d[1:]
+        self.clutter_lines = (g[1:] - hts) / d[1:]
+
+    def regression_sums(self, n = None):
+        # v1 and v2 of the paths of n points
+        return self.v1[n - 1], self.v2[n - 1]
+
+    def highest_point(self, lines = None, n = None, ap = None):
+        # Intermediate point of each path of n points with the highest line at c = 500 / ap
+        return 1 + upper_envelope(lines, self.d[1:], n - 3, 500 / ap)
+
+    def horizon(self, n = None, ae = None):
+        # Horizon elevation angle of the transmitter theta_max (mrad) and its point lt, of the paths of n points
+        lt = self.highest_point(self.terrain_lines, n, ae)
+        di = self.d[lt]
+        return 1000 * np.arctan((self.h[lt] - self.hts) / (1000 * di) - di / (2 * ae)), lt
+
+    def tx_slope(self, n = None, ap = None):
+        # Highest slope from the transmitter Stim of the paths of n points over the heights g, for the effective Earth radius ap
+        i = self.highest_point(self.clutter_lines, n, ap)
+        di = self.d[i]
+        dtot = self.d[n - 1] - self.d[0]
+        return (self.g[i] + 500 * (1 / ap) * di * (dtot - di) - self.hts) / di
@@ -1,7 +1,9 @@
 
 import numpy as np
+
+from propagation.p1812.terrain_analysis import TerrainAnalysis
     
-def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = None,f = None): 
+def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = None,f = None,ta = None): 
     #import pdb;pdb.set_trace()
     #smooth_earth_heights smooth-Earth effective antenna heights according to ITU-R P.1812-4
 # [hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype] = smooth_earth_heights(d, h, R, htg, hrg, ae, f)
@@ -11,10 +13,12 @@ def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = N
     # Input parameters:
 # d         -   vector of terrain profile distances from Tx [0,dtot] (km)
 # h         -   vector of terrain profile heights amsl (m)
-# R         -   vector of representative clutter heights (m)
+# R         -   vector of representative clutter heights (m), optional: only used by the htc and hrc
+#               of P.1812-6 Table 5 (commented out below), the analysis is the same without it
 # htg, hrg  -   Tx and Rx antenna heights above ground level (m)
 # ae        -   median effective Earth's radius (c.f. Eq (7a))
 # f         -   frequency (GHz)
+# ta        -   TerrainAnalysis of the path (optional), shared with the diffraction model
     
     # Output parameters:
     
@@ -30,14 +34,20 @@ def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = N
 # theta_tot    -   Angular distance (mrad)
 # pathtype     -   1 = 'los', 2 = 'transhorizon'
     
+    if ta is None:
+        ta = TerrainAnalysis(d, f)
+    
     n = len(d)
     dtot = d[-1]
+    
+    # Intermediate profile points and their distances to the Rx, shared by the whole analysis
+    di = ta.di
+    dri = ta.dri
+    hi = h[1:n-1]
     #Tx and Rx antenna heights above mean sea level amsl (m)
     hts = h[0] + htg
     hrs = h[-1] + hrg
-    g = h + R
-    g[0] = h[0]
-    g[-1] = h[-1]
+    # g = h + R; g[0] = h[0]; g[-1] = h[-1]
     #htc = max(hts, g(1));
 #hrc = max(hrs, g(end));
     htc = hts
@@ -56,9 +66,10 @@ def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = N
     # the above equations optimized for speed, as suggested by Roger LeClair (leclairtelecom)
     
     #v1 = sum(np.multiply(np.diff(d),(h[1:n] + h[0:n-1])))
-    v1 = sum(np.diff(d) * (h[1:n] + h[0:n-1]))
+    dd = np.diff(d)
+    v1 = np.dot(dd, h[1:n] + h[0:n-1])
    #v2 = sum(np.multiply(np.diff(d),(np.multiply(h[1:n],(2*d[1:n] + d[0:n-1] + np.multiply(h[0:n-1],(d[1:n] + 2*d[0:n-1])))))))
-    v2 = sum(np.diff(d)*(h[1:n]*(2 * d[1:n] + d[0:n-1]) + h[0:n-1]*(d[1:n] + 2 * d[0:n-1])))
+    v2 = np.dot(dd, h[1:n]*(2 * d[1:n] + d[0:n-1]) + h[0:n-1]*(d[1:n] + 2 * d[0:n-1]))
     
     hst = (2 * v1 * dtot - v2) / dtot ** 2
     
@@ -68,13 +79,13 @@ def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = N
     hsr_n = hsr
     # Section 5.6.2 Smooth-surface heights for the diffraction model
     
-    HH = h - (htc * (dtot - d) + hrc * d) / dtot
+    HH = hi - (htc * dri + hrc * di) / dtot
     
-    hobs = max(HH[1:n-1])
+    hobs = np.max(HH)
     
-    alpha_obt = max(HH[1:n-1] / d[1:n-1])
+    alpha_obt = np.max(HH / di)
     
-    alpha_obr = max(HH[1:n-1] / (dtot - d[1:n-1]))
+    alpha_obr = np.max(HH / dri)
     
     # Calculate provisional values for the Tx and Rx smooth surface heights
     
@@ -103,14 +114,13 @@ def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = N
     
     # Interfering antenna horizon elevation angle and distance
     
-    ii = np.arange(1,n-1)
-    theta = 1000 * np.arctan((h[ii] - hts) / (1000 * d[ii]) - d[ii] / (2 * ae))
+    theta = 1000 * np.arctan((hi - hts) / (1000 * di) - di / (2 * ae))
     
     theta_td = 1000 * np.arctan((hrs - hts) / (1000 * dtot) - dtot / (2 * ae))
     
     theta_rd = 1000 * np.arctan((hts - hrs) / (1000 * dtot) - dtot / (2 * ae))
     
-    theta_max = max(theta)
+    theta_max = np.max(theta)
     
     if theta_max > theta_td:
         pathtype = 2
@@ -124,19 +134,16 @@ def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = N
         lt = kindex[0] + 1
         dlt = d[lt][0]
         # Interfered-with antenna horizon elevation angle and distance
-        theta = 1000 * np.arctan((h[ii] - hrs) / (1000 * (dtot - d[ii])) - (dtot - d[ii]) / (2 * ae))
-        theta_r = max(theta)
+        theta = 1000 * np.arctan((hi - hrs) / (1000 * dri) - dri / (2 * ae))
+        theta_r = np.max(theta)
         kindex = np.where(theta == theta_r)
         lr = kindex[-1] + 1
         dlr = dtot - d[lr][0]
     else:
         theta_r = theta_rd
-        ii = np.arange(1,n-1)
-        # speed of light as per ITU.R P.2001
-        lambda_ = 0.2998 / f
-        Ce = 1 / ae
-        nu = (h[ii] + 500 * Ce * d[ii] * (dtot - d[ii]) - (hts * (dtot - d[ii]) + hrs * d[ii]) / dtot) * np.sqrt(0.002 * dtot / (lambda_ * d[ii] * (dtot - d[ii])))      
-        numax = max(nu)
+        # Diffraction parameter of the intermediate points (Earth curvature and Fresnel scale from the analysis)
+        nu = (hi + ta.bulge(ae) - (hts * dri + hrs * di) / dtot) * ta.nu_scale
+        numax = np.max(nu)
         kindex = np.where(nu == numax)
         lt = kindex[-1] + 1
         dlt = d[lt][0]
@@ -167,7 +174,7 @@ def smooth_earth_heights(d = None,h = None,R = None,htg = None,hrg = None,ae = N
     hre = hrg + h[-1] - hsr
     
     ii = np.arange(lt,lr+1)
-    hm = max(h[ii] - (hst + m * d[ii]))
+    hm = np.max(h[ii] - (hst + m * d[ii]))
     
     return hst_n,hsr_n,hst,hsr,hstd,hsrd,hte,hre,hm,dlt,dlr,theta_t,theta_r,theta_tot,pathtype
  
\ No newline at end of file
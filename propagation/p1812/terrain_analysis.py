@@ -0,0 +1,59 @@
+import numpy as np
+
+class TerrainAnalysis:
+    #TerrainAnalysis profile-dependent terms shared by the path profile analysis and the Bullington diffraction
+    #   ta = TerrainAnalysis(d, f)
+
+    #   The intermediate profile points di, their distances to the receiver (dtot - di) and the
+    #   Fresnel scale of the diffraction parameter nu are computed once per profile, and the Earth
+    #   curvature term once per effective Earth radius. They are shared by smooth_earth_heights
+    #   (Section 5.6 of Attachment 1), dl_bull (Section 4.3.1) and dl_delta_bull (Section 4.3.4)
+    #   instead of being derived again by each of them.
+
+    #     Input parameters:
+    #     d       -   vector of distances di of the i-th profile point (km)
+    #     f       -   frequency expressed in GHz
+
+    def __init__(self, d = None, f = None):
+        # Complete path length and intermediate profile points
+        self.dtot = d[-1] - d[0]
+        self.di = d[1:len(d)-1]
+        self.dri = self.dtot - self.di
+
+        # Wavelength in meters
+        # speed of light as per ITU.R P.2001
+        lambda_ = 0.2998 / f
+
+        # Scale of the diffraction parameter nu of the intermediate points
+        self.nu_scale = np.sqrt(0.002 * self.dtot / (lambda_ * self.di * self.dri))
+
+        self._bulge = {}
+
+        # Bullington and spherical-Earth losses of the smooth path of dl_delta_bull, which do not
+        # depend on the profile heights (reused by the clutter variants of the path)
+        self.smooth_path = {}
+
+    def bulge(self, ap = None):
+        # Earth curvature term 500 Ce di (dtot - di) of the intermediate points (m), with Ce = 1 / ap
+        if ap not in self._bulge:
+            Ce = 1 / ap
+            self._bulge[ap] = 500 * Ce * self.di * self.dri
+        return self._bulge[ap]
+
+    def bullington(self, gi = None, hts = None, hrs = None, ap = None):
+        # Bullington construction of Section 4.3.1 over the intermediate heights gi (m amsl):
+        #     Stim   -   highest slope of the line from the transmitter to a profile point
+        #     Str    -   slope of the line from the transmitter to the receiver
+        #     numax  -   highest diffraction parameter nu of a profile point for a LoS path
+        #     Srim   -   highest slope of the line from the receiver to a profile point for a transhorizon path
+        #   Only one of numax and Srim is computed (the other is None)
+        hi = gi + self.bulge(ap)
+        Stim = np.max((hi - hts) / self.di)
+        Str = (hrs - hts) / self.dtot
+
+        if Stim < Str:
+            numax = np.max((hi - (hts * self.dri + hrs * self.di) / self.dtot) * self.nu_scale)
+            return Stim, Str, numax, None
+
+        Srim = np.max((hi - hrs) / self.dri)
+        return Stim, Str, None, Srim
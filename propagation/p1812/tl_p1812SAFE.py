@@ -15,6 +15,7 @@ from propagation.p1812.dl_p import dl_p
 from propagation.p1812.inv_cum_norm import inv_cum_norm
 from propagation.p1812.tl_anomalous import tl_anomalous
 from propagation.p1812.tl_tropo import tl_tropo
+from propagation.p1812.terrain_analysis import TerrainAnalysis
 
     
 def tl_p1812SAFE(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = None,htg = None,hrg = None,pol = None, phi_t = None, phi_r = None, lam_t = None, lam_r = None, pL = None, sigmaL = None, DN = None, N0 = None): 
@@ -109,6 +110,30 @@ def tl_p1812SAFE(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = N
   
     # This function calls other functions that are placed in the ./private folder
     
+    # The clutter-independent terms of the path are computed by tl_p1812_path,
+    # and the terms depending on the clutter heights R by tl_p1812_clutter
+    path = tl_p1812_path(f,p,d,h,zone,htg,hrg,pol,phi_t,phi_r,lam_t,lam_r,pL,sigmaL,DN,N0)
+    
+    Lb = tl_p1812_clutter(path,R,Ct)
+    
+    return Lb
+
+
+def tl_p1812_path(f = None,p = None,d = None,h = None,zone = None,htg = None,hrg = None,pol = None, phi_t = None, phi_r = None, lam_t = None, lam_r = None, pL = None, sigmaL = None, DN = None, N0 = None): 
+    #tl_p1812_path clutter-independent part of the basic transmission loss according to P.1812-6
+#   path = tl_p1812_path(f, p, d, h, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0)
+    
+    #   Computes the terms of tl_p1812SAFE that do not depend on the representative
+#   clutter heights (path centre, beta0, effective Earth radii, smooth-Earth
+#   analysis, LoS, anomalous propagation and troposcatter losses, location
+#   variability), so the clutter variants of a path only compute the diffraction
+#   through the clutter (tl_p1812_clutter).
+    
+    #     Input parameters: as in tl_p1812SAFE (without R and Ct)
+    
+    #     Output parameters:
+#     path    -   dict of the clutter-independent terms, input of tl_p1812_clutter
+    
     # Set other optional inputs
     dcr = 500
     dct = 500
@@ -121,7 +146,6 @@ def tl_p1812SAFE(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = N
     check_limit(hrg, 1, 3000, 'hrg [m]');
     check_limit(pL, 1, 99, 'pL[%]');
     check_value(np.array([pol]), np.array([1, 2]), 'Polarization (pol)');
-    check_value(Ct, [1, 2, 3, 4, 5], 'Clutter coverage (Ct)');
     check_value(zone, [1, 3, 4], 'Radio-climatic zone (zone)');
     
     
@@ -155,21 +179,16 @@ def tl_p1812SAFE(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = N
     
     omega = path_fraction(d,zone,1)
     
-    # Derive parameters for the path profile analysis
+    # Derive parameters for the path profile analysis, sharing the profile terms with the diffraction model
     
-    hst_n,hsr_n,hst,hsr,hstd,hsrd,hte,hre,hm,dlt,dlr,theta_t,theta_r,theta,pathtype = smooth_earth_heights(d,h,R,htg,hrg,ae,f)
+    ta = TerrainAnalysis(d, f)
+    hst_n,hsr_n,hst,hsr,hstd,hsrd,hte,hre,hm,dlt,dlr,theta_t,theta_r,theta,pathtype = smooth_earth_heights(d,h,htg=htg,hrg=hrg,ae=ae,f=f,ta=ta)
     dtot = d[-1] - d[0]
     
     #Tx and Rx antenna heights above mean sea level amsl (m)
     hts = h[0] + htg
     hrs = h[-1] + hrg
     
-    # Modify the path by adding representative clutter, according to Section 3.2
-    # excluding the first and the last point
-    g = h + R
-    g[0] = h[0]
-    g[-1] = h[-1]
-    
     #Compute htc and hrc as defined in Table 5 (P.1812-6)
     # htc = max(hts,g(1));
     # hrc = max(hrs,g(end));
@@ -188,9 +207,137 @@ def tl_p1812SAFE(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = N
     kappa = 0.5
     Fk = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * kappa * (dtot - dsw) / dsw)) # eq (58)
     
+    Lloc = 0.0 # outdoors only (67a)
+    
+    # Location variability of losses (Section 4.8)
+    if zone[-1] != 1: # Rx at sea
+        Lloc = - inv_cum_norm(pL / 100) * sigmaL
+    
+    path = {
+        'f': f, 'd': d, 'h': h, 'zone': zone, 'pol': pol, 'b0': b0, 'DN': DN, 'N0': N0, 'omega': omega, 'flag4': flag4, 'ta': ta,
+        'dct': dct, 'dcr': dcr, 'dlm': dlm, 'ae': ae, 'dtot': dtot, 'hts': hts, 'hrs': hrs, 'hte': hte, 'hre': hre, 'hm': hm,
+        'dlt': dlt, 'dlr': dlr, 'theta_t': theta_t, 'theta_r': theta_r, 'theta': theta, 'sigmaL': sigmaL,
+        'htc': htc, 'hrc': hrc, 'hstd': hstd, 'hsrd': hsrd, 'Fj': Fj, 'Fk': Fk, 'Lloc': Lloc
+    }
+    
+    # Terms depending on the time percentage p
+    path.update(tl_p1812_time(path,p))
+    
+    return path
+
+
+def tl_p1812_time(path = None,p = None): 
+    #tl_p1812_time terms of tl_p1812_path depending on the time percentage p
+#   terms = tl_p1812_time(path, p)
+    
+    #   Computes the LoS, anomalous propagation and troposcatter losses of the path
+#   not exceeded for p% time, from its profile analysis (output of tl_p1812_path).
+    
+    #     Input parameters:
+#     path    -   clutter-independent terms of the path (output of tl_p1812_path)
+#     p       -   Required time percentage (%)
+    
+    #     Output parameters:
+#     terms   -   dict of p, Lbfs, Lb0p, Lb0b, Lminbap and Lbs
+    
+    f, b0, omega, N0, dct, dcr, dlm, ae = path['f'], path['b0'], path['omega'], path['N0'], path['dct'], path['dcr'], path['dlm'], path['ae']
+    dtot, hts, hrs, hte, hre, hm = path['dtot'], path['hts'], path['hrs'], path['hte'], path['hre'], path['hm']
+    dlt, dlr, theta_t, theta_r, theta = path['dlt'], path['dlr'], path['theta_t'], path['theta_r'], path['theta']
+    
     #[Lbfs, Lb0p, Lb0b] = pl_los(dtot, f, p, b0, dlt, dlr);
     Lbfs,Lb0p,Lb0b = pl_los(dtot,hts,hrs,f,p,b0,dlt,dlr)
-    Ldp,Ldb,Ld50,Lbulla50,Lbulls50,Ldsph50 = dl_p(d,g,htc,hrc,hstd,hsrd,f,omega,p,b0,DN,flag4)
+    
+    # Calculate a notional minimum basic transmission loss associated with LoS
+    # and transhorizon signal enhancements
+    eta = 2.5
+    Lba = tl_anomalous(dtot,dlt,dlr,dct,dcr,dlm,hts,hrs,hte,hre,hm,theta_t,theta_r,f,p,omega,ae,b0)
+    Lminbap = eta * np.log(np.exp(Lba / eta) + np.exp(Lb0p / eta))  # eq (60)
+    
+    # Calculate the basic transmission loss due to troposcatter not exceeded
+    # for any time percantage p
+    
+    Lbs = tl_tropo(dtot,theta,f,p,N0)
+    
+    return {'p': p, 'Lbfs': Lbfs, 'Lb0p': Lb0p, 'Lb0b': Lb0b, 'Lminbap': Lminbap, 'Lbs': Lbs}
+
+
+def tl_p1812_clutter(path = None,R = None,Ct = None): 
+    #tl_p1812_clutter basic transmission loss according to P.1812-6 for given representative clutter
+#   Lb = tl_p1812_clutter(path, R, Ct)
+    
+    #   Completes the clutter-independent terms of tl_p1812_path with the diffraction
+#   loss of the profile including the representative clutter heights.
+    
+    #     Input parameters:
+#     path    -   clutter-independent terms of the path (output of tl_p1812_path)
+#     R       -   vector of representative clutter height Ri of the i-th profile point (m)
+#     Ct      -   vector of representative clutter type Cti of the i-th profile point
+    
+    #     Output parameters:
+#     Lb   - basic transmission loss according to P.1812-6
+    
+    check_value(Ct, [1, 2, 3, 4, 5], 'Clutter coverage (Ct)');
+    
+    f, p, d, h, b0, DN, omega, flag4, ta = path['f'], path['p'], path['d'], path['h'], path['b0'], path['DN'], path['omega'], path['flag4'], path['ta']
+    htc, hrc, hstd, hsrd, Lb0p, Lloc = path['htc'], path['hrc'], path['hstd'], path['hsrd'], path['Lb0p'], path['Lloc']
+    
+    # Modify the path by adding representative clutter, according to Section 3.2
+    # excluding the first and the last point
+    g = h + R
+    g[0] = h[0]
+    g[-1] = h[-1]
+    
+    Ldp,Ldb,Ld50,Lbulla50,Lbulls50,Ldsph50 = dl_p(d,g,htc,hrc,hstd,hsrd,f,omega,p,b0,DN,flag4,ta)
+    
+    # Basic transmission loss not exceeded for p% time ignoring the effects of terminal clutter
+    Lbc = tl_p1812_combine(path,Ldp,Ld50)
+    
+    # # The additional clutter losses from are removed in P.1812-6
+# # additional losses due to terminal surroundings (Section 4.7)
+    
+    # # Parameter ws relates to the width of the street. It is set to 27 unless
+# # there is specific local information available
+    
+    # ws = 27;
+    
+    # # Transmitter side
+    
+    # Aht = cl_loss(htg, R(1), Ct(1), f, ws);
+    
+    # # Receiver side
+    
+    # Ahr = cl_loss(hrg, R(end), Ct(end), f, ws);
+    
+    # # Basic transmission loss not exceeded for p% time and 50% locations,
+# # including the effects of terminal clutter losses
+    
+    #Lbc = Lbu + Aht + Ahr;
+    
+    # Basic transmission loss not exceeded for p% time and pL% locations
+    # (Sections 4.8 and 4.9) not implemented
+    
+    Lb = max(Lb0p,Lbc + Lloc) # eq (69)
+    
+    return Lb
+
+
+def tl_p1812_combine(path = None,Ldp = None,Ld50 = None): 
+    #tl_p1812_combine basic transmission loss not exceeded for p% time ignoring the effects of terminal clutter
+#   Lbc = tl_p1812_combine(path, Ldp, Ld50)
+    
+    #   Combines the diffraction losses of the path with its LoS, anomalous propagation
+#   and troposcatter losses, eqs (42) to (63) of P.1812-6.
+    
+    #     Input parameters:
+#     path    -   terms of the path for the time percentage p (output of tl_p1812_path)
+#     Ldp     -   diffraction loss not exceeded for p% time (output of dl_p)
+#     Ld50    -   median diffraction loss (output of dl_p)
+    
+    #     Output parameters:
+#     Lbc     -   basic transmission loss for the polarization pol of the path
+    
+    p, pol, b0, omega, Fj, Fk = path['p'], path['pol'], path['b0'], path['omega'], path['Fj'], path['Fk']
+    Lbfs, Lb0p, Lb0b, Lminbap, Lbs = path['Lbfs'], path['Lb0p'], path['Lb0b'], path['Lminbap'], path['Lbs']
     
     # The median basic transmission loss associated with diffraction Eq (42)
     Lbd50 = Lbfs + Ld50
@@ -209,12 +356,6 @@ def tl_p1812SAFE(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = N
         Fi = inv_cum_norm(p / 100) / inv_cum_norm(b0 / 100)
         Lminb0p = Lbd50 + (Lb0b + (1 - omega) * Ldp - Lbd50) * Fi # eq (59)
     
-    # Calculate a notional minimum basic transmission loss associated with LoS
-    # and transhorizon signal enhancements
-    eta = 2.5
-    Lba = tl_anomalous(dtot,dlt,dlr,dct,dcr,dlm,hts,hrs,hte,hre,hm,theta_t,theta_r,f,p,omega,ae,b0)
-    Lminbap = eta * np.log(np.exp(Lba / eta) + np.exp(Lb0p / eta))  # eq (60)
-    
     # Calculate a notional basic transmission loss associated with diffraction
     # and LoS or ducting/layer reflection enhancements
     Lbda = Lbd
@@ -225,11 +366,6 @@ def tl_p1812SAFE(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = N
     # LoS or ducting/layer-reflection enhancements into account
     Lbam = Lbda + (Lminb0p - Lbda) * Fj # eq (62)
     
-    # Calculate the basic transmission loss due to troposcatter not exceeded
-    # for any time percantage p
-    
-    Lbs = tl_tropo(dtot,theta,f,p,N0)
-    
     # Calculate the final transmission loss not exceeded for p% time
     # ignoring the effects of terminal clutter
     Lbc_pol = - 5 * np.log10(10.0 ** (- 0.2 * Lbs) + 10.0 ** (- 0.2 * Lbam)) # eq (63)
@@ -237,36 +373,73 @@ def tl_p1812SAFE(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = N
     # choose the right polarization
     Lbc = Lbc_pol[pol-1]
     
-    # # The additional clutter losses from are removed in P.1812-6
-# # additional losses due to terminal surroundings (Section 4.7)
-    
-    # # Parameter ws relates to the width of the street. It is set to 27 unless
-# # there is specific local information available
-    
-    # ws = 27;
-    
-    # # Transmitter side
-    
-    # Aht = cl_loss(htg, R(1), Ct(1), f, ws);
+    return Lbc
+
+
+def tl_p1812_percentages(path = None,R = None,Ct = None,p = None,pL = None,sigmaL = None): 
+    #tl_p1812_percentages basic transmission loss according to P.1812-6 for several time and location percentages
+#   Lb = tl_p1812_percentages(path, R, Ct, p, pL, sigmaL)
     
-    # # Receiver side
+    #   Same as tl_p1812_clutter for every time percentage of p and location percentage of pL.
+#   The diffraction losses for the effective Earth radii ae and abeta (Ld50 and Ldb, with
+#   Lbulla and Ldsph) do not depend on p and are computed once; only the LoS, anomalous
+#   propagation and troposcatter losses (tl_p1812_time), the interpolation of the
+#   diffraction loss (dl_p) and the location variability are evaluated for each percentage.
     
-    # Ahr = cl_loss(hrg, R(end), Ct(end), f, ws);
+    #     Input parameters:
+#     path    -   clutter-independent terms of the path (output of tl_p1812_path)
+#     R       -   vector of representative clutter height Ri of the i-th profile point (m)
+#     Ct      -   vector of representative clutter type Cti of the i-th profile point
+#     p       -   vector of time percentages (1% - 50%)
+#     pL      -   vector of location percentages (1% - 99%)
+#     sigmaL  -   location variability standard deviation (dB), the one of the path by default
+    
+    #     Output parameters:
+#     Lb   - basic transmission loss, Lb[i, j] not exceeded for p[i]% time and pL[j]% locations
+#            (with sigmaL = 0, as for LOCATION_VARIABILITY_P1812 by default, all the columns are the same)
+    
+    p = np.atleast_1d(np.asarray(p, dtype=float))
+    pL = np.atleast_1d(np.asarray(pL, dtype=float))
+    if sigmaL is None:
+        sigmaL = path['sigmaL']
+    
+    for pi in p:
+        check_limit(pi, 1, 50, 'p [%]');
+    for pLj in pL:
+        check_limit(pLj, 1, 99, 'pL[%]');
+    check_value(Ct, [1, 2, 3, 4, 5], 'Clutter coverage (Ct)');
     
-    # # Basic transmission loss not exceeded for p% time and 50% locations,
-# # including the effects of terminal clutter losses
+    f, d, h, zone, b0, DN, omega, flag4, ta = path['f'], path['d'], path['h'], path['zone'], path['b0'], path['DN'], path['omega'], path['flag4'], path['ta']
+    htc, hrc, hstd, hsrd = path['htc'], path['hrc'], path['hstd'], path['hsrd']
     
-    #Lbc = Lbu + Aht + Ahr;
+    # Modify the path by adding representative clutter, according to Section 3.2
+    # excluding the first and the last point
+    g = h + R
+    g[0] = h[0]
+    g[-1] = h[-1]
     
-    Lloc = 0.0 # outdoors only (67a)
+    # Diffraction losses Ld50 and Ldb, computed once (Ldb only when a time percentage is below 50%)
+    Ldp,Ldb,Ld50,Lbulla50,Lbulls50,Ldsph50 = dl_p(d,g,htc,hrc,hstd,hsrd,f,omega,np.min(p),b0,DN,flag4,ta)
     
     # Location variability of losses (Section 4.8)
+    Lloc = np.zeros(len(pL)) # outdoors only (67a)
     if zone[-1] != 1: # Rx at sea
-        Lloc = - inv_cum_norm(pL / 100) * sigmaL
-    
-    # Basic transmission loss not exceeded for p% time and pL% locations
-    # (Sections 4.8 and 4.9) not implemented
-    
-    Lb = max(Lb0p,Lbc + Lloc) # eq (69)
+        Lloc = - np.array([inv_cum_norm(pLj / 100) for pLj in pL]) * sigmaL
+    
+    Lb = np.zeros((len(p), len(pL)))
+    for i in range(len(p)):
+        terms = dict(path, **tl_p1812_time(path,p[i]))
+        
+        # Diffraction loss not exceeded for p% time, interpolated between Ld50 and Ldb as in dl_p
+        Ldp = Ld50
+        if p[i] < 50:
+            Fi = 1
+            if p[i] > b0:
+                Fi = inv_cum_norm(p[i] / 100) / inv_cum_norm(b0 / 100)
+            Ldp = Ld50 + Fi * (Ldb - Ld50)
+        
+        Lbc = tl_p1812_combine(terms,Ldp,Ld50)
+        
+        Lb[i, :] = np.maximum(terms['Lb0p'],Lbc + Lloc) # eq (69)
     
     return Lb
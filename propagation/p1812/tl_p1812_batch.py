@@ -0,0 +1,495 @@
+import numpy as np
+
+from propagation.p1812.earth_rad_eff import earth_rad_eff
+from propagation.p1812.pl_los import pl_los
+from propagation.p1812.tl_tropo import tl_tropo
+
+def tl_p1812_batch(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = None,htg = None,hrg = None,pol = None, phi_t = None, phi_r = None, lam_t = None, lam_r = None, pL = None, sigmaL = None, DN = None, N0 = None):
+    #tl_p1812_batch basic transmission loss according to P.1812-6, for many paths at once
+    #   Lb = tl_p1812_batch(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0)
+
+    #   Same model as tl_p1812SAFE, with every sub-model computed as array
+    #   operations over the paths of the batch instead of one path at a time.
+
+    #     Input parameters:
+    #     d, h, R, Ct, zone -   profiles of the paths, either a list of vectors (one per path,
+    #                           of any length) or 2-D arrays (one row per path, all of the same length)
+    #     f, p, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0
+    #                       -   scalars (same for every path) or vectors (one value per path),
+    #                           as described in tl_p1812SAFE
+
+    #     Output parameters:
+    #     Lb   -   vector of basic transmission losses, one per path
+    #              (NaN for the paths tl_p1812SAFE cannot compute)
+
+    d, valid, n = pad_profiles(d)
+    h = pad_profiles(h)[0]
+    R = pad_profiles(R)[0]
+    Ct = pad_profiles(Ct, 2)[0]
+    zone = pad_profiles(zone, 4)[0]
+    B = len(n)
+
+    f, p, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0 = [np.broadcast_to(np.asarray(x, dtype=float), (B,)) for x in (f, p, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0)]
+    pol = pol.astype(int)
+
+    check_inputs_batch(f, p, htg, hrg, pL, pol, Ct[valid], zone[valid])
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return tl_p1812_batch_inner(f, p, d, h, R, zone, valid, n, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0)
+
+
+def tl_p1812_batch_inner(f, p, d, h, R, zone, valid, n, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0, radial = None):
+    # radial: RadialAnalysis of the radial when the paths are prefixes of one radial profile (tl_p1812_radial)
+
+    rows = np.arange(len(n))
+    last = n - 1
+    d_last = d[rows, last]
+    h_last = h[rows, last]
+    zone_last = zone[rows, last]
+
+    # Tx/Rx at sea
+    dct = np.where(zone[:, 0] == 1, 0, 500)
+    dcr = np.where(zone_last == 1, 0, 500)
+
+    # Path center latitude
+    Re = 6371
+    dpnt = 0.5 * (d_last - d[:, 0])
+    phi_path = great_circle_path_batch(lam_r, lam_t, phi_r, phi_t, Re, dpnt)[1]
+
+    # The longest continuous land (inland + coastal) and inland sections of the great-circle path (km)
+    dtm = zone_distance_batch(d, valid, n, (zone == 3) | (zone == 4), np.maximum)
+    dlm = zone_distance_batch(d, valid, n, zone == 4, np.maximum)
+
+    b0 = beta0_batch(phi_path, dtm, dlm)
+    ae, ab = earth_rad_eff(DN)
+    ab = np.full(len(n), ab, dtype=float)
+
+    # Path fraction over sea Eq (1)
+    omega = zone_distance_batch(d, valid, n, zone == 1, np.add) / (d_last - d[:, 0])
+
+    # Derive parameters for the path profile analysis
+    hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta = smooth_earth_heights_batch(d, h, valid, n, htg, hrg, ae, f, radial)
+    dtot = d_last - d[:, 0]
+
+    #Tx and Rx antenna heights above mean sea level amsl (m)
+    hts = h[:, 0] + htg
+    hrs = h_last + hrg
+
+    # Modify the path by adding representative clutter, excluding the first and the last point
+    g = h + R
+    g[:, 0] = h[:, 0]
+    g[rows, last] = h_last
+
+    htc = hts
+    hrc = hrs
+
+    # Interpolation factors Fj (path angular distance) Eq (57) and Fk (great circle path distance) Eq (58)
+    THETA = 0.3
+    KSI = 0.8
+    Fj = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * KSI * (theta - THETA) / THETA))
+    dsw = 20
+    kappa = 0.5
+    Fk = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * kappa * (dtot - dsw) / dsw))
+
+    Lbfs, Lb0p, Lb0b = pl_los(dtot, hts, hrs, f, p, b0, dlt, dlr)
+    Ldp, Ld50 = dl_p_batch(d, g, valid, n, htc, hrc, hstd, hsrd, f, omega, p, b0, ae, ab, radial)
+
+    # Eq (42), (43)
+    Lbd50 = Lbfs[:, None] + Ld50
+    Lbd = Lb0p[:, None] + Ldp
+
+    # A notional minimum basic transmission loss associated with LoS propagation and over-sea sub-path diffraction
+    Lminb0p = Lb0p[:, None] + (1 - omega[:, None]) * Ldp
+
+    # eq (40a), (59)
+    Fi = inv_cum_norm_batch(p / 100) / inv_cum_norm_batch(b0 / 100)
+    Lminb0p = np.where((p >= b0)[:, None], Lbd50 + (Lb0b[:, None] + (1 - omega[:, None]) * Ldp - Lbd50) * Fi[:, None], Lminb0p)
+
+    # Notional minimum basic transmission loss associated with LoS and transhorizon signal enhancements eq (60)
+    eta = 2.5
+    Lba = tl_anomalous_batch(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0)
+    Lminbap = eta * np.log(np.exp(Lba / eta) + np.exp(Lb0p / eta))
+
+    # Diffraction and LoS or ducting/layer reflection enhancements eq (61), (62)
+    enhanced = (Lminbap <= Lbd[:, 0]) & (Lminbap <= Lbd[:, 1])
+    Lbda = np.where(enhanced[:, None], Lminbap[:, None] + (Lbd - Lminbap[:, None]) * Fk[:, None], Lbd)
+    Lbam = Lbda + (Lminb0p - Lbda) * Fj[:, None]
+
+    # Troposcatter
+    Lbs = tl_tropo(dtot, theta, f, p, N0)
+
+    # Final transmission loss not exceeded for p% time eq (63), for the right polarization
+    Lbc_pol = - 5 * np.log10(10.0 ** (- 0.2 * Lbs[:, None]) + 10.0 ** (- 0.2 * Lbam))
+    Lbc = Lbc_pol[rows, pol - 1]
+
+    # Location variability of losses (Section 4.8), outdoors only (67a)
+    Lloc = np.where(zone_last != 1, - inv_cum_norm_batch(pL / 100) * sigmaL, 0.0)
+
+    # eq (69)
+    Lb = np.maximum(Lb0p, Lbc + Lloc)
+
+    # Paths the scalar model cannot compute (no intermediate point, or no point between the two horizons)
+    Lb[(n < 3) | np.isnan(hm)] = np.nan
+
+    return Lb
+
+
+def pad_profiles(profiles, fill = 0):
+    # One row per path, padded after the last point of shorter paths (valid marks the points of each path)
+    if isinstance(profiles, np.ndarray) and profiles.ndim == 2:
+        n = np.full(profiles.shape[0], profiles.shape[1])
+        return profiles.astype(float), np.ones(profiles.shape, dtype=bool), n
+
+    n = np.array([len(profile) for profile in profiles])
+    padded = np.full((len(profiles), n.max()), fill, dtype=float)
+    valid = np.arange(n.max()) < n[:, None]
+    padded[valid] = np.concatenate([np.asarray(profile, dtype=float) for profile in profiles])
+    return padded, valid, n
+
+
+def masked_max(x, mask):
+    return np.max(np.where(mask, x, -np.inf), axis=1)
+
+
+def masked_argmax(x, mask):
+    # First point reaching the maximum (as np.where(x == max(x))[0][0])
+    return np.argmax(np.where(mask, x, -np.inf), axis=1)
+
+
+def check_inputs_batch(f, p, htg, hrg, pL, pol, Ct, zone):
+    #verify input argument values and limits
+    check_limit_batch(f, 0.03, 6.0, 'f [GHz]')
+    check_limit_batch(p, 1, 50, 'p [%]')
+    check_limit_batch(htg, 1, 3000, 'htg [m]')
+    check_limit_batch(hrg, 1, 3000, 'hrg [m]')
+    check_limit_batch(pL, 1, 99, 'pL[%]')
+    check_value_batch(pol, [1, 2], 'Polarization (pol)')
+    check_value_batch(Ct, [1, 2, 3, 4, 5], 'Clutter coverage (Ct)')
+    check_value_batch(zone, [1, 3, 4], 'Radio-climatic zone (zone)')
+
+
+def check_limit_batch(var, low, hi, name):
+    outside = (var < low) | (var > hi)
+    if outside.any():
+        raise Exception(name+' = '+str(var[outside][0])+' is outside the limits: ['+str(low)+', '+str(hi)+'].')
+
+
+def check_value_batch(var, vals, name):
+    if not np.isin(var, vals).all():
+        raise Exception(name+' may only contain the following values: '+str(vals)+'.')
+
+
+def inv_cum_norm_batch(x):
+    # inv_cum_norm for a vector of x
+    x = np.clip(x, 1e-06, 0.999999)
+    y = np.where(x <= 0.5, x, 1 - x)
+    T = np.sqrt(- 2 * np.log(y))
+    C = (((0.010328 * T + 0.802853) * T) + 2.515516698) / (((0.001308 * T + 0.189269) * T + 1.432788) * T + 1)
+    return np.where(x <= 0.5, T - C, - (T - C))
+
+
+def great_circle_path_batch(Phire, Phite, Phirn, Phitn, Re, dpnt):
+    # Longitude and latitude of the intermediate point of great_circle_path, for vectors of paths
+    Dlon = Phire - Phite
+    r = np.sin(np.pi/180*Phitn) * np.sin(np.pi/180*Phirn) + np.cos(np.pi/180*Phitn) * np.cos(np.pi/180*Phirn) * np.cos(np.pi/180*Dlon)
+    x1 = np.sin(np.pi/180*Phirn) - r * np.sin(np.pi/180*Phitn)
+    y1 = np.cos(np.pi/180*Phitn) * np.cos(np.pi/180*Phirn) * np.sin(np.pi/180*Dlon)
+    Bt2r = np.where((np.abs(x1) < 1e-09) & (np.abs(y1) < 1e-09), Phire, (180/np.pi)*np.arctan2(y1,x1))
+    Phipnt = dpnt / Re
+    s = np.sin(np.pi/180*Phitn) * np.cos(Phipnt) + np.cos(np.pi/180*Phitn) * np.sin(Phipnt) * np.cos(np.pi/180*Bt2r)
+    Phipntn = (180/np.pi)*np.arcsin(s)
+    x2 = np.cos(Phipnt) - s * np.sin(np.pi/180*Phitn)
+    y2 = np.cos(np.pi/180*Phitn) * np.sin(Phipnt) * np.sin(np.pi/180*Bt2r)
+    Phipnte = np.where((x2 < 1e-09) & (y2 < 1e-09), Bt2r, Phite + (180/np.pi)*np.arctan2(y2,x2))
+    return Phipnte, Phipntn
+
+
+def zone_distance_batch(d, valid, n, in_zone, reduce):
+    # Longest (reduce=np.maximum, longest_cont_dist) or total (reduce=np.add, path_fraction) distance
+    # of the continuous sections of each path in the zone
+    rows = np.arange(len(n))
+    in_zone = in_zone & valid
+    previous = np.zeros_like(in_zone)
+    previous[:, 1:] = in_zone[:, :-1]
+    following = np.zeros_like(in_zone)
+    following[:, :-1] = in_zone[:, 1:]
+
+    # Sections start and stop (in the same order on every row)
+    start_row, start = np.nonzero(in_zone & ~previous)
+    stop_row, stop = np.nonzero(in_zone & ~following)
+
+    d_last = d[rows, n - 1][stop_row]
+    delta = np.where(d[stop_row, stop] < d_last, (d[stop_row, np.minimum(stop + 1, d.shape[1] - 1)] - d[stop_row, stop]) / 2.0, 0)
+    delta = delta + np.where(d[start_row, start] > 0, (d[stop_row, stop] - d[stop_row, stop - 1]) / 2.0, 0)
+
+    dm = np.zeros(len(n))
+    reduce.at(dm, stop_row, d[stop_row, stop] - d[start_row, start] + delta)
+    return dm
+
+
+def beta0_batch(phi, dtm, dlm):
+    tau = 1 - np.exp(- (0.000412 * dlm ** 2.41))
+    mu1 = np.minimum((10 ** (- dtm / (16 - 6.6 * tau)) + 10 ** (- 5 * (0.496 + 0.354 * tau))) ** 0.2, 1)
+    mu4 = np.where(np.abs(phi) <= 70, mu1 ** (- 0.935 + 0.0176 * np.abs(phi)), mu1 ** (0.3))
+    return np.where(np.abs(phi) <= 70, 10 ** (- 0.015 * np.abs(phi) + 1.67) * mu1 * mu4, 4.17 * mu1 * mu4)
+
+
+def smooth_earth_heights_batch(d, h, valid, n, htg, hrg, ae, f, radial = None):
+    # smooth_earth_heights for a batch of paths, returns hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot
+    # (the regression sums and the horizon of the transmitter are read from the radial, when given)
+    rows = np.arange(len(n))
+    last = n - 1
+    dtot = d[rows, last]
+    h0 = h[:, 0]
+    h_last = h[rows, last]
+    hts = h0 + htg
+    hrs = h_last + hrg
+    htc = hts
+    hrc = hrs
+
+    # Intermediate points of each path
+    inner = valid.copy()
+    inner[:, 0] = False
+    inner[rows, last] = False
+
+    # Section 5.6.1 Deriving the smooth-Earth surface Eq (85), (86)
+    if radial is None:
+        segments = valid[:, 1:]
+        dd = np.where(segments, np.diff(d, axis=1), 0)
+        v1 = np.sum(dd * (h[:, 1:] + h[:, :-1]), axis=1)
+        v2 = np.sum(dd * (h[:, 1:] * (2 * d[:, 1:] + d[:, :-1]) + h[:, :-1] * (d[:, 1:] + 2 * d[:, :-1])), axis=1)
+    else:
+        v1, v2 = radial.regression_sums(n)
+
+    hst = (2 * v1 * dtot - v2) / dtot ** 2
+    hsr = (v2 - v1 * dtot) / dtot ** 2
+
+    # Section 5.6.2 Smooth-surface heights for the diffraction model
+    dt = dtot[:, None]
+    HH = h - (htc[:, None] * (dt - d) + hrc[:, None] * d) / dt
+    hobs = masked_max(HH, inner)
+    alpha_obt = masked_max(HH / d, inner)
+    alpha_obr = masked_max(HH / (dt - d), inner)
+
+    gt = alpha_obt / (alpha_obt + alpha_obr)
+    gr = alpha_obr / (alpha_obt + alpha_obr)
+    hstp = np.where(hobs <= 0, hst, hst - hobs * gt)
+    hsrp = np.where(hobs <= 0, hsr, hsr - hobs * gr)
+
+    hstd = np.where(hstp >= h0, h0, hstp)
+    hsrd = np.where(hsrp > h_last, h_last, hsrp)
+
+    # Interfering antenna horizon elevation angle and distance
+    ae_ = ae[:, None]
+    if radial is None:
+        theta = 1000 * np.arctan((h - hts[:, None]) / (1000 * d) - d / (2 * ae_))
+        theta_max = masked_max(theta, inner)
+        lt_th = masked_argmax(theta, inner)
+    else:
+        theta_max, lt_th = radial.horizon(n, ae)
+    theta_td = 1000 * np.arctan((hrs - hts) / (1000 * dtot) - dtot / (2 * ae))
+    theta_rd = 1000 * np.arctan((hts - hrs) / (1000 * dtot) - dtot / (2 * ae))
+    transhorizon = theta_max > theta_td
+    theta_t = np.maximum(theta_max, theta_td)
+
+    # Transhorizon: horizon points seen from each terminal
+    theta_rx = 1000 * np.arctan((h - hrs[:, None]) / (1000 * (dt - d)) - (dt - d) / (2 * ae_))
+    theta_r_th = masked_max(theta_rx, inner)
+    lr_th = masked_argmax(theta_rx, inner)
+
+    # LoS: point with the highest diffraction parameter
+    lambda_ = 0.2998 / f
+    Ce = 1 / ae_
+    nu = (h + 500 * Ce * d * (dt - d) - (hts[:, None] * (dt - d) + hrs[:, None] * d) / dt) * np.sqrt(0.002 * dt / (lambda_[:, None] * d * (dt - d)))
+    lt_los = masked_argmax(nu, inner)
+
+    lt = np.where(transhorizon, lt_th, lt_los)
+    lr = np.where(transhorizon, lr_th, lt_los)
+    theta_r = np.where(transhorizon, theta_r_th, theta_rd)
+    dlt = d[rows, lt]
+    dlr = np.where(transhorizon, dtot - d[rows, lr_th], dtot - dlt)
+
+    # Angular distance
+    theta_tot = 1000.0 * dtot / ae + theta_t + theta_r
+
+    # Section 5.6.3 Ducting/layer-reflection model
+    hst = np.minimum(hst, h0)
+    hsr = np.minimum(hsr, h_last)
+    m = (hsr - hst) / dtot
+    hte = htg + h0 - hst
+    hre = hrg + h_last - hsr
+
+    index = np.arange(d.shape[1])
+    between = (index >= lt[:, None]) & (index <= lr[:, None])
+    hm = np.where(between.any(axis=1), masked_max(h - (hst[:, None] + m[:, None] * d), between), np.nan)
+
+    return hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot
+
+
+def dl_p_batch(d, g, valid, n, hts, hrs, hstd, hsrd, f, omega, p, b0, ae, ab, radial = None):
+    # dl_p for a batch of paths, returns Ldp and Ld50 (one column per polarization)
+    Ld50 = dl_delta_bull_batch(d, g, valid, n, hts, hrs, hstd, hsrd, ae, f, omega, radial)
+    Ldp = Ld50.copy()
+
+    # Paths below 50% of time also need the diffraction loss for the effective Earth radius exceeded for beta0% of time
+    below = p < 50
+    if below.any():
+        rows = np.nonzero(below)[0]
+        Ldb = dl_delta_bull_batch(d[rows], g[rows], valid[rows], n[rows], hts[rows], hrs[rows], hstd[rows], hsrd[rows], ab[rows], f[rows], omega[rows], radial)
+        Fi = np.where(p[rows] > b0[rows], inv_cum_norm_batch(p[rows] / 100) / inv_cum_norm_batch(b0[rows] / 100), 1)
+        Ldp[rows] = Ld50[rows] + Fi[:, None] * (Ldb - Ld50[rows])
+
+    return Ldp, Ld50
+
+
+def dl_delta_bull_batch(d, g, valid, n, hts, hrs, hstd, hsrd, ap, f, omega, radial = None):
+    # dl_delta_bull for a batch of paths (one column per polarization)
+    rows = np.arange(len(n))
+    Lbulla = dl_bull_batch(d, g, valid, n, hts, hrs, ap, f, radial)
+
+    # Smooth path: profile heights set to zero and modified antenna heights
+    hts1 = hts - hstd
+    hrs1 = hrs - hsrd
+    Lbulls = dl_bull_batch(d, np.zeros_like(g), valid, n, hts1, hrs1, ap, f)
+
+    dtot = d[rows, n - 1] - d[:, 0]
+    Ldsph = dl_se_batch(dtot, hts1, hrs1, ap, f, omega)
+
+    return Lbulla[:, None] + np.maximum(Ldsph - Lbulls[:, None], 0)
+
+
+def dl_bull_batch(d, g, valid, n, hts, hrs, ap, f, radial = None):
+    # dl_bull for a batch of paths (Stim is read from the radial, when given, for its profile with clutter)
+    rows = np.arange(len(n))
+    Ce = (1 / ap)[:, None]
+    lambda_ = (0.2998 / f)[:, None]
+    dtot = d[rows, n - 1] - d[:, 0]
+    dt = dtot[:, None]
+
+    inner = valid.copy()
+    inner[:, 0] = False
+    inner[rows, n - 1] = False
+
+    bulge = g + 500 * Ce * d * (dt - d)
+    Stim = masked_max((bulge - hts[:, None]) / d, inner) if radial is None else radial.tx_slope(n, ap)
+    Str = (hrs - hts) / dtot
+
+    # LoS paths: intermediate profile point with the highest diffraction parameter
+    numax = masked_max((bulge - (hts[:, None] * (dt - d) + hrs[:, None] * d) / dt) * np.sqrt(0.002 * dt / (lambda_ * d * (dt - d))), inner)
+
+    # Transhorizon paths: diffraction parameter of the Bullington point
+    Srim = masked_max((bulge - hrs[:, None]) / (dt - d), inner)
+    dbp = (hrs - hts + Srim * dtot) / (Stim + Srim)
+    nub = (hts + Stim * dbp - (hts * (dtot - dbp) + hrs * dbp) / dtot) * np.sqrt(0.002 * dtot / (lambda_[:, 0] * dbp * (dtot - dbp)))
+
+    nu = np.where(Stim < Str, numax, nub)
+    Luc = np.where(nu > - 0.78, 6.9 + 20 * np.log10(np.sqrt((nu - 0.1) ** 2 + 1) + nu - 0.1), 0)
+
+    return Luc + (1 - np.exp(- Luc / 6.0)) * (10 + 0.02 * dtot)
+
+
+def dl_se_batch(d, hte, hre, ap, f, omega):
+    # dl_se for a batch of paths (one column per polarization)
+    lambda_ = 0.2998 / f
+
+    # Marginal LoS distance for a smooth path
+    dlos = np.sqrt(2 * ap) * (np.sqrt(0.001 * hte) + np.sqrt(0.001 * hre))
+
+    # Smallest clearance between the curved-Earth path and the ray between the antennas, and the required clearance
+    c = (hte - hre) / (hte + hre)
+    m = 250 * d * d / (ap * (hte + hre))
+    b = 2 * np.sqrt((m + 1) / (3 * m)) * np.cos(np.pi / 3 + 1 / 3 * np.arccos(3 * c / 2 * np.sqrt(3 * m / ((m + 1) ** 3))))
+    dse1 = d / 2 * (1 + b)
+    dse2 = d - dse1
+    hse = ((hte - 500 * dse1 * dse1 / ap) * dse2 + (hre - 500 * dse2 * dse2 / ap) * dse1) / d
+    hreq = 17.456 * np.sqrt(dse1 * dse2 * lambda_ / d)
+
+    # Modified effective Earth radius giving marginal LoS at distance d
+    aem = 500 * (d / (np.sqrt(hte) + np.sqrt(hre))) ** 2
+
+    beyond = d >= dlos
+    Ldft = dl_se_ft_batch(d, hte, hre, np.where(beyond, ap, aem), f, omega)
+
+    Ldsph = np.where(((Ldft[:, 0] < 0) & (Ldft[:, 1] < 0))[:, None], 0, (1 - hse / hreq)[:, None] * Ldft)
+    Ldsph = np.where((hse > hreq)[:, None], 0, Ldsph)
+    return np.where(beyond[:, None], Ldft, Ldsph)
+
+
+def dl_se_ft_batch(d, hte, hre, adft, f, omega):
+    # dl_se_ft for a batch of paths (one column per polarization)
+    Ldft_land = dl_se_ft_inner_batch(22, 0.003, d, hte, hre, adft, f)
+    Ldft_sea = dl_se_ft_inner_batch(80, 5, d, hte, hre, adft, f)
+    return omega[:, None] * Ldft_sea + (1 - omega[:, None]) * Ldft_land
+
+
+def dl_se_ft_inner_batch(epsr, sigma, d, hte, hre, adft, f):
+    # dl_se_ft_inner for a batch of paths (one column per polarization)
+    K0 = 0.036 * (adft * f) ** (- 1 / 3) * ((epsr - 1) ** 2 + (18 * sigma / f) ** 2) ** (- 1 / 4)
+    K = np.stack([K0, K0 * (epsr ** 2 + (18 * sigma / f) ** 2) ** (1 / 2)], axis=1)
+
+    beta_dft = (1 + 1.6 * K ** 2 + 0.67 * K ** 4) / (1 + 4.5 * K ** 2 + 1.53 * K ** 4)
+
+    # Normalized distance and antenna heights
+    X = 21.88 * beta_dft * ((f / adft ** 2) ** (1 / 3) * d)[:, None]
+    Yt = 0.9575 * beta_dft * ((f ** 2 / adft) ** (1 / 3) * hte)[:, None]
+    Yr = 0.9575 * beta_dft * ((f ** 2 / adft) ** (1 / 3) * hre)[:, None]
+
+    # Distance term
+    Fx = np.where(X >= 1.6, 11 + 10 * np.log10(X) - 17.6 * X, - 20 * np.log10(X) - 5.6488 * X ** 1.425)
+
+    # Height gain terms
+    Bt = beta_dft * Yt
+    Br = beta_dft * Yr
+    GYt = np.where(Bt > 2, 17.6 * (Bt - 1.1) ** 0.5 - 5 * np.log10(Bt - 1.1) - 8, 20 * np.log10(Bt + 0.1 * Bt ** 3))
+    GYr = np.where(Br > 2, 17.6 * (Br - 1.1) ** 0.5 - 5 * np.log10(Br - 1.1) - 8, 20 * np.log10(Br + 0.1 * Br ** 3))
+    GYt = np.maximum(GYt, 2 + 20 * np.log10(K))
+    GYr = np.maximum(GYr, 2 + 20 * np.log10(K))
+
+    return - Fx - GYt - GYr
+
+
+def tl_anomalous_batch(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0):
+    # tl_anomalous for a batch of paths
+
+    # empirical correction for the increasing attenuation with wavelength inducted propagation (47a)
+    Alf = np.where(f < 0.5, 45.375 - 137.0 * f + 92.5 * f * f, 0)
+
+    # site-shielding diffraction losses (48)
+    theta_t2 = theta_t - 0.1 * dlt
+    theta_r2 = theta_r - 0.1 * dlr
+    Ast = np.where(theta_t2 > 0, 20 * np.log10(1 + 0.361 * theta_t2 * np.sqrt(f * dlt)) + 0.264 * theta_t2 * f ** (1 / 3), 0)
+    Asr = np.where(theta_r2 > 0, 20 * np.log10(1 + 0.361 * theta_r2 * np.sqrt(f * dlr)) + 0.264 * theta_r2 * f ** (1 / 3), 0)
+
+    # over-sea surface duct coupling corrections (49)
+    Act = np.where((dct <= 5) & (dct <= dlt) & (omega >= 0.75), - 3 * np.exp(- 0.25 * dct * dct) * (1 + np.tanh(0.07 * (50 - hts))), 0)
+    Acr = np.where((dcr <= 5) & (dcr <= dlr) & (omega >= 0.75), - 3 * np.exp(- 0.25 * dcr * dcr) * (1 + np.tanh(0.07 * (50 - hrs))), 0)
+
+    # specific attenuation (51)
+    gamma_d = 5e-05 * ae * f ** (1 / 3)
+
+    # angular distance (corrected where appropriate) (52-52a)
+    theta_t1 = np.where(theta_t > 0.1 * dlt, 0.1 * dlt, theta_t)
+    theta_r1 = np.where(theta_r > 0.1 * dlr, 0.1 * dlr, theta_r)
+    theta1 = 1000.0 * dtot / ae + theta_t1 + theta_r1
+    dI = np.minimum(dtot - dlt - dlr, 40)
+
+    mu3 = np.where(hm > 10, np.exp(- 4.6e-05 * (hm - 10) * (43 + 6 * dI)), 1)
+
+    tau = 1 - np.exp(- (0.000412 * dlm ** 2.41))
+    epsilon = 3.5
+    alpha = np.maximum(- 0.6 - epsilon * 1e-09 * dtot ** (3.1) * tau, - 3.4)
+
+    # correction for path geometry
+    mu2 = np.minimum((500 / ae * dtot ** 2 / (np.sqrt(hte) + np.sqrt(hre)) ** 2) ** alpha, 1)
+
+    beta = b0 * mu2 * mu3
+    Gamma = 1.076 / (2.0058 - np.log10(beta)) ** 1.012 * np.exp(- (9.51 - 4.8 * np.log10(beta) + 0.198 * (np.log10(beta)) ** 2) * 1e-06 * dtot ** (1.13))
+
+    # time percentage variablity (cumulative distribution)
+    Ap = - 12 + (1.2 + 0.0037 * dtot) * np.log10(p / beta) + 12 * (p / beta) ** Gamma
+    Adp = gamma_d * theta1 + Ap
+
+    # total of fixed coupling losses (47) and total basic transmission loss (46)
+    Af = 102.45 + 20 * np.log10(f) + 20 * np.log10(dlt + dlr) + Alf + Ast + Asr + Act + Acr
+
+    return Af + Adp
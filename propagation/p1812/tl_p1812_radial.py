@@ -0,0 +1,48 @@
+import numpy as np
+
+from propagation.p1812.radial_analysis import RadialAnalysis
+from propagation.p1812.tl_p1812_batch import tl_p1812_batch_inner, check_inputs_batch
+
+def tl_p1812_radial(f = None,p = None,d = None,h = None,R = None,Ct = None,zone = None,htg = None,hrg = None,pol = None, phi_t = None, phi_r = None, lam_t = None, lam_r = None, pL = None, sigmaL = None, DN = None, N0 = None, n = None):
+    #tl_p1812_radial basic transmission loss according to P.1812-6 from the first point of a radial to several of its points
+#   Lb = tl_p1812_radial(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0, n)
+
+    #   Same as tl_p1812SAFE for the paths d[0:n], h[0:n], R[0:n], ... from the transmitter to a receiver
+#   at each point n-1 of the radial, computed for all the receivers at once by the batched engine
+#   (tl_p1812_batch), where the smooth-Earth regression sums, the horizon angle of the transmitter and
+#   the highest slope Stim of the Bullington construction come from one walk along the radial
+#   (RadialAnalysis) instead of being derived from every path. The terms depending on the receiver
+#   are still derived from every path (the rows of the radial masked after the receiver).
+
+    #     Input parameters: as in tl_p1812SAFE for the whole radial (d, h, R, Ct, zone), and
+#     n       -   vector of the numbers of points of the paths to the receivers
+#     hrg, phi_r, lam_r, DN, N0
+#             -   scalars or vectors of the values for each receiver
+
+    #     Output parameters:
+#     Lb   - vector of the basic transmission losses to each receiver (NaN where tl_p1812SAFE
+#            cannot compute the path, as in tl_p1812_batch)
+
+    n = np.asarray(n)
+    B = len(n)
+    d, h, R, Ct, zone = [np.asarray(x, dtype=float) for x in (d, h, R, Ct, zone)]
+
+    f, p, hrg, pol, phi_r, lam_r, pL, sigmaL, DN, N0 = [np.broadcast_to(np.asarray(x, dtype=float), (B,)) for x in (f, p, hrg, pol, phi_r, lam_r, pL, sigmaL, DN, N0)]
+    pol = pol.astype(int)
+
+    check_inputs_batch(f, p, np.array([htg]), hrg, pL, pol, Ct[:n.max()], zone[:n.max()])
+
+    # Terrain with the representative clutter, as in tl_p1812_clutter (the last point of a path is
+    # set back to the terrain by the engine)
+    g = h + R
+    g[0] = h[0]
+    radial = RadialAnalysis(d, h, g, h[0] + htg)
+
+    # Every path is a row of the radial, its points after the receiver being masked
+    shape = (B, len(d))
+    valid = np.arange(len(d)) < n[:, None]
+    d, h, R, zone = [np.broadcast_to(x, shape) for x in (d, h, R, zone)]
+    htg, phi_t, lam_t = [np.full(B, x, dtype=float) for x in (htg, phi_t, lam_t)]
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return tl_p1812_batch_inner(f, p, d, h, R, zone, valid, n, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, pL, sigmaL, DN, N0, radial)
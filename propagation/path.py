@@ -1,8 +1,11 @@
 import numpy as np
 from propagation.config import MINIMAL_CLUTTER_DEPTH, MINIMAL_CLUTTER_HEIGHT
 
-def get_path_length_below_terrain(terrain_h, tx_height, rx_height):
+def get_path_length_below_terrain(profile, tx_height, rx_height):
     
+    # Heights are stored in float32, computed in float64
+    terrain_h = profile.terrain.astype(float)
+
     # Get antenna height above sea level
     tx_height_asl = tx_height + terrain_h[0]
     rx_height_asl = rx_height + terrain_h[-1]
@@ -56,8 +59,13 @@ def extrapolate_clutter_path(clutter_path, desired_length):
   
 	return np.array(extrapolated_list)
 
-def get_clutter_features(tx, rx, surface_h, terrain_h, clutter_path):
+def get_clutter_features(tx, rx, profile):
 	
+	# Heights are stored in float32, computed in float64
+	surface_h = profile.surface.astype(float)
+	terrain_h = profile.terrain.astype(float)
+	clutter_path = profile.clutter
+
 	# Increase resolution of terrain and surface (1 point is 1m)
 	# 0.1 meter resolution means 10 points every meter
 	resolution = 0.1
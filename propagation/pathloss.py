@@ -1,14 +1,136 @@
 import numpy as np
 
+from copy import copy
+
 from propagation.ret_model import ret_model_computation
-from propagation.p1812.tl_p1812SAFE import tl_p1812SAFE
+from propagation.p1812.tl_p1812SAFE import tl_p1812_path, tl_p1812_clutter, tl_p1812_percentages
+from propagation.p1812.tl_p1812_batch import tl_p1812_batch, great_circle_path_batch
+from propagation.p1812.tl_p1812_radial import tl_p1812_radial
 from propagation.p1812.great_circle_path import great_circle_path
 from propagation.p1812.InterpolateDN50andN050CTR import InterpolateDN50andN050CTR
 from propagation.top_diffraction import topDiffraction
 
-from propagation.config import RET_DB_LIMIT, ZONE_COASTAL, ZONE_INLAND, CLUTTER_VALUES, TIME_PERCENTAGE_P1812, LOCATION_PERCENTAGE_P1812
+from propagation.config import RET_DB_LIMIT, ZONE_COASTAL, ZONE_INLAND, CLUTTER_VALUES, TIME_PERCENTAGE_P1812, LOCATION_PERCENTAGE_P1812, LOCATION_VARIABILITY_P1812
+
+def compute_p1812(tx, rx, profile, clutter_type=3):
+
+    return P1812Link(tx, rx, profile).path_loss(clutter_type)
+
+
+class P1812Link:
+    # Clutter-independent part of the P.1812 computation of a link (resampled profile, path centre refractivity,
+    # smooth-Earth analysis, LoS, anomalous and troposcatter losses), computed once and shared by its clutter variants
+    def __init__(self, tx, rx, profile, frequency=None):
+        # frequency: in MHz, the one of the Tx by default
+        self.tx, self.rx = tx, rx
+        self.d, self.terrain_h, self.surface_h, self.zone = resample_p1812_profile(profile)
+        self.refractivity = get_p1812_refractivity(self.d, tx, rx)
+        self.path = self.get_path(tx.frequency if frequency is None else frequency)
+
+    def get_path(self, frequency):
+        try:
+            return get_p1812_path(self.d, self.terrain_h, self.zone, self.tx, self.rx, frequency, self.refractivity)
+        except ValueError:
+            return None
+
+    def at_frequency(self, frequency):
+        # Same link at another frequency (MHz), sharing the resampled profile and the path centre refractivity
+        link = copy(self)
+        link.path = self.get_path(frequency)
+        return link
+
+    def path_loss(self, clutter_type=3, bare_earth=False):
+        # P.1812 path loss (dB) with the representative clutter of clutter_type, or of the bare earth (no clutter)
+        if self.path is None:
+            return 0
+
+        R, Ct = get_p1812_clutter(self.terrain_h, self.terrain_h if bare_earth else self.surface_h, clutter_type)
+
+        try:
+            return round(tl_p1812_clutter(self.path, R, Ct), 6)
+        except ValueError:
+            return 0
+
+    def path_loss_percentages(self, time_percentages, location_percentages=(LOCATION_PERCENTAGE_P1812,), clutter_type=3, bare_earth=False, sigmaL=None):
+        # P.1812 path loss (dB) not exceeded for each time percentage (1-50 %, rows) and location percentage (1-99 %, columns),
+        # i.e. the loss CDF of the link, at about the cost of one path_loss (sigmaL: dB, LOCATION_VARIABILITY_P1812 by default).
+        # With sigmaL = 0, the default, the loss does not depend on the location percentage: all the columns are the same
+        if self.path is None:
+            return np.zeros((len(time_percentages), len(location_percentages)))
+
+        R, Ct = get_p1812_clutter(self.terrain_h, self.terrain_h if bare_earth else self.surface_h, clutter_type)
+
+        try:
+            return np.round(tl_p1812_percentages(self.path, R, Ct, time_percentages, location_percentages, sigmaL), 6)
+        except ValueError:
+            return np.zeros((len(time_percentages), len(location_percentages)))
+
+
+def compute_p1812_batch(tx_list, rx_list, profiles, clutter_type=3):
+
+    # Same as compute_p1812 for many links at once (one Tx, Rx and profile per link), with the batched P.1812 engine
+    inputs = [get_p1812_profile(profile, clutter_type) for profile in profiles]
+    d, h, R, Ct, zone = [[link[i] for link in inputs] for i in range(5)]
+
+    tx_lat, tx_lon = np.array([tx.lat for tx in tx_list]), np.array([tx.lon for tx in tx_list])
+    rx_lat, rx_lon = np.array([rx.lat for rx in rx_list]), np.array([rx.lon for rx in rx_list])
+
+    # Path centre refractivity of every link in one lookup
+    dpnt = np.array([0.5 * (link_d[-1] - link_d[0]) for link_d in d])
+    Phipnte, Phipntn = great_circle_path_batch(rx_lon, tx_lon, rx_lat, tx_lat, 6371, dpnt)
+    DN, N0 = InterpolateDN50andN050CTR(Phipntn, (Phipnte + 360))
+
+    freq = np.array([tx.frequency / 1000 for tx in tx_list])
+    Lb = tl_p1812_batch(freq, TIME_PERCENTAGE_P1812, d, h, R, Ct, zone, [tx.height for tx in tx_list], [rx.height for rx in rx_list], 2, tx_lat, rx_lat, tx_lon, rx_lon, LOCATION_PERCENTAGE_P1812, LOCATION_VARIABILITY_P1812, DN, N0)
+
+    # Links the model cannot compute give 0, as in compute_p1812
+    return np.round(np.nan_to_num(Lb, nan=0), 6)
+
+
+def compute_p1812_radial(tx, rx_list, distances, profile, clutter_type=3):
+
+    # compute_p1812 for every Rx of rx_list at the given distances (m) along the radial profile out of the Tx, from the radial
+    # resampled once. Approximate: off by a few dB where a path point falls across a clutter edge (python -m propagation.pathloss)
+    d, terrain_h, surface_h, zone = resample_p1812_profile(profile)
+    R, Ct = get_p1812_clutter(terrain_h, surface_h, clutter_type)
+
+    # Profile distance and number of points of the path to each Rx, as in compute_p1812
+    samples = np.array([int(round(distance / profile.spacing, 6)) for distance in distances])
+    rx_distances = samples * profile.spacing
+    n = np.array([len(np.arange(0, distance, 30)) for distance in rx_distances])
+    on_radial = rx_distances > 250
+
+    path_loss = np.zeros(len(rx_list))
+    for i in np.flatnonzero(~on_radial):
+        path_loss[i] = compute_p1812(tx, rx_list[i], profile.prefix(samples[i]), clutter_type)
+
+    if on_radial.any():
+        rx_on_radial = [rx_list[i] for i in np.flatnonzero(on_radial)]
+        rx_lat, rx_lon = np.array([rx.lat for rx in rx_on_radial]), np.array([rx.lon for rx in rx_on_radial])
+
+        # Path centre refractivity of every Rx in one lookup
+        Phipnte, Phipntn = great_circle_path_batch(rx_lon, tx.lon, rx_lat, tx.lat, 6371, 0.5 * d[n[on_radial] - 1])
+        DN, N0 = InterpolateDN50andN050CTR(Phipntn, (Phipnte + 360))
+
+        Lb = tl_p1812_radial(tx.frequency / 1000, TIME_PERCENTAGE_P1812, d, terrain_h, R, Ct, zone, tx.height, [rx.height for rx in rx_on_radial], 2, tx.lat, rx_lat, tx.lon, rx_lon, LOCATION_PERCENTAGE_P1812, LOCATION_VARIABILITY_P1812, DN, N0, n[on_radial])
+
+        # Rx the model cannot compute give 0, as in compute_p1812
+        path_loss[on_radial] = np.round(np.nan_to_num(Lb, nan=0), 6)
+
+    return path_loss
 
-def compute_p1812(tx, rx, surface_h, terrain_h, distance_to_tower, clutter_type=3):
+
+def get_p1812_profile(profile, clutter_type):
+
+    d, terrain_h, surface_h, zone = resample_p1812_profile(profile)
+    R, Ct = get_p1812_clutter(terrain_h, surface_h, clutter_type)
+
+    return d, terrain_h, R, Ct, zone
+
+
+def resample_p1812_profile(profile):
+
+    distance_to_tower = profile.distance
 
     # P.1812 input requires a terrain and surface resolution of 30m
     xnew = np.arange(0, distance_to_tower, 30) if distance_to_tower > 250 else np.arange(0, distance_to_tower, 5)
@@ -17,8 +139,15 @@ def compute_p1812(tx, rx, surface_h, terrain_h, distance_to_tower, clutter_type=
     d = xnew / 1000
     
     # Resampling terrain and surface heights from 1m to 30m resolution
-    terrain_h = np.interp(xnew, np.linspace(0, distance_to_tower, len(terrain_h)), terrain_h)
-    surface_h = np.interp(xnew, np.linspace(0, distance_to_tower, len(surface_h)), surface_h)
+    terrain_h = np.interp(xnew, np.linspace(0, distance_to_tower, len(profile)), profile.terrain.astype(float))
+    surface_h = np.interp(xnew, np.linspace(0, distance_to_tower, len(profile)), profile.surface.astype(float))
+
+    zone = (np.ones(len(d)) * ZONE_INLAND).astype(int)
+
+    return d, terrain_h, surface_h, zone
+
+
+def get_p1812_clutter(terrain_h, surface_h, clutter_type):
 
     # Representative clutter height
     R = np.where(surface_h - terrain_h > 1, CLUTTER_VALUES[clutter_type], 0)
@@ -27,38 +156,39 @@ def compute_p1812(tx, rx, surface_h, terrain_h, distance_to_tower, clutter_type=
     # Clutter type
     Ct = np.where(R == CLUTTER_VALUES[clutter_type], clutter_type, 2)
 
-    zone = (np.ones(len(d)) * ZONE_INLAND).astype(int)
-    
-    try:
-        p1812 = get_p1812_output(d, terrain_h, R, Ct, zone, tx, rx)
-    except ValueError:
-        p1812 = 0
-    
-    return p1812
+    return R, Ct
 
 
-def get_p1812_output(d, h, R, Ct, zone, tx, rx):
+def get_p1812_refractivity(d, tx, rx):
 
-    freq = float(tx.frequency/1000) # Frequency in GHz
     dpnt = 0.5 * (d[-1] - d[0])
     
     Phipnte, Phipntn, _, _ = great_circle_path(rx.lon, tx.lon, rx.lat, tx.lat, 6371, dpnt)
 
-    DN50PCR, N050PCR = InterpolateDN50andN050CTR(Phipntn,(Phipnte + 360))
+    return InterpolateDN50andN050CTR(Phipntn,(Phipnte + 360))
 
-    # flag4 should be set to 0. No need to set it here (done in tl_p1812).
-    Lb = tl_p1812SAFE(freq, TIME_PERCENTAGE_P1812, d, h, R, Ct, zone, tx.height, rx.height, 2, tx.lat, rx.lat, tx.lon, rx.lon, LOCATION_PERCENTAGE_P1812, 0, DN50PCR, N050PCR); # New format for P.1812-6.
 
-    return round(Lb, 6)
+def get_p1812_path(d, h, zone, tx, rx, frequency=None, refractivity=None):
 
+    freq = float((tx.frequency if frequency is None else frequency)/1000) # Frequency in GHz
 
-def get_SAFE_path_loss(tx, rx, p1812_path_loss_no_clutter, foliage_depth, avg_tree_h, theta):
+    # Path centre refractivity (DN50, N050), looked up when not given
+    DN50PCR, N050PCR = get_p1812_refractivity(d, tx, rx) if refractivity is None else refractivity
+
+    # flag4 should be set to 0. No need to set it here (done in tl_p1812).
+    return tl_p1812_path(freq, TIME_PERCENTAGE_P1812, d, h, zone, tx.height, rx.height, 2, tx.lat, rx.lat, tx.lon, rx.lon, LOCATION_PERCENTAGE_P1812, LOCATION_VARIABILITY_P1812, DN50PCR, N050PCR) # New format for P.1812-6.
+
+
+def get_SAFE_path_loss(tx, rx, p1812_path_loss_no_clutter, foliage_depth, avg_tree_h, theta, frequency=None):
     
+    # frequency: in MHz, the one of the Tx by default
+    frequency = tx.frequency if frequency is None else frequency
+
     # Ret model
-    tree_loss = ret_model_computation(foliage_depth, theta, tx.frequency, rx.beamwidth)[0][0] if foliage_depth > 0 else 0
+    tree_loss = ret_model_computation(foliage_depth, theta, frequency, rx.beamwidth)[0][0] if foliage_depth > 0 else 0
     
     # Top diffraction model
-    top_diffraction = topDiffraction(tx.frequency/1000, theta, avg_tree_h, foliage_depth, rx.height) if foliage_depth > 0 else 0
+    top_diffraction = topDiffraction(frequency/1000, theta, avg_tree_h, foliage_depth, rx.height) if foliage_depth > 0 else 0
     
     # Linear sum of the RET and Top Diffraction model
     ret_plus_top = -10 * np.log10(sum([pow(10, top_diffraction/10), pow(10, -tree_loss/10)]))
@@ -67,3 +197,38 @@ def get_SAFE_path_loss(tx, rx, p1812_path_loss_no_clutter, foliage_depth, avg_tr
     safe_path_loss = p1812_path_loss_no_clutter + min(tree_loss, RET_DB_LIMIT)
 
     return tree_loss, top_diffraction, ret_plus_top, safe_path_loss
+
+
+if __name__ == '__main__':
+
+    # Difference and timing of compute_p1812_radial against compute_p1812 for each Rx, on a synthetic 20 km radial
+    from time import perf_counter
+
+    from propagation.profile import PathProfile
+    from propagation.tower import Tx, Rx
+
+    length = 20000
+    rng = np.random.default_rng(0)
+    x = np.arange(length)
+    terrain = 80 + 25 * np.sin(x / 4000) + 0.1 * np.cumsum(rng.normal(0, 0.3, length))
+    for centre in rng.uniform(0.1, 0.9, 6) * length:
+        terrain += 30 * np.exp(-((x - centre) / 60) ** 2)
+    clutter = np.where((x // 150) % 3 == 0, 10, np.where((x // 700) % 5 == 0, 50, 30))
+    profile = PathProfile(terrain + np.where(clutter == 10, 15, np.where(clutter == 50, 8, 0)), terrain, clutter)
+
+    tx = Tx(45.4739, -75.9054, height=30, frequency=3500)
+    distances = np.arange(300, length, 100)
+    rx_list = [Rx(tx.lat + 0.2 * distance / length, tx.lon + 0.3 * distance / length, height=5) for distance in distances]
+    compute_p1812_radial(tx, rx_list[:3], distances[:3], profile)
+
+    for name, radial_profile, clutter_type in (("bare earth", profile.bare_earth(), 3), ("clutter", profile, 4)):
+        start = perf_counter()
+        expected = np.array([compute_p1812(tx, rx, radial_profile.prefix(distance), clutter_type) for rx, distance in zip(rx_list, distances)])
+        separate_time = perf_counter() - start
+
+        start = perf_counter()
+        difference = np.abs(compute_p1812_radial(tx, rx_list, distances, radial_profile, clutter_type) - expected)
+        radial_time = perf_counter() - start
+
+        print(f"{name:12s} {len(rx_list)} Rx   each {separate_time:6.3f} s   radial {radial_time:6.3f} s   x{separate_time/radial_time:.1f}   "
+              f"median {np.median(difference):.3f} dB   p99 {np.percentile(difference, 99):.2f} dB   over 1 dB {100*np.mean(difference > 1):.1f} %   max {difference.max():.1f} dB")
@@ -0,0 +1,34 @@
+import numpy as np
+
+class PathProfile:
+    # Surface, terrain and ESA land cover profile of a link, sampled from the Tx to the Rx
+    __slots__ = ('surface', 'terrain', 'clutter', 'nodata', 'spacing')
+
+    def __init__(self, surface, terrain, clutter, nodata=None, spacing=1):
+        self.surface = np.asarray(surface, dtype=np.float32)
+        self.terrain = np.asarray(terrain, dtype=np.float32)
+        self.clutter = np.asarray(clutter, dtype=np.uint8)
+
+        # Samples without HRDEM (extracted as 0), filled from the CDEM afterwards
+        self.nodata = self.terrain == 0 if nodata is None else np.asarray(nodata, dtype=bool)
+
+        self.spacing = spacing # meters between two samples
+
+    def __len__(self):
+        return len(self.terrain)
+
+    @property
+    def distance(self):
+        return len(self.terrain) * self.spacing
+
+    def bare_earth(self):
+        # Same profile with the surface on the terrain (no clutter)
+        return PathProfile(self.terrain, self.terrain, self.clutter, self.nodata, self.spacing)
+
+    def prefix(self, samples):
+        # Profile from the Tx to the given number of samples
+        return PathProfile(self.surface[:samples].copy(), self.terrain[:samples].copy(), self.clutter[:samples].copy(), self.nodata[:samples].copy(), self.spacing)
+
+    def reversed(self):
+        # Profile of the reversed link (from the Rx to the Tx)
+        return PathProfile(self.surface[::-1].copy(), self.terrain[::-1].copy(), self.clutter[::-1].copy(), self.nodata[::-1].copy(), self.spacing)
@@ -2,6 +2,8 @@ import numpy as np
 import math
 import warnings
 
+from propagation.kernels import eigenvalues, scattered_sum
+
 # Suppress warnings
 warnings.filterwarnings("ignore")
 
@@ -136,26 +138,10 @@ def ret_model_computation(Depth_fromPipeline, thetaP_fromPipeline, frequency, Rx
     Pn[N] = end_value
     
     # Evaluate the LHS of (12) for 60N values of s between 0 and +1, omitting 0, 0.5 and 1
-    s = np.zeros((300*N,1))
-    L12 = np.zeros((300*N,1))
     kMin = int((N+1)/2)
-    sk = np.zeros((kMin,1))
-    lk = np.zeros((kMin,1))
-    k = -1
-    
-    for j in range(0,300*N):
-        s[j] = (j+1-0.3)/(50*N)
-        
-        for n in range(N+1):
-            L12[j] = L12[j] + Pn[n]/(1-mu_n[n]/s[j])
-            
-        L12[j]=L12[j]*What/2
-        
-        if j > 0:
-            if L12[j] <= 1 and L12[j-1] >= 1:
-                k = k + 1
-                lk[k]=1
-                sk[k]=(s[j]*(L12[j-1]-1)+s[j-1]*(1-L12[j]))/(L12[j-1]-L12[j])
+    sk, lk, k = eigenvalues(Pn[:,0], mu_n[:,0], N, What, kMin)
+    sk = sk.reshape((kMin,1))
+    lk = lk.reshape((kMin,1))
     
     if k < kMin-1:
         print("Warning - the algorithm found less than ", kMin, " eigenvalues.")
@@ -223,12 +209,7 @@ def ret_model_computation(Depth_fromPipeline, thetaP_fromPipeline, frequency, Rx
         Lscat = np.exp(-(gammaPR/DeltagR)**2 - tau[oo]/muP) + ((DeltagR**2)/4)*( (np.exp(-tauHat[oo]/muP) - np.exp(-tau[oo]/muP))*qMbar + np.exp(-tau[oo]/muP)*mSum)
     
     
-        kSum = 0
-        for k in range(kMin):
-            nSum = 0
-            for n in range(N+1):
-                nSum = nSum + Fn(n,muR,mu_n,N)/(1-(mu_n[n]/sk[k]))
-            kSum = kSum + A[k]*np.exp(-tauHat[oo]/sk[k])*nSum
+        kSum = scattered_sum(A[:,0], tauHat[oo], sk[:,0], muR, mu_n[:,0], N)
         
         if(kSum<0):
             kSum = 0
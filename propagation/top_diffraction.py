@@ -2,6 +2,8 @@ import numpy as np
 import math
 import warnings
 
+from propagation.kernels import boersma_recurrence
+
 # Suppress warnings
 warnings.filterwarnings("ignore")
 
@@ -65,13 +67,7 @@ def topDiffraction(freq,theta,hTrees,depthofforest,hRx):
         IBnqof1Array[rr,1-1] = IBnqof1(rr+1,0)
         IBnqof1Array[rr,2-1] = IBnqof1(rr+1,1)   
 
-    coeff11 = 1/(2*np.sqrt(np.pi))
-    for cc in range(3,rmaxgfzero+1):  
-        for rr in range(Nedges):     
-            sum1 = KroneckerDeltaJN(cc-1,0)/np.sqrt(rr+1)
-            for mmm in range(rr-1+1):
-                sum1 = sum1 + IBnqof1Array[mmm,cc-1-1] / np.sqrt(rr+1-(mmm+1)) 
-            IBnqof1Array[rr,cc-1] = 0.5*(rr+1)*(cc-2)*IBnqof1Array[rr,cc-2-1] + coeff11*sum1
+    IBnqof1Array = boersma_recurrence(IBnqof1Array, Nedges, rmaxgfzero)
   
     Coeff4 = 2*np.sqrt(complex(0,-np.pi)) # confirmed with matlab
     Coeff1 = np.exp(complex(0,np.pi*Nedges*gp*gp)) # confirmed with matlab
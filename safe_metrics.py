@@ -2,67 +2,152 @@ from os.path import join, dirname, realpath
 from os import makedirs
 
 from hrdem.elevation import return_elevation_profile, return_land_cover_profile
+from hrdem.profile_cache import load_profile, save_profile
 from hrdem.cdem import replace_terrain_if_no_hrdem
 from plot import plot_tx_to_rx_path
 from propagation.path import get_path_length_below_terrain, clutter_path_feature_count, get_clutter_features
-from propagation.pathloss  import get_SAFE_path_loss, compute_p1812
-from propagation.tower import get_distance_to_tower
+from propagation.config import P1812_RADIAL
+from propagation.pathloss  import get_SAFE_path_loss, P1812Link, compute_p1812_radial
+from propagation.profile import PathProfile
+from propagation.tower import get_distance_to_tower, Rx
 
-def compute_safe_metrics(index, tx, rx):
-	
-	# Get distance path between tx and rx
-	print("Extracting 2D elevation profile")
-	distance_to_tower = get_distance_to_tower((rx.lat, rx.lon), (tx.lat, tx.lon))
-	if distance_to_tower < 1: return None # If distance is less than 1 meter, return None
-	
- 	# Get path profile from HRDEM dataset
-	surface_height, terrain_height = return_elevation_profile((rx.lat, rx.lon), (tx.lat, tx.lon), distance_to_tower)
+def compute_safe_metrics(index, tx, rx, profile=None, p1812_losses=None):
+	# profile: optional PathProfile already extracted from the Tx to the Rx (e.g. a prefix of a radial)
+	# p1812_losses: optional P.1812 losses (dB) of the link without and with clutter, already computed
 
-	# Get land cover profile from ESA dataset
-	clutter_path = return_land_cover_profile((rx.lat, rx.lon), (tx.lat, tx.lon), distance_to_tower)
-	
-	# Replace terrain if HRDEM is not available
-	hrdem_available, surface_height, terrain_height = replace_terrain_if_no_hrdem(tx, rx, surface_height, terrain_height)
+	metrics = compute_safe_metrics_sweep(index, tx, rx, [tx.frequency], profile, p1812_losses)
+	return metrics[0] if metrics else None
+
+
+def compute_safe_metrics_sweep(index, tx, rx, frequencies, profile=None, p1812_losses=None):
+	# Same as compute_safe_metrics for every frequency (MHz) of frequencies, one row each: the profile, the
+	# clutter features and the resampled P.1812 profile of the link are extracted once and shared by all of them
+	# (p1812_losses: the P.1812 losses at the first frequency, when already computed)
+
+	read_stats = {'bytes_read': 0}
+	if profile is None:
+
+		# Get distance path between tx and rx
+		print("Extracting 2D elevation profile")
+		distance_to_tower = get_distance_to_tower((rx.lat, rx.lon), (tx.lat, tx.lon))
+		if distance_to_tower < 1: return None # If distance is less than 1 meter, return None
+
+		# Profile already extracted for this link (or the reversed one) skips the data access entirely
+		profile = load_profile((tx.lat, tx.lon), (rx.lat, rx.lon))
+		if profile is not None:
+			hrdem_available = not profile.nodata.any()
+			distance_to_tower = len(profile)
+
+		else:
+			# Get path profile from HRDEM dataset
+			surface_height, terrain_height = return_elevation_profile((rx.lat, rx.lon), (tx.lat, tx.lon), distance_to_tower, read_stats)
+
+			# Get land cover profile from ESA dataset
+			clutter_path = return_land_cover_profile((rx.lat, rx.lon), (tx.lat, tx.lon), distance_to_tower)
+			profile = PathProfile(surface_height, terrain_height, clutter_path)
+
+			# Replace terrain if HRDEM is not available (a profile left with gaps is not cached, so they are filled next time)
+			hrdem_available, filled = replace_terrain_if_no_hrdem(tx, rx, profile)
+			if filled:
+				save_profile((tx.lat, tx.lon), (rx.lat, rx.lon), profile)
+
+	else:
+		distance_to_tower = len(profile)
+		if distance_to_tower < 1: return None
+
+		# Replace terrain if HRDEM is not available
+		hrdem_available, _ = replace_terrain_if_no_hrdem(tx, rx, profile)
 		
 	# Extract clutter features
 	print("Extracting features & metrics")
-	clutter_path_by_type = clutter_path_feature_count(clutter_path)
+	clutter_path_by_type = clutter_path_feature_count(profile.clutter)
 	clutter_depth_by_type, total_clutter_depth, avg_clutter_h_by_type, avg_clutter_h_in_path, first_intersection_point_m, last_intersection_point_m, theta = \
-	 get_clutter_features(tx, rx, surface_height, terrain_height, clutter_path)
+	 get_clutter_features(tx, rx, profile)
 
 	# Get path length below terrain (m)
-	total_terrain_depth = get_path_length_below_terrain(terrain_height, tx.height, rx.height)
- 
-	# Compute p1812 with and without clutter (dB)
-	p1812_no_clutter = compute_p1812(tx, rx, terrain_height, terrain_height, distance_to_tower)
-	p1812_path_loss = compute_p1812(tx, rx, surface_height, terrain_height, distance_to_tower, clutter_type=4) if hrdem_available else p1812_no_clutter
-
-	# compute other loss and total path loss
-	tree_loss, top_diffraction, ret_plus_top, safe_path_loss = \
-	 get_SAFE_path_loss(tx, rx, p1812_no_clutter, total_clutter_depth, avg_clutter_h_in_path, theta) if hrdem_available else (0, 0, 0, p1812_no_clutter)
+	total_terrain_depth = get_path_length_below_terrain(profile, tx.height, rx.height)
+
+	# Resampled P.1812 profile and path centre refractivity of the link, shared by all the frequencies
+	p1812_link = P1812Link(tx, rx, profile, frequencies[0]) if p1812_losses is None or len(frequencies) > 1 else None
+
+	metrics = []
+	for i, frequency in enumerate(frequencies):
+
+		# Compute p1812 with and without clutter (dB)
+		# (the clutter-independent P.1812 terms of the link are computed once for both)
+		if i == 0 and p1812_losses is not None:
+			p1812_no_clutter = p1812_losses[0]
+			p1812_path_loss = p1812_losses[1] if hrdem_available else p1812_no_clutter
+		else:
+			link = p1812_link if i == 0 else p1812_link.at_frequency(frequency)
+			p1812_no_clutter = link.path_loss(bare_earth=True)
+			p1812_path_loss = link.path_loss(clutter_type=4) if hrdem_available else p1812_no_clutter
+
+		# compute other loss and total path loss
+		tree_loss, top_diffraction, ret_plus_top, safe_path_loss = \
+		 get_SAFE_path_loss(tx, rx, p1812_no_clutter, total_clutter_depth, avg_clutter_h_in_path, theta, frequency) if hrdem_available else (0, 0, 0, p1812_no_clutter)
+
+		metrics.append({
+			"index": index,
+			"frequency": frequency,
+			"hrdem_available": hrdem_available,
+			"link_distance": distance_to_tower,
+			"hrdem_bytes_read": read_stats['bytes_read'],
+			"tree_loss_ret": round(tree_loss, 2) if tree_loss > 0 else 0,
+			"top_diffraction_loss": round(top_diffraction, 2),
+			"ret_plus_top": round(ret_plus_top, 2),
+			"total_terrain_depth": round(total_terrain_depth, 2),
+			'clutter_path_by_type': clutter_path_by_type,
+			"clutter_depth_by_type": clutter_depth_by_type,
+			"total_clutter_depth": total_clutter_depth,
+			"avg_clutter_h_by_type": avg_clutter_h_by_type,
+			"avg_clutter_h_in_path": avg_clutter_h_in_path,
+			"first_intersection_point_m": first_intersection_point_m,
+			"last_intersection_point_m": last_intersection_point_m,
+			"p1812_path_loss_no_clutter": round(p1812_no_clutter, 2),
+			"p1812_path_loss": round(p1812_path_loss, 2),
+			"safe_path_loss": round(safe_path_loss, 2)
+		})
 	
 	# Plot and save path profile
 	print("Plotting path profile\n")
 	save_folder = join(dirname(realpath(__file__)), "data")
 	makedirs(save_folder, exist_ok=True)
-	plot_tx_to_rx_path(surface_height, terrain_height, clutter_path, tx.height, rx.height, save_folder, index)
+	plot_tx_to_rx_path(profile, tx.height, rx.height, save_folder, index)
 	
-	return {
-		"index": index,
-		"hrdem_available": hrdem_available,
-		"link_distance": distance_to_tower,
-		"tree_loss_ret": round(tree_loss, 2) if tree_loss > 0 else 0,
-		"top_diffraction_loss": round(top_diffraction, 2),
-		"ret_plus_top": round(ret_plus_top, 2),
-		"total_terrain_depth": round(total_terrain_depth, 2),
-		'clutter_path_by_type': clutter_path_by_type,
-		"clutter_depth_by_type": clutter_depth_by_type,
-		"total_clutter_depth": total_clutter_depth,
-		"avg_clutter_h_by_type": avg_clutter_h_by_type,
-		"avg_clutter_h_in_path": avg_clutter_h_in_path,
-		"first_intersection_point_m": first_intersection_point_m,
-		"last_intersection_point_m": last_intersection_point_m,
-		"p1812_path_loss_no_clutter": round(p1812_no_clutter, 2),
-		"p1812_path_loss": round(p1812_path_loss, 2),
-		"safe_path_loss": round(safe_path_loss, 2)
-	}
+	return metrics
+
+
+def compute_area_safe_metrics(tx, rx_list):
+
+	from hrdem.area import AreaOfInterest
+
+	# Read the rasters under all the links of the Tx once, then extract every link from the local copies
+	print(f"Extracting area of interest for {len(rx_list)} links")
+	with AreaOfInterest(tx, rx_list):
+		return [compute_safe_metrics(index, tx, rx) for index, rx in enumerate(rx_list)]
+
+
+def compute_radial_safe_metrics(tx, radius, distances, rx_height, n_radials=360):
+
+	from hrdem.radials import extract_radials
+
+	# Extract the radials out of the Tx once, then compute every Rx at the given distances (m) from a prefix of its radial
+	print(f"Extracting {n_radials} radials of {radius} m")
+	radials = extract_radials(tx, radius, n_radials)
+
+	metrics = []
+	for radial in range(n_radials):
+		rx_list = [Rx(*radials.rx_position(radial, distance), height=rx_height) for distance in distances]
+		p1812_losses = [None] * len(distances)
+
+		if P1812_RADIAL:
+			# P.1812 losses of all the Rx of the radial at once (approximate), on the radial filled from the CDEM
+			profile = radials.profile(radial, max(distances))
+			replace_terrain_if_no_hrdem(tx, Rx(*radials.rx_position(radial, max(distances)), height=rx_height), profile)
+			p1812_losses = list(zip(compute_p1812_radial(tx, rx_list, distances, profile.bare_earth()), compute_p1812_radial(tx, rx_list, distances, profile, 4)))
+
+		for rx, distance, losses in zip(rx_list, distances, p1812_losses):
+			metrics.append(compute_safe_metrics(len(metrics), tx, rx, radials.profile(radial, distance), losses))
+
+	return metrics
@@ -0,0 +1,74 @@
+import sys
+
+import numpy as np
+import pytest
+
+from os.path import dirname, realpath
+
+# The packages of the tool are imported from the repository root
+sys.path.insert(0, dirname(dirname(realpath(__file__))))
+
+
+@pytest.fixture
+def write_geotiff():
+    # Writes a small tiled GeoTIFF standing in for a remote HRDEM tile (1m pixels in EPSG:3857 by default)
+    import rasterio as rio
+    from rasterio.transform import from_origin
+
+    def write(path, array, block=16, crs="EPSG:3857", origin=(-8348961.0, 5621521.0)):
+        profile = {
+            'driver': 'GTiff', 'count': 1, 'dtype': array.dtype, 'crs': crs, 'transform': from_origin(*origin, 1, 1),
+            'width': array.shape[1], 'height': array.shape[0], 'tiled': True, 'blockxsize': block, 'blockysize': block
+        }
+        with rio.open(path, 'w', **profile) as dst:
+            dst.write(array, 1)
+        return str(path)
+
+    return write
+
+
+@pytest.fixture
+def heights():
+    return np.random.default_rng(0).uniform(50, 150, (64, 80)).astype(np.float32)
+
+
+@pytest.fixture
+def synthetic_profile():
+    # 1m spaced link profile over rolling terrain with a few ridges and blocks of trees (ESA class 10) and buildings (50)
+    from propagation.profile import PathProfile
+
+    def profile(length, seed=0):
+        rng = np.random.default_rng(seed)
+        x = np.arange(length)
+        terrain = 80 + 25 * np.sin(x / 4000 * (1 + seed % 3)) + 0.1 * np.cumsum(rng.normal(0, 0.3, length))
+        for centre in rng.uniform(0.1, 0.9, 6) * length:
+            terrain += 30 * np.exp(-((x - centre) / 60) ** 2)
+        clutter = np.where((x // (150 + 10 * seed)) % 3 == 0, 10, np.where((x // 700) % 5 == 0, 50, 30))
+        surface = terrain + np.where(clutter == 10, 15, np.where(clutter == 50, 8, 0))
+        return PathProfile(surface, terrain, clutter)
+
+    return profile
+
+
+@pytest.fixture
+def local_tiles(tmp_path, monkeypatch, write_geotiff, heights):
+    # One HRDEM project p1 of 64 x 80 1m pixels (EPSG:3857) near (45.0, -75.0) listed by every footprint query, no WorldCover tile
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    from hrdem import area, config, dataset_pool, hrdem_esa, window_cache
+    from hrdem.window_cache import WindowCache
+
+    write_geotiff(tmp_path / "p1-dsm.tif", heights + 10)
+    write_geotiff(tmp_path / "p1-dtm.tif", heights)
+    monkeypatch.setattr(config, "HRDEM_DSM_PATH", str(tmp_path / "{project_id}-dsm.tif"))
+    monkeypatch.setattr(config, "HRDEM_DTM_PATH", str(tmp_path / "{project_id}-dtm.tif"))
+    monkeypatch.setattr(config, "ESA_TILE_PATH", str(tmp_path / "{tile}.tif"))
+    monkeypatch.setattr(window_cache, "_window_cache", WindowCache(str(tmp_path / "cache"), 10 ** 9))
+    monkeypatch.setattr(dataset_pool, "_dataset_pool", None)
+
+    footprints = gpd.GeoDataFrame({'project_name': ["p1"], 'date': ["2020-01-01"], 'geometry': [box(-75.0, 44.9995, -74.999, 45.0)]}, crs="EPSG:4326")
+    monkeypatch.setattr(area, "get_hrdem_footprints", lambda geometry: footprints)
+    monkeypatch.setattr(hrdem_esa, "get_hrdem_footprints", lambda geometry: footprints)
+    monkeypatch.setattr(hrdem_esa, "load_footprint_index", lambda: None, raising=False)
+    return tmp_path
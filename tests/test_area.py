@@ -0,0 +1,31 @@
+import numpy as np
+
+from hrdem import dataset_pool
+from hrdem.area import AreaOfInterest
+from hrdem.elevation import return_elevation_profile, return_land_cover_profile
+from propagation.tower import Tx, Rx
+
+def extract(tx, rx_list):
+    return [(*return_elevation_profile((rx.lat, rx.lon), (tx.lat, tx.lon), 60), return_land_cover_profile((rx.lat, rx.lon), (tx.lat, tx.lon), 60))
+            for rx in rx_list]
+
+
+def test_links_read_the_area_copies(local_tiles):
+    tx = Tx(44.99995, -74.99995, height=30, frequency=3500)
+    rx_list = [Rx(44.99965, -74.9995 + 0.00005 * k, height=5) for k in range(4)]
+    expected = extract(tx, rx_list)
+    stats = dataset_pool.get_dataset_pool().stats()
+    opens = stats['opens'] + stats['saved_opens']
+
+    with AreaOfInterest(tx, rx_list) as aoi:
+        profiles = extract(tx, rx_list)
+
+    # The tiles are only opened to copy the area (from the blocks already cached), and the missing WorldCover tile
+    # is not requested again
+    stats = dataset_pool.get_dataset_pool().stats()
+    assert stats['opens'] + stats['saved_opens'] - opens == 2
+    assert aoi.read_stats['bytes_read'] == 0
+    for result, reference in zip(profiles, expected):
+        assert (reference[0] > 0).all()
+        for values, reference_values in zip(result, reference):
+            np.testing.assert_array_equal(values, reference_values)
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+import requests
+
+from hrdem import cdem
+from propagation.profile import PathProfile
+from propagation.tower import Tx, Rx
+
+def fill(monkeypatch, terrain, groups, samples):
+    # Gaps filled from the given profile samples instead of the CDEM service
+    requests = []
+    def get_elevation_profile(pointA, pointB, steps, surface='cdem'):
+        requests.append(steps)
+        return samples
+    monkeypatch.setattr(cdem, "get_elevation_profile", get_elevation_profile)
+    filled, complete = cdem.replace_elevation_profile(terrain, groups, 45, (45.4, -75.7))
+    assert complete == (len(samples) > 0)
+    return filled, requests
+
+
+def test_gap_ends_map_onto_the_first_and_last_samples(monkeypatch):
+    terrain = np.full(300, 5.0)
+    terrain[100:191] = 0
+
+    # 90 m gap, 3 steps of 30 m: samples at 100, 130, 160 and 190 m
+    filled, requests = fill(monkeypatch, terrain, [list(range(100, 191))], [10, 20, 30, 40])
+
+    assert requests == [3]
+    np.testing.assert_allclose(filled[[100, 115, 130, 160, 190]], [10, 15, 20, 30, 40])
+    np.testing.assert_allclose(filled[100:191], np.interp(np.arange(100, 191), [100, 130, 160, 190], [10, 20, 30, 40]))
+    assert filled[99] == 5 and filled[191] == 5
+
+
+def test_merged_gaps_share_one_request(monkeypatch):
+    terrain = np.full(300, 5.0)
+    terrain[100:131] = 0
+    terrain[160:191] = 0
+    spans = cdem.merge_groups(cdem.clustering_algorithm(list(np.where(terrain == 0)[0])))
+    assert len(spans) == 1
+
+    filled, requests = fill(monkeypatch, terrain, spans[0], [10, 20, 30, 40])
+
+    # The points between the gaps keep their heights
+    assert requests == [3]
+    np.testing.assert_allclose(filled[[100, 130, 145, 160, 190]], [10, 20, 5, 30, 40])
+
+
+def test_raster_backend_samples_the_profile_points(tmp_path, monkeypatch):
+    import rasterio as rio
+    from rasterio.transform import from_origin
+
+    # 0.001 degree CDEM grid whose heights encode the row and column, with a hole of no data
+    heights = (1000 * np.arange(100)[:, None] + np.arange(100)[None, :]).astype(np.float32)
+    heights[50:60, :] = -32767
+    path = tmp_path / "cdem.tif"
+    with rio.open(path, 'w', driver='GTiff', count=1, dtype='float32', crs="EPSG:4269", width=100, height=100,
+                  transform=from_origin(-75.8, 45.5, 0.001, 0.001), nodata=-32767) as dst:
+        dst.write(heights, 1)
+    monkeypatch.setattr(cdem, "CDEM_RASTER_PATH", str(path))
+    monkeypatch.setattr(cdem, "CDEM_BACKEND", 'raster')
+
+    # North to south along a column, ending outside the raster
+    terrain_ld = cdem.get_elevation_profile((45.4995, -75.7805), (45.3905, -75.7805), 109)
+
+    assert len(terrain_ld) == 110
+    np.testing.assert_allclose(terrain_ld[:50], 1000 * np.arange(50) + 19)
+    np.testing.assert_allclose(terrain_ld[50:60], 0)
+    np.testing.assert_allclose(terrain_ld[60:100], 1000 * np.arange(60, 100) + 19)
+    np.testing.assert_allclose(terrain_ld[100:], 0)
+
+
+def test_failed_requests_leave_the_gaps_unfilled(monkeypatch, capsys):
+    class Response:
+        status_code = 503
+
+    class Session:
+        def get(self, url, timeout):
+            return Response()
+
+    monkeypatch.setattr(cdem, "CDEM_CACHE_ENABLED", False)
+    monkeypatch.setattr(cdem, "get_session", lambda: Session())
+
+    terrain = np.full(300, 5.0, dtype=np.float32)
+    terrain[100:191] = 0
+    profile = PathProfile(terrain + 10, terrain, np.zeros(300))
+
+    hrdem_available, filled = cdem.replace_terrain_if_no_hrdem(Tx(45.4, -75.7, height=30, frequency=3500), Rx(45.402, -75.698, height=5), profile)
+
+    assert not hrdem_available and not filled
+    assert (profile.terrain[100:191] == 0).all()
+    assert "503" in capsys.readouterr().out
+
+
+def test_connection_errors_are_raised(monkeypatch):
+    class Session:
+        def get(self, url, timeout):
+            raise requests.ConnectionError("geogratis.gc.ca unreachable")
+
+    monkeypatch.setattr(cdem, "CDEM_CACHE_ENABLED", False)
+    monkeypatch.setattr(cdem, "get_session", lambda: Session())
+
+    with pytest.raises(requests.ConnectionError):
+        cdem.request_elevation_profile((45.4, -75.7), (45.41, -75.69), 10)
@@ -0,0 +1,43 @@
+import numpy as np
+
+from hrdem import dataset_pool
+from hrdem.dataset_pool import DatasetPool, PooledDataset
+
+def test_handles_are_reused_and_evicted(tmp_path, write_geotiff, heights):
+    paths = [write_geotiff(tmp_path / f"t{k}.tif", heights) for k in range(3)]
+    pool = DatasetPool(max_size=2, max_idle=300)
+
+    for _ in range(3):
+        with PooledDataset(pool, paths[0], pool.acquire(paths[0])) as tif:
+            np.testing.assert_array_equal(tif.read(1), heights)
+    assert pool.stats() == {"opens": 1, "saved_opens": 2, "idle_handles": 1}
+
+    # A handle in use is not handed out twice
+    first, second = pool.acquire(paths[0]), pool.acquire(paths[0])
+    assert first is not second and pool.stats()["opens"] == 2
+    pool.release(paths[0], first)
+    pool.release(paths[0], second)
+
+    # Above the pool size, the least recently used handles are closed
+    pool.release(paths[1], pool.acquire(paths[1]))
+    assert pool.stats()["idle_handles"] == 2
+    assert first.closed and not second.closed
+
+    pool.release(paths[2], pool.acquire(paths[2]))
+    assert second.closed
+
+    pool.close()
+    assert pool.stats()["idle_handles"] == 0
+
+
+def test_idle_handles_are_closed(tmp_path, monkeypatch, write_geotiff, heights):
+    path = write_geotiff(tmp_path / "t.tif", heights)
+    pool = DatasetPool(max_size=2, max_idle=300)
+    now = [1000.0]
+    monkeypatch.setattr(dataset_pool, "monotonic", lambda: now[0])
+
+    dataset = pool.acquire(path)
+    pool.release(path, dataset)
+    now[0] += 301
+
+    assert pool.acquire(path) is not dataset and dataset.closed
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from propagation.p1812.dl_delta_bull import dl_delta_bull
+from propagation.p1812.dl_p import dl_p
+from propagation.p1812.earth_rad_eff import earth_rad_eff
+from propagation.p1812.inv_cum_norm import inv_cum_norm
+
+@pytest.mark.parametrize("p", [50, 20, 1])
+def test_both_earth_radii_share_the_terrain_analysis(p):
+    rng = np.random.default_rng(p)
+    d = np.linspace(0, 15, 501)
+    g = 90 + rng.normal(0, 1, 501).cumsum() + np.where(rng.random(501) < 0.3, 10, 0)
+    hts, hrs, hstd, hsrd, f, DN, b0 = g[0] + 30, g[-1] + 5, 100, 95, 3.5, 45, 3
+
+    Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50 = dl_p(d, g, hts, hrs, hstd, hsrd, f, 0, p, b0, DN, 0)
+
+    # Each radius on its own, with its own terrain analysis
+    ae, ab = earth_rad_eff(DN)
+    median = dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ae, f, 0, 0)
+    for result, expected in zip((Ld50, Lbulla50, Lbulls50, Ldsph50), median):
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+    if p == 50:
+        assert Ldb is None
+        np.testing.assert_allclose(Ldp, median[0], rtol=1e-12)
+    else:
+        np.testing.assert_allclose(Ldb, dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ab, f, 0, 0)[0], rtol=1e-12)
+        Fi = inv_cum_norm(p / 100) / inv_cum_norm(b0 / 100) if p > b0 else 1
+        np.testing.assert_allclose(Ldp, median[0] + Fi * (Ldb - median[0]), rtol=1e-12)
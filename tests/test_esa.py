@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from rasterio.errors import RasterioIOError
+
+from hrdem import config, elevation
+from hrdem.hrdem_esa import esa_tile_id, get_esa_along_path
+
+@pytest.mark.parametrize("lat, lon, tile", [
+    (45.47, -75.9, "N45W078"), (44.99, -75.01, "N42W078"), (48.0, -78.0, "N48W078"),
+    (0.5, 0.5, "N00E000"), (-0.5, -0.5, "S03W003"), (-33.9, 151.2, "S36E150"),
+])
+def test_esa_tile_id(lat, lon, tile):
+    assert esa_tile_id(lat, lon) == tile
+
+
+def test_esa_tiles_along_path_are_ordered_from_the_tower():
+    assert get_esa_along_path((45.5, -75.9), (45.2, -75.5)) == ["N45W078"]
+    assert get_esa_along_path((44.9, -75.9), (45.1, -75.9)) == ["N45W078", "N42W078"]
+
+    # A path through the corner of four tiles only crosses two of them, another one crosses the latitude boundary first
+    assert get_esa_along_path((44.5, -78.5), (45.5, -77.5)) == ["N45W078", "N42W081"]
+    assert get_esa_along_path((44.5, -77.9), (45.5, -78.3)) == ["N45W081", "N42W081", "N42W078"]
+
+
+def test_missing_tile_is_skipped(tmp_path, monkeypatch, capsys):
+    # Part of tile N45W078 is on disk, N42W078 (open water) is missing
+    import rasterio as rio
+    from rasterio.transform import from_origin
+
+    with rio.open(tmp_path / "N45W078.tif", 'w', driver='GTiff', count=1, dtype='uint8', crs="EPSG:4326", width=200, height=100,
+                  transform=from_origin(-76.0, 45.1, 0.001, 0.001)) as dst:
+        dst.write(np.full((100, 200), 10, dtype=np.uint8), 1)
+    monkeypatch.setattr(config, "ESA_TILE_PATH", str(tmp_path / "{tile}.tif"))
+
+    profile = elevation.return_land_cover_profile((44.99, -75.9), (45.01, -75.9), 2000)
+
+    assert (profile[:900] == 10).all() and (profile[1100:] == 0).all()
+    assert "N42W078" in capsys.readouterr().out
+
+
+def test_other_tile_errors_are_raised(monkeypatch):
+    def unreachable(path):
+        raise RasterioIOError("CURL error: Could not resolve host: esa-worldcover.s3.amazonaws.com")
+    monkeypatch.setattr(elevation, "open_dataset", unreachable)
+
+    with pytest.raises(RasterioIOError):
+        elevation.return_land_cover_profile((45.5, -75.9), (45.2, -75.5), 100)
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from threading import Lock
+
+from hrdem import config, elevation
+
+@pytest.fixture
+def overlapping_tiles(monkeypatch):
+    # Six HRDEM projects along a 100m path, each covering 40m with its own heights, read with random delays
+    projects = pd.DataFrame({'project_name': [f"p{k}" for k in range(6)], 'intersection_line': [f"segment{k}" for k in range(6)]})
+    monkeypatch.setattr(elevation, "get_hrdem_along_path", lambda lat_lon, tower_latlon: projects)
+
+    rng = np.random.default_rng(0)
+    delays = {(project_id, band): rng.uniform(0, 0.01) for project_id in projects.project_name for band in ('dsm', 'dtm')}
+    running = {'now': 0, 'max': 0}
+    lock = Lock()
+
+    def read_band(project_id, band, projected_path):
+        with lock:
+            running['now'] += 1
+            running['max'] = max(running['max'], running['now'])
+        time.sleep(delays[(project_id, band)])
+        with lock:
+            running['now'] -= 1
+
+        k = int(project_id[1:])
+        indices = np.arange(15 * k, min(15 * k + 40, 100))
+        return indices, np.full(len(indices), 100.0 * (k + 1) + (band == 'dsm')), {'bytes_read': len(indices)}
+
+    monkeypatch.setattr(elevation, "read_hrdem_band", read_band)
+    return running
+
+
+def test_merge_does_not_depend_on_the_fetch_workers(monkeypatch, overlapping_tiles):
+    profiles = []
+    for workers in (1, 2, 4):
+        monkeypatch.setattr(config, "HRDEM_FETCH_WORKERS", workers)
+        overlapping_tiles['max'] = 0
+        profiles.append(elevation.return_elevation_profile((45.0, -75.0), (45.001, -75.0), 100))
+
+        # The setting is read at every call
+        assert overlapping_tiles['max'] <= workers
+
+    for surface, terrain in profiles[1:]:
+        np.testing.assert_array_equal(surface, profiles[0][0])
+        np.testing.assert_array_equal(terrain, profiles[0][1])
+
+    # The first project covering a point gives its heights
+    first = np.array([min(k for k in range(6) if 15 * k <= i < 15 * k + 40) for i in range(100)])
+    np.testing.assert_array_equal(profiles[0][0], 100 * (first + 1) + 1)
+    np.testing.assert_array_equal(profiles[0][1], 100 * (first + 1))
@@ -0,0 +1,37 @@
+import json
+
+from shapely.geometry import LineString
+
+from hrdem import footprint_index
+from hrdem.footprint_index import build_footprint_index, load_footprint_index, query_footprint_index
+from hrdem.hrdem_esa import get_hrdem_along_path
+
+def item(project_name, date, west, south, east, north):
+    return {'id': project_name, 'properties': {'datetime': date},
+            'geometry': {'type': 'Polygon', 'coordinates': [[[west, south], [east, south], [east, north], [west, north], [west, south]]]}}
+
+
+def test_index_round_trip_keeps_the_priority_order(tmp_path, monkeypatch):
+    # STAC export of four projects: two 1m ones (the newest first), a 2m one under both and one away from the path
+    catalog = tmp_path / "catalog.json"
+    catalog.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        item("ON_Old-2m", "2021-05-01T00:00:00Z", -76.0, 45.0, -75.0, 46.0),
+        item("ON_West-1m", "2016-05-01T00:00:00Z", -76.0, 45.0, -75.5, 46.0),
+        item("ON_East-1m", "2019-05-01T00:00:00Z", -75.6, 45.0, -75.0, 46.0),
+        item("QC_Away-1m", "2020-05-01T00:00:00Z", -72.0, 46.0, -71.0, 47.0),
+    ]}))
+    index_path = str(tmp_path / "footprints.gpkg")
+    build_footprint_index(str(catalog), index_path)
+
+    monkeypatch.setattr(footprint_index, "_footprints", None)
+    footprints = load_footprint_index(index_path)
+    assert list(footprints.project_name) == ["QC_Away-1m", "ON_East-1m", "ON_West-1m", "ON_Old-2m"]
+
+    line = LineString([(-75.8, 45.5), (-75.2, 45.5)])
+    intersections = query_footprint_index(footprints, line)
+    assert list(intersections.project_name) == ["ON_East-1m", "ON_West-1m", "ON_Old-2m"]
+    assert abs(intersections.intersection_line[0].length - 0.4) < 1e-9
+
+    # The loaded index is used without any STAC search
+    assert list(get_hrdem_along_path((45.5, -75.2), (45.5, -75.8)).project_name) == list(intersections.project_name)
+    assert len(get_hrdem_along_path((40.0, -75.2), (40.0, -75.8))) == 0
@@ -0,0 +1,85 @@
+import importlib
+
+import numpy as np
+import pytest
+
+from propagation import config, kernels
+
+def kernel_cases():
+    # Arguments of every kernel, as in python -m propagation.kernels
+    N = 15
+    mu_n = -np.cos(np.arange(N+1)*np.pi/N)
+    Pn = np.sin(np.pi/N)*np.sin(np.arange(N+1)*np.pi/N)
+    Pn[0] = Pn[N] = np.sin(np.pi/(2*N))**2
+    What = ((1-0.92)*0.87)/(1-0.92*0.87)
+    sk = np.array([0.05, 0.2, 0.45, 0.7, 0.9])
+
+    IB = np.zeros((40, 196))
+    IB[:, 0] = np.random.default_rng(0).random(40)
+    IB[:, 1] = np.random.default_rng(1).random(40)
+
+    x = np.arange(2000.0)
+    low = 100 + 10*np.sin(x/150) + np.random.default_rng(2).normal(0, 0.3, 2000).cumsum()
+
+    return {
+        'fn': [(idxn, mu, mu_n, N) for idxn in (0, 7, N) for mu in (-1, -0.4, 0.3, 0.99)],
+        'eigenvalues': [(Pn, mu_n, N, What, 8)],
+        'scattered_sum': [(np.ones(5), 0.5, sk, 0.3, mu_n, N)],
+        'boersma_recurrence': [(IB, 40, 195)],
+        'se_ft_terms': [(np.array([0.8, 2.1]), np.array([1.5, 3.0]), np.array([2.5, 0.7]), np.array([0.01, 0.2]))],
+        'upper_envelope': [(low - 100, x / 100, np.arange(-1, 2000, 37), np.linspace(0, 2, 55)), (np.round(low), x, np.arange(2000)[::-1], np.zeros(2000))],
+    }
+
+
+def call(function, args):
+    # Kernels may write into their array arguments
+    result = function(*[a.copy() if isinstance(a, np.ndarray) else a for a in args])
+    return np.concatenate([np.ravel(r) for r in (result if isinstance(result, tuple) else (result,))]).astype(float)
+
+
+@pytest.fixture
+def python_kernels(monkeypatch):
+    # The kernels module as loaded with USE_NUMBA off (restored afterwards)
+    monkeypatch.setattr(config, "USE_NUMBA", False)
+    yield importlib.reload(kernels)
+    monkeypatch.undo()
+    importlib.reload(kernels)
+
+
+@pytest.mark.parametrize("name", list(kernel_cases()))
+def test_compiled_kernels_match_python(name):
+    if not kernels.NUMBA_ENABLED:
+        pytest.skip("Numba is not installed")
+
+    kernel = getattr(kernels, name)
+    for args in kernel_cases()[name]:
+        np.testing.assert_allclose(call(kernel, args), call(kernel.py_func, args), rtol=1e-12, atol=1e-12)
+
+
+def test_python_fallback(python_kernels):
+    assert not python_kernels.NUMBA_ENABLED
+
+    sk, lk, k = python_kernels.eigenvalues(*kernel_cases()['eigenvalues'][0])
+    assert k >= 0 and np.all(np.diff(sk[:k+1]) > 0) and np.all(lk[:k+1] == 1)
+
+    for name, cases in kernel_cases().items():
+        kernel = getattr(python_kernels, name)
+        assert not hasattr(kernel, 'py_func')
+        for args in cases:
+            assert np.all(np.isfinite(call(kernel, args)))
+
+
+def test_python_fallback_matches_the_default_kernels(monkeypatch):
+    # Same results whether the kernels are compiled or not
+    cases = kernel_cases()
+    expected = {name: [call(getattr(kernels, name), args) for args in cases[name]] for name in cases}
+
+    monkeypatch.setattr(config, "USE_NUMBA", False)
+    try:
+        python_kernels = importlib.reload(kernels)
+        for name in cases:
+            for args, value in zip(cases[name], expected[name]):
+                np.testing.assert_allclose(call(getattr(python_kernels, name), args), value, rtol=1e-12, atol=1e-12)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(kernels)
@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+import pytest
+
+from os.path import dirname, realpath
+
+# requests is loaded through geopy by propagation.tower
+LAZY_MODULES = ["geopandas", "pandas", "rasterio", "pystac_client", "shapely", "pyproj", "matplotlib"]
+
+@pytest.mark.parametrize("module", ["main", "safe_metrics", "propagation.pathloss", "hrdem.elevation", "hrdem.cdem", "plot"])
+def test_heavy_modules_are_loaded_on_first_use(module):
+    code = f"import sys; import {module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=dirname(dirname(realpath(__file__)))).stdout.strip()
+    assert loaded == ""
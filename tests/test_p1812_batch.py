@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from propagation.p1812.tl_p1812SAFE import tl_p1812SAFE
+from propagation.p1812.tl_p1812_batch import tl_p1812_batch
+from propagation.pathloss import compute_p1812, compute_p1812_batch
+from propagation.tower import Tx, Rx
+
+KEYS = ['f', 'p', 'd', 'h', 'R', 'Ct', 'zone', 'htg', 'hrg', 'pol', 'phi_t', 'phi_r', 'lam_t', 'lam_r', 'pL', 'sigmaL', 'DN', 'N0']
+
+def random_paths(count, seed, lengths=None):
+    # Paths of random lengths and model parameters: rough, smooth and flat terrain, partly over sea and coastal land,
+    # with clutter on part of the points, and a few paths too short for the model (2 points)
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        n = lengths[i] if lengths is not None else (2 if i % 11 == 5 else int(rng.integers(3, 1500)))
+        d = np.linspace(0, n * rng.uniform(0.005, 0.04), n)
+        h = 100 + 30 * np.sin(d * rng.uniform(0.1, 2)) + rng.normal(0, 3, n).cumsum() * (i % 4 != 0)
+        if i % 4 == 3:
+            h = 100 + rng.normal(0, 0.1, n)
+        R = np.where(rng.random(n) < 0.4, 15.0, 0.0)
+        R[0] = R[-1] = 0
+        zone = np.full(n, 4)
+        if i % 7 == 0:
+            zone[:n // 3] = 1
+            zone[n // 3:n // 2] = 3
+        paths.append(dict(f=rng.uniform(0.1, 5.9), p=rng.choice([50, 10, 1, 30]), d=d, h=h, R=R, Ct=np.where(R > 0, 4, 2), zone=zone,
+                          htg=rng.uniform(1, 100), hrg=rng.uniform(1, 20), pol=int(rng.choice([1, 2])), phi_t=45.4, phi_r=45.5 + rng.uniform(-0.3, 0.3),
+                          lam_t=-75.9, lam_r=-75.8 + rng.uniform(-0.3, 0.3), pL=rng.choice([50, 10, 90]), sigmaL=rng.choice([0, 5.5]),
+                          DN=rng.uniform(35, 60), N0=rng.uniform(300, 340)))
+    return paths
+
+
+def scalar_losses(paths):
+    # tl_p1812SAFE path by path, NaN where it cannot compute the path
+    losses = []
+    for path in paths:
+        try:
+            losses.append(tl_p1812SAFE(*[path[key].copy() if isinstance(path[key], np.ndarray) else path[key] for key in KEYS]))
+        except ValueError:
+            losses.append(np.nan)
+    return np.array(losses, dtype=float)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_ragged_batch_matches_scalar_engine(seed):
+    paths = random_paths(60, seed)
+    expected = scalar_losses(paths)
+    assert np.isnan(expected).any()
+
+    Lb = tl_p1812_batch(*[[path[key] for path in paths] for key in KEYS])
+
+    np.testing.assert_array_equal(np.isnan(Lb), np.isnan(expected))
+    np.testing.assert_allclose(Lb, expected, rtol=1e-10, atol=1e-9)
+
+
+def test_padded_batch_matches_scalar_engine():
+    # Paths of the same length given as 2-D arrays, one row per path
+    paths = random_paths(24, 3, lengths=[400] * 24)
+    expected = scalar_losses(paths)
+
+    Lb = tl_p1812_batch(*[np.array([path[key] for path in paths]) for key in KEYS])
+
+    np.testing.assert_allclose(Lb, expected, rtol=1e-10, atol=1e-9)
+
+
+@pytest.mark.parametrize("clutter_type", [3, 4])
+def test_compute_p1812_batch_matches_compute_p1812(synthetic_profile, clutter_type):
+    tx_list, rx_list, profiles = [], [], []
+    for i, length in enumerate([1, 120, 800, 4000, 15000, 32000]):
+        tx_list.append(Tx(45.4739, -75.9054, height=10 + 5 * i, frequency=[300, 1907, 3500, 5800, 700, 2400][i]))
+        rx_list.append(Rx(45.4739 + 0.000009 * length, -75.9054 + 0.000006 * length, height=5))
+        profiles.append(synthetic_profile(length, i))
+
+    expected = [compute_p1812(tx, rx, profile, clutter_type) for tx, rx, profile in zip(tx_list, rx_list, profiles)]
+
+    np.testing.assert_allclose(compute_p1812_batch(tx_list, rx_list, profiles, clutter_type), expected, rtol=0, atol=1e-6)
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from propagation.p1812.smooth_earth_heights import smooth_earth_heights
+from propagation.p1812.tl_p1812SAFE import tl_p1812SAFE, tl_p1812_path, tl_p1812_clutter, tl_p1812_percentages
+
+def random_path(seed):
+    # Inputs of tl_p1812SAFE for a random path (without p, R and Ct)
+    rng = np.random.default_rng(seed)
+    n = rng.integers(10, 600)
+    d = np.linspace(0, rng.uniform(0.3, 60), n)
+    h = np.maximum(80 + rng.normal(0, 1, n).cumsum() * rng.uniform(0.5, 8), 1)
+    zone = np.where(rng.random(n) < 0.1, 3, 4)
+    return dict(f=rng.uniform(0.1, 6), d=d, h=h, zone=zone, htg=rng.uniform(10, 60), hrg=rng.uniform(1.5, 10), pol=int(rng.integers(1, 3)),
+                phi_t=45.4, phi_r=45.4 + rng.uniform(-0.3, 0.3), lam_t=-75.9, lam_r=-75.9 + rng.uniform(-0.3, 0.3), pL=50,
+                sigmaL=rng.uniform(0, 8), DN=rng.uniform(35, 60), N0=rng.uniform(300, 340))
+
+
+def clutter_variants(n, seed):
+    # Bare earth and two representative clutters
+    rng = np.random.default_rng(seed)
+    return [np.zeros(n), np.where(rng.random(n) < 0.4, 10.0, 0.0), np.where(rng.random(n) < 0.6, 15.0, 0.0)]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_clutter_variants_share_the_path(seed):
+    inputs = random_path(seed)
+    n = len(inputs['d'])
+    Ct = np.full(n, 2)
+
+    for p in (50, 10):
+        path = tl_p1812_path(p=p, **inputs)
+        for R in clutter_variants(n, seed):
+            assert tl_p1812_clutter(path, R, Ct) == pytest.approx(tl_p1812SAFE(p=p, R=R, Ct=Ct, **inputs), rel=1e-12)
+
+
+def test_smooth_earth_heights_do_not_depend_on_the_clutter():
+    inputs = random_path(0)
+    d, h = inputs['d'], inputs['h']
+    expected = smooth_earth_heights(d, h, htg=30, hrg=5, ae=8500, f=3.5)
+    for R in clutter_variants(len(d), 0):
+        assert smooth_earth_heights(d, h, R, 30, 5, 8500, 3.5) == expected
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_percentages_match_the_scalar_model(seed):
+    inputs = random_path(seed)
+    R = clutter_variants(len(inputs['d']), seed)[1 + seed % 2]
+    Ct = np.full(len(R), 2)
+    p, pL = [1, 3.7, 10, 25, 50], [1, 10, 50, 90, 99]
+
+    Lb = tl_p1812_percentages(tl_p1812_path(p=50, **inputs), R, Ct, p, pL)
+
+    expected = [[tl_p1812SAFE(p=pi, R=R, Ct=Ct, **dict(inputs, pL=pLj)) for pLj in pL] for pi in p]
+    np.testing.assert_allclose(Lb, expected, rtol=1e-12)
+
+
+def test_percentages_without_location_variability():
+    # With sigmaL = 0 (LOCATION_VARIABILITY_P1812) the loss does not depend on the location percentage
+    inputs = dict(random_path(0), sigmaL=0)
+    R = clutter_variants(len(inputs['d']), 0)[1]
+
+    Lb = tl_p1812_percentages(tl_p1812_path(p=50, **inputs), R, np.full(len(R), 2), [1, 10, 50], [1, 50, 99])
+
+    assert (Lb == Lb[:, :1]).all() and len(np.unique(Lb[:, 0])) == 3
+
+
+def test_link_percentages_at_the_default_percentages(synthetic_profile):
+    from propagation.pathloss import P1812Link
+    from propagation.tower import Tx, Rx
+
+    link = P1812Link(Tx(45.4739, -75.9054, height=30, frequency=3500), Rx(45.4812, -75.8901, height=5), synthetic_profile(5000))
+
+    for clutter in (dict(clutter_type=4), dict(bare_earth=True)):
+        Lb = link.path_loss_percentages([1, 50], [10, 50, 90], **clutter)
+        assert Lb.shape == (2, 3) and (Lb == Lb[:, :1]).all() and Lb[0, 0] < Lb[1, 0]
+        assert Lb[1, 1] == link.path_loss(**clutter)
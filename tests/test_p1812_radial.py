@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from propagation.p1812.tl_p1812_batch import tl_p1812_batch
+from propagation.p1812.tl_p1812_radial import tl_p1812_radial
+from propagation.pathloss import compute_p1812, compute_p1812_radial, resample_p1812_profile, get_p1812_clutter
+from propagation.profile import PathProfile
+from propagation.tower import Tx, Rx
+
+TX = Tx(45.4739, -75.9054, height=30, frequency=3500)
+
+def receivers(distances, length):
+    # Rx at the given distances (m) along a radial of the given length to the north-east of the Tx
+    return [Rx(TX.lat + 0.2 * x / length, TX.lon + 0.3 * x / length, height=5) for x in distances]
+
+
+@pytest.mark.parametrize("p", [50, 10])
+def test_radial_matches_the_batch_engine_on_its_paths(synthetic_profile, p):
+    # Running terms of the radial against every path derived on its own, for Earth radii varying from Rx to Rx
+    d, terrain_h, surface_h, zone = resample_p1812_profile(synthetic_profile(20000, 1))
+    zone[200:260] = 1
+    zone[260:300] = 3
+    R, Ct = get_p1812_clutter(terrain_h, surface_h, 4)
+
+    rng = np.random.default_rng(p)
+    n = np.concatenate(([2, 3, 4], rng.integers(5, len(d) + 1, 60)))
+    DN, N0 = rng.uniform(35, 60, len(n)), rng.uniform(300, 340, len(n))
+    phi_r, lam_r = 45.5 + rng.uniform(-0.3, 0.3, len(n)), -75.8 + rng.uniform(-0.3, 0.3, len(n))
+
+    Lb = tl_p1812_radial(3.5, p, d, terrain_h, R, Ct, zone, 30, 5, 2, 45.4, phi_r, -75.9, lam_r, 50, 5.5, DN, N0, n)
+
+    paths = [get_p1812_clutter(terrain_h[:k], surface_h[:k], 4) for k in n]
+    expected = tl_p1812_batch(3.5, p, [d[:k] for k in n], [terrain_h[:k] for k in n], [path[0] for path in paths], [path[1] for path in paths],
+                              [zone[:k] for k in n], 30, 5, 2, 45.4, phi_r, -75.9, lam_r, 50, 5.5, DN, N0)
+
+    assert np.isnan(Lb[0]) and np.isfinite(Lb[1:]).all()
+    np.testing.assert_allclose(Lb, expected, rtol=1e-10, equal_nan=True)
+
+
+@pytest.mark.parametrize("clutter_type", [3, 4])
+def test_radial_difference_with_compute_p1812_over_clutter(synthetic_profile, clutter_type):
+    # A path point of the radial falling on the other side of a clutter edge than in compute_p1812 gets all or none of the
+    # representative clutter height: a few Rx are off by several dB. Rx within 250 m are computed by compute_p1812
+    profile = synthetic_profile(20000)
+    distances = np.concatenate(([100, 250], np.arange(300, 20000, 100)))
+    rx_list = receivers(distances, 20000)
+
+    expected = np.array([compute_p1812(TX, rx, profile.prefix(x), clutter_type) for rx, x in zip(rx_list, distances)])
+    difference = np.abs(compute_p1812_radial(TX, rx_list, distances, profile, clutter_type) - expected)
+
+    assert (difference[:2] == 0).all()
+    assert np.median(difference) < 0.02 and np.mean(difference > 1) < 0.15
+
+
+def test_radial_difference_with_compute_p1812(synthetic_profile):
+    # Over terrain varying within a sample, compute_p1812 reads the heights of a Rx profile less than one sample away
+    # from those of the radial
+    profile = synthetic_profile(20000, 2).bare_earth()
+    distances = np.arange(300, 20000, 100)
+    rx_list = receivers(distances, 20000)
+
+    expected = np.array([compute_p1812(TX, rx, profile.prefix(x)) for rx, x in zip(rx_list, distances)])
+    difference = np.abs(compute_p1812_radial(TX, rx_list, distances, profile) - expected)
+
+    assert np.median(difference) < 0.01 and np.percentile(difference, 99) < 0.5
+
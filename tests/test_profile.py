@@ -0,0 +1,29 @@
+import numpy as np
+
+from propagation.profile import PathProfile
+
+def test_compact_profile():
+    terrain = np.array([0, 0, 101.25, 102.5, 0, 104.0])
+    profile = PathProfile(terrain + 12, terrain, [10, 10, 50, 30, 30, 80], spacing=0.5)
+
+    assert profile.surface.dtype == np.float32 and profile.terrain.dtype == np.float32 and profile.clutter.dtype == np.uint8
+    assert len(profile) == 6 and profile.distance == 3
+
+    # Samples extracted as 0 are the gaps without HRDEM
+    np.testing.assert_array_equal(profile.nodata, [True, True, False, False, True, False])
+
+    # Derived profiles copy the arrays and keep the gaps and spacing
+    prefix = profile.prefix(4)
+    prefix.terrain[2] = 0
+    assert profile.terrain[2] == 101.25
+    np.testing.assert_array_equal(prefix.nodata, profile.nodata[:4])
+    assert prefix.distance == 2
+
+    reversed_profile = profile.reversed()
+    np.testing.assert_array_equal(reversed_profile.clutter, [80, 30, 30, 50, 10, 10])
+    np.testing.assert_array_equal(reversed_profile.nodata, profile.nodata[::-1])
+
+    bare_earth = profile.bare_earth()
+    np.testing.assert_array_equal(bare_earth.surface, profile.terrain)
+    np.testing.assert_array_equal(bare_earth.nodata, profile.nodata)
+    assert bare_earth.spacing == 0.5
@@ -0,0 +1,70 @@
+import numpy as np
+
+from hrdem import profile_cache
+from hrdem.profile_cache import load_profile, save_profile
+from propagation.profile import PathProfile
+
+TOWER = (45.4739, -75.9054)
+RX = (45.4812, -75.8901)
+
+def cached_profile(seed=0):
+    rng = np.random.default_rng(seed)
+    terrain = rng.uniform(50, 150, 500).astype(np.float32)
+    nodata = np.zeros(500, dtype=bool)
+    nodata[100:160] = True
+    return PathProfile(terrain + rng.uniform(0, 20, 500), terrain, rng.choice([10, 30, 50], 500), nodata, spacing=1.002)
+
+
+def assert_same_profile(profile, expected):
+    for name in PathProfile.__slots__:
+        np.testing.assert_array_equal(getattr(profile, name), getattr(expected, name))
+    assert profile.surface.dtype == np.float32 and profile.clutter.dtype == np.uint8 and profile.nodata.dtype == bool
+
+
+def test_round_trip_in_both_directions(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_cache, "PROFILE_CACHE_FOLDER", str(tmp_path))
+    profile = cached_profile()
+
+    assert load_profile(TOWER, RX) is None
+    save_profile(TOWER, RX, profile)
+
+    # The data after the CDEM fallback, the samples without HRDEM and the spacing are kept
+    assert_same_profile(load_profile(TOWER, RX), profile)
+    assert_same_profile(load_profile(RX, TOWER), profile.reversed())
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_key_depends_on_the_coordinates_and_data_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_cache, "PROFILE_CACHE_FOLDER", str(tmp_path))
+    save_profile(TOWER, RX, cached_profile())
+
+    # Coordinates are rounded to PROFILE_CACHE_PRECISION decimals
+    assert load_profile((TOWER[0] + 1e-7, TOWER[1]), RX) is not None
+    assert load_profile((TOWER[0] + 1e-5, TOWER[1]), RX) is None
+
+    monkeypatch.setattr(profile_cache, "PROFILE_DATA_VERSIONS", {**profile_cache.PROFILE_DATA_VERSIONS, 'esa': "v300"})
+    assert load_profile(TOWER, RX) is None
+
+
+def test_profiles_left_with_gaps_are_not_cached(tmp_path, monkeypatch):
+    import safe_metrics
+    from hrdem import cdem
+    from propagation.tower import Tx, Rx
+
+    monkeypatch.setattr(profile_cache, "PROFILE_CACHE_FOLDER", str(tmp_path))
+    tx, rx = Tx(*TOWER, height=30, frequency=3500), Rx(*RX, height=5)
+    distance = safe_metrics.get_distance_to_tower(RX, TOWER)
+
+    # No HRDEM along the link, and the CDEM service fails once before answering
+    monkeypatch.setattr(safe_metrics, "return_elevation_profile", lambda lat_lon, tower_latlon, n, read_stats: (np.zeros(n), np.zeros(n)))
+    monkeypatch.setattr(safe_metrics, "return_land_cover_profile", lambda lat_lon, tower_latlon, n: np.zeros(n))
+    monkeypatch.setattr(safe_metrics, "plot_tx_to_rx_path", lambda *args: None)
+    responses = [[], list(np.linspace(60, 80, 100))]
+    monkeypatch.setattr(cdem, "get_elevation_profile", lambda pointA, pointB, steps, surface='cdem': responses.pop(0))
+
+    safe_metrics.compute_safe_metrics_sweep(0, tx, rx, [3500])
+    assert load_profile(TOWER, RX) is None
+
+    safe_metrics.compute_safe_metrics_sweep(0, tx, rx, [3500])
+    profile = load_profile(TOWER, RX)
+    assert len(profile) == distance and profile.nodata.all() and (profile.terrain >= 60).all()
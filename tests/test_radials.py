@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from hrdem.elevation import return_elevation_profile, return_land_cover_profile
+from hrdem.radials import extract_radials
+from propagation.tower import Tx
+
+TX = Tx(44.99979, -74.99963, height=30, frequency=3500)
+
+@pytest.fixture
+def radials(local_tiles):
+    # WorldCover tile N42W075 with random classes in 0.00001 degree pixels
+    import rasterio as rio
+    from rasterio.transform import from_origin
+
+    with rio.open(local_tiles / "N42W075.tif", 'w', driver='GTiff', count=1, dtype='uint8', crs="EPSG:4326", width=100, height=100,
+                  transform=from_origin(-75.0, 45.0, 0.00001, 0.00001)) as dst:
+        dst.write(np.random.default_rng(0).choice(np.array([10, 30, 50], dtype=np.uint8), (100, 100)), 1)
+
+    return extract_radials(TX, 20, n_radials=8)
+
+
+def test_radials_are_sampled_like_links_to_their_ends(radials):
+    assert radials.surface.shape == (8, 20)
+
+    for radial, (end_lat, end_lon, radius) in enumerate(radials.ends):
+        surface, terrain = return_elevation_profile((end_lat, end_lon), (TX.lat, TX.lon), 20)
+        clutter = return_land_cover_profile((end_lat, end_lon), (TX.lat, TX.lon), 20)
+
+        assert (terrain > 0).all() and len(np.unique(clutter)) > 1
+        np.testing.assert_array_equal(radials.surface[radial], surface)
+        np.testing.assert_array_equal(radials.terrain[radial], terrain)
+        np.testing.assert_array_equal(radials.clutter[radial], clutter)
+
+
+def test_rx_profile_is_a_prefix_of_its_radial(radials):
+    spacing = radials.spacing[3]
+    assert spacing == pytest.approx(20 / 19)
+
+    profile = radials.profile(3, 12.5)
+    assert len(profile) == 11 and profile.spacing == spacing and profile.distance == pytest.approx(11 * spacing)
+    np.testing.assert_array_equal(profile.terrain, radials.terrain[3, :11])
+
+    # The Rx is on the last sample of its profile
+    end_lat, end_lon, _ = radials.ends[3]
+    np.testing.assert_allclose(radials.rx_position(3, 12.5), (TX.lat + 10 / 19 * (end_lat - TX.lat), TX.lon + 10 / 19 * (end_lon - TX.lon)))
+
+    assert len(radials.profile(3, 20)) == 19
+    with pytest.raises(ValueError):
+        radials.profile(3, 20.5)
@@ -0,0 +1,53 @@
+import numpy as np
+import pyproj
+import pytest
+import rasterio as rio
+
+from hrdem import config, window_cache
+from hrdem.elevation import read_hrdem_band
+from hrdem.transform import ProjectedPath
+from hrdem.window_cache import WindowCache
+
+BLOCK_BYTES = 16 * 16 * 4
+
+@pytest.fixture
+def diagonal(tmp_path, monkeypatch, write_geotiff, heights):
+    # 1m spaced path along the diagonal of a 64 x 80 tile of 16 x 16 blocks, read from a local copy
+    path = write_geotiff(tmp_path / "p1-dsm.tif", heights)
+    monkeypatch.setattr(config, "HRDEM_DSM_PATH", str(tmp_path / "{project_id}-dsm.tif"))
+    monkeypatch.setattr(window_cache, "_window_cache", WindowCache(str(tmp_path / "cache"), 10 ** 9))
+
+    with rio.open(path) as tif:
+        (x0, y0), (x1, y1) = tif.xy(0, 0), tif.xy(63, 63)
+    x, y = np.linspace(x0, x1, 90), np.linspace(y0, y1, 90)
+    lon, lat = pyproj.Transformer.from_crs("EPSG:3857", "EPSG:4326", always_xy=True).transform(x, y)
+    return ProjectedPath((np.array(lat), np.array(lon)))
+
+
+def read(monkeypatch, projected_path, mode, cache):
+    monkeypatch.setattr(config, "HRDEM_READ_MODE", mode)
+    monkeypatch.setattr(config, "WINDOW_CACHE_ENABLED", cache)
+    indices, values, read_stats = read_hrdem_band("p1", "dsm", projected_path)
+    return values, read_stats['bytes_read']
+
+
+def test_both_modes_count_the_blocks_they_fetch(monkeypatch, diagonal):
+    window_values, window_bytes = read(monkeypatch, diagonal, 'window', False)
+    blocks_values, blocks_bytes = read(monkeypatch, diagonal, 'blocks', False)
+
+    np.testing.assert_array_equal(window_values, blocks_values)
+
+    # The bounding box of the path overlaps the 4 x 4 blocks of the first 64 columns, the path itself the 4 diagonal ones
+    assert window_bytes == 16 * BLOCK_BYTES
+    assert blocks_bytes == 4 * BLOCK_BYTES
+
+
+@pytest.mark.parametrize("mode", ['window', 'blocks'])
+def test_count_does_not_depend_on_the_block_cache(monkeypatch, diagonal, mode):
+    _, uncached_bytes = read(monkeypatch, diagonal, mode, False)
+    _, first_bytes = read(monkeypatch, diagonal, mode, True)
+    _, second_bytes = read(monkeypatch, diagonal, mode, True)
+
+    # Blocks are counted when fetched from the tile, cache hits are free
+    assert first_bytes == uncached_bytes
+    assert second_bytes == 0
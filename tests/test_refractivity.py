@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from os.path import join, dirname
+
+from propagation.p1812 import InterpolateDN50andN050CTR as refractivity
+from propagation.p1812.InterpolateDN50andN050CTR import InterpolateDN50andN050CTR
+
+MAPS = {name: np.loadtxt(join(dirname(refractivity.__file__), name + ".txt")) for name in ("DN50", "N050")}
+
+def text_lookup(lat, lon):
+    # Bilinear interpolation of P.1144 on the text maps, one path centre at a time
+    latCeilPos, latFloorPos = int(np.floor((90 - lat) / 1.5)) + 1, int(np.ceil((90 - lat) / 1.5)) + 1
+    lonCeilPos, lonFloorPos = int(np.ceil(lon / 1.5)) + 1, int(np.floor(lon / 1.5)) + 1
+    c, r = lon / 1.125 + 1, (90 - lat) / 1.125 + 1
+    C, R = int(np.floor(lon / 1.125)) + 1, int(np.floor((90 - lat) / 1.125)) + 1
+    return tuple(grid[latCeilPos-1, lonFloorPos-1] * (R + 1 - r) * (C + 1 - c) + grid[latFloorPos-1, lonFloorPos-1] * (r - R) * (C + 1 - c)
+                 + grid[latCeilPos-1, lonCeilPos-1] * (R + 1 - r) * (c - C) + grid[latFloorPos-1, lonCeilPos-1] * (r - R) * (c - C)
+                 for grid in (MAPS["DN50"], MAPS["N050"]))
+
+
+def test_binary_maps_are_the_text_maps():
+    for name, grid in MAPS.items():
+        np.testing.assert_array_equal(refractivity.load_refractivity_map(name), grid)
+
+
+def test_lookup_matches_the_text_maps():
+    rng = np.random.default_rng(0)
+    lat = np.concatenate((rng.uniform(-89, 89, 500), [45.4, 0, 1.5, -60.75]))
+    lon = np.concatenate((rng.uniform(0, 358, 500), [284.3, 0, 3, 180]))
+
+    DN50, N050 = InterpolateDN50andN050CTR(lat, lon)
+    expected = np.array([text_lookup(la, lo) for la, lo in zip(lat, lon)])
+
+    np.testing.assert_allclose(DN50, expected[:, 0], rtol=1e-12)
+    np.testing.assert_allclose(N050, expected[:, 1], rtol=1e-12)
+
+    # Scalar path centres give floats
+    DN50, N050 = InterpolateDN50andN050CTR(45.4, 284.3)
+    assert type(DN50) is float and (DN50, N050) == pytest.approx(text_lookup(45.4, 284.3), rel=1e-12)
@@ -0,0 +1,43 @@
+import safe_metrics
+from propagation.tower import Tx, Rx
+
+def test_sweep_matches_one_link_per_frequency(monkeypatch, synthetic_profile):
+    monkeypatch.setattr(safe_metrics, "plot_tx_to_rx_path", lambda *args: None)
+    rx = Rx(45.4812, -75.8901, height=5)
+    frequencies = [700, 3500, 5900]
+
+    sweep = safe_metrics.compute_safe_metrics_sweep(3, Tx(45.4739, -75.9054, height=30, frequency=3500), rx, frequencies, synthetic_profile(1400))
+
+    assert [metrics["frequency"] for metrics in sweep] == frequencies
+    for frequency, metrics in zip(frequencies, sweep):
+        expected = safe_metrics.compute_safe_metrics(3, Tx(45.4739, -75.9054, height=30, frequency=frequency), rx, synthetic_profile(1400))
+        assert metrics == expected
+
+    # The carriers differ in every loss
+    for name in ("p1812_path_loss", "top_diffraction_loss", "safe_path_loss"):
+        assert len({metrics[name] for metrics in sweep}) == 3
+
+
+def test_radial_metrics_take_the_radial_p1812_losses(monkeypatch, synthetic_profile):
+    from hrdem import radials
+    from propagation.pathloss import compute_p1812_radial
+
+    monkeypatch.setattr(safe_metrics, "plot_tx_to_rx_path", lambda *args: None)
+    tx = Tx(45.4739, -75.9054, height=30, frequency=3500)
+    profile = synthetic_profile(3001)
+    radial = radials.RadialProfiles(tx, [0], [(tx.lat + 0.02, tx.lon + 0.03, 3000)], profile.surface[None], profile.terrain[None], profile.clutter[None])
+    monkeypatch.setattr(radials, "extract_radials", lambda tx, radius, n_radials: radial)
+    distances = [200, 1500, 3000]
+
+    expected = safe_metrics.compute_radial_safe_metrics(tx, 3000, distances, 5, n_radials=1)
+    monkeypatch.setattr(safe_metrics, "P1812_RADIAL", True)
+    metrics = safe_metrics.compute_radial_safe_metrics(tx, 3000, distances, 5, n_radials=1)
+
+    # Same metrics, but the P.1812 losses of the radial
+    rx_list = [Rx(*radial.rx_position(0, distance), height=5) for distance in distances]
+    no_clutter = compute_p1812_radial(tx, rx_list, distances, radial.profile(0, 3000).bare_earth())
+    with_clutter = compute_p1812_radial(tx, rx_list, distances, radial.profile(0, 3000), 4)
+    for row, radial_row, loss, clutter_loss in zip(expected, metrics, no_clutter, with_clutter):
+        assert radial_row["p1812_path_loss_no_clutter"] == round(loss, 2) and radial_row["p1812_path_loss"] == round(clutter_loss, 2)
+        for name in ("tree_loss_ret", "top_diffraction_loss", "total_clutter_depth", "link_distance"):
+            assert radial_row[name] == row[name]
@@ -0,0 +1,37 @@
+import numpy as np
+import rasterio as rio
+
+from rasterio.transform import from_origin
+
+from hrdem.sampling import pixel_indices, pixel_runs
+
+def test_pixel_indices_match_dataset_index(tmp_path, write_geotiff, heights):
+    path = write_geotiff(tmp_path / "t.tif", heights)
+    rng = np.random.default_rng(0)
+
+    with rio.open(path) as tif:
+        x = rng.uniform(tif.bounds.left, tif.bounds.right, 500)
+        y = rng.uniform(tif.bounds.bottom, tif.bounds.top, 500)
+        # Points on the pixel edges too
+        x[:20], y[:20] = tif.xy(np.arange(20), np.arange(20), offset='ul')
+
+        rows, cols = pixel_indices(tif.transform, x, y)
+        expected = np.array([tif.index(xi, yi) for xi, yi in zip(x, y)])
+
+    np.testing.assert_array_equal(rows, expected[:, 0])
+    np.testing.assert_array_equal(cols, expected[:, 1])
+
+
+def test_pixel_runs_expand_back_to_every_point():
+    # 1m spaced path over 10m pixels, as for ESA WorldCover
+    transform = from_origin(0, 1000, 10, 10)
+    x = np.linspace(3, 251, 600)
+    y = np.linspace(997, 874, 600)
+    rows, cols = pixel_indices(transform, x, y)
+
+    run_rows, run_cols, run_of_point = pixel_runs(rows, cols)
+
+    np.testing.assert_array_equal(run_rows[run_of_point], rows)
+    np.testing.assert_array_equal(run_cols[run_of_point], cols)
+    assert len(run_rows) < len(rows) / 5
+    assert ((np.diff(run_rows) != 0) | (np.diff(run_cols) != 0)).all()
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from propagation.p1812.dl_bull import dl_bull
+from propagation.p1812.smooth_earth_heights import smooth_earth_heights
+from propagation.p1812.terrain_analysis import TerrainAnalysis
+
+def bullington(d, g, hts, hrs, ap, f):
+    # Bullington construction of P.1812 Section 4.3.1 written out point by point
+    dtot, lambda_, Ce = d[-1] - d[0], 0.2998 / f, 1 / ap
+    points = range(1, len(d) - 1)
+    Stim = max((g[i] + 500 * Ce * d[i] * (dtot - d[i]) - hts) / d[i] for i in points)
+    Str = (hrs - hts) / dtot
+    if Stim < Str:
+        nu = max((g[i] + 500 * Ce * d[i] * (dtot - d[i]) - (hts * (dtot - d[i]) + hrs * d[i]) / dtot)
+                 * np.sqrt(0.002 * dtot / (lambda_ * d[i] * (dtot - d[i]))) for i in points)
+    else:
+        Srim = max((g[i] + 500 * Ce * d[i] * (dtot - d[i]) - hrs) / (dtot - d[i]) for i in points)
+        dbp = (hrs - hts + Srim * dtot) / (Stim + Srim)
+        nu = (hts + Stim * dbp - (hts * (dtot - dbp) + hrs * dbp) / dtot) * np.sqrt(0.002 * dtot / (lambda_ * dbp * (dtot - dbp)))
+    Luc = 6.9 + 20 * np.log10(np.sqrt((nu - 0.1) ** 2 + 1) + nu - 0.1) if nu > -0.78 else 0
+    return Luc + (1 - np.exp(-Luc / 6.0)) * (10 + 0.02 * dtot)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_shared_analysis_gives_the_bullington_loss(seed):
+    rng = np.random.default_rng(seed)
+    n = rng.integers(3, 400)
+    d = np.linspace(0, rng.uniform(0.3, 40), n)
+    g = 100 + rng.normal(0, 1, n).cumsum() * rng.uniform(0.5, 10)
+    hts, hrs, f = g[0] + rng.uniform(5, 60), g[-1] + rng.uniform(1, 20), rng.uniform(0.1, 6)
+
+    ta = TerrainAnalysis(d, f)
+    for ap in (8500, rng.uniform(6371, 20000)):
+        assert dl_bull(d, g, hts, hrs, ap, f, ta) == pytest.approx(bullington(d, g, hts, hrs, ap, f), rel=1e-10, abs=1e-10)
+
+
+def test_smooth_earth_heights_with_a_shared_analysis():
+    rng = np.random.default_rng(0)
+    d = np.linspace(0, 12, 401)
+    h = 80 + rng.normal(0, 1, 401).cumsum()
+    R = np.where(rng.random(401) < 0.4, 10.0, 0.0)
+
+    shared = smooth_earth_heights(d, h, R, 30, 5, 8500, 3.5, TerrainAnalysis(d, 3.5))
+    np.testing.assert_array_equal(shared, smooth_earth_heights(d, h, R, 30, 5, 8500, 3.5))
@@ -0,0 +1,34 @@
+import numpy as np
+import pyproj
+import rasterio as rio
+
+from concurrent.futures import ThreadPoolExecutor
+
+from hrdem import config, transform, window_cache
+from hrdem.elevation import read_hrdem_band
+from hrdem.transform import ProjectedPath
+from hrdem.window_cache import WindowCache
+
+def test_transformers_are_shared_across_links(tmp_path, monkeypatch, write_geotiff, heights):
+    path = write_geotiff(tmp_path / "p1-dsm.tif", heights)
+    monkeypatch.setattr(config, "HRDEM_DSM_PATH", str(tmp_path / "{project_id}-dsm.tif"))
+    monkeypatch.setattr(window_cache, "_window_cache", WindowCache(str(tmp_path / "cache"), 10 ** 9))
+    monkeypatch.setattr(transform, "_transformers", {})
+
+    from_crs = pyproj.Transformer.from_crs
+    calls = []
+    def counting_from_crs(*args, **kwargs):
+        calls.append(args)
+        return from_crs(*args, **kwargs)
+    monkeypatch.setattr(pyproj.Transformer, "from_crs", counting_from_crs)
+
+    with rio.open(path) as tif:
+        x, y = tif.xy(np.arange(10), np.arange(10))
+    lon, lat = from_crs("EPSG:3857", "EPSG:4326", always_xy=True).transform(x, y)
+
+    # Every link reads its tiles on the threads of its own executor, as return_elevation_profile does
+    for link in range(5):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(read_hrdem_band, "p1", "dsm", ProjectedPath((np.array(lat), np.array(lon)))).result()
+
+    assert len(calls) == 1
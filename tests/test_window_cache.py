@@ -0,0 +1,87 @@
+import numpy as np
+import pyproj
+import rasterio as rio
+
+from hrdem import config, window_cache
+from hrdem.elevation import read_hrdem_band
+from hrdem.transform import ProjectedPath
+from hrdem.window_cache import WindowCache
+
+def test_read_window_matches_dataset(tmp_path, write_geotiff, heights):
+    cache = WindowCache(str(tmp_path / "cache"), 10 ** 9)
+    path = write_geotiff(tmp_path / "p1-dsm.tif", heights)
+
+    with rio.open(path) as tif:
+        for window in [((0, 64), (0, 80)), ((5, 37), (12, 13)), ((30, 31), (70, 90)), ((-4, 10), (75, 100))]:
+            (r0, r1), (c0, c1) = window
+            expected = tif.read(1, window=((max(r0, 0), min(r1, 64)), (max(c0, 0), min(c1, 80))))
+            np.testing.assert_array_equal(cache.read_window(tif, "p1", "dsm", window), expected)
+
+
+def test_hits_and_misses(tmp_path, write_geotiff, heights):
+    cache = WindowCache(str(tmp_path / "cache"), 10 ** 9)
+    path = write_geotiff(tmp_path / "p1-dsm.tif", heights)
+
+    # The window overlaps 2 x 2 blocks of 16 x 16 pixels
+    with rio.open(path) as tif:
+        cache.read_window(tif, "p1", "dsm", ((10, 20), (10, 20)))
+        assert (cache.hits, cache.misses) == (0, 4)
+
+        cache.read_window(tif, "p1", "dsm", ((12, 18), (14, 30)))
+        assert (cache.hits, cache.misses) == (4, 4)
+
+        # Blocks left on disk by a previous run are served by a new cache
+        restarted = WindowCache(str(tmp_path / "cache"), 10 ** 9)
+        np.testing.assert_array_equal(restarted.read_window(tif, "p1", "dsm", ((0, 16), (0, 16))), heights[:16, :16])
+        assert (restarted.hits, restarted.misses, len(restarted.entries)) == (1, 0, 4)
+
+
+def test_least_recently_used_blocks_are_evicted(tmp_path, write_geotiff, heights):
+    path = write_geotiff(tmp_path / "p1-dsm.tif", heights)
+
+    with rio.open(path) as tif:
+        # Room for two blocks
+        cache = WindowCache(str(tmp_path / "cache"), 10 ** 9)
+        cache.read_block(tif, "p1", "dsm", 0, 0)
+        block_size = cache.size
+        cache.max_bytes = 2.5 * block_size
+
+        cache.read_block(tif, "p1", "dsm", 0, 1)
+        cache.read_block(tif, "p1", "dsm", 0, 0)
+        cache.read_block(tif, "p1", "dsm", 0, 2)
+        assert len(cache.entries) == 2 and cache.size == 2 * block_size
+        assert (cache.hits, cache.misses) == (1, 3)
+
+        # Block (0, 1) was the least recently used one
+        np.testing.assert_array_equal(cache.read_block(tif, "p1", "dsm", 0, 0), heights[:16, :16])
+        assert (cache.hits, cache.misses) == (2, 3)
+        np.testing.assert_array_equal(cache.read_block(tif, "p1", "dsm", 0, 1), heights[:16, 16:32])
+        assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_blocks_of_another_source_are_not_served(tmp_path, write_geotiff, heights):
+    cache = WindowCache(str(tmp_path / "cache"), 10 ** 9)
+    remote = write_geotiff(tmp_path / "remote.tif", heights)
+    local = write_geotiff(tmp_path / "local.tif", heights + 1)
+
+    with rio.open(remote) as tif:
+        np.testing.assert_array_equal(cache.read_block(tif, "p1", "dsm", 1, 1), heights[16:32, 16:32])
+    with rio.open(local) as tif:
+        np.testing.assert_array_equal(cache.read_block(tif, "p1", "dsm", 1, 1), heights[16:32, 16:32] + 1)
+    assert cache.misses == 2
+
+
+def test_tiles_are_read_from_the_configured_path(tmp_path, monkeypatch, write_geotiff, heights):
+    write_geotiff(tmp_path / "p1-dsm.tif", heights)
+    monkeypatch.setattr(config, "HRDEM_DSM_PATH", str(tmp_path / "{project_id}-dsm.tif"))
+    monkeypatch.setattr(window_cache, "_window_cache", WindowCache(str(tmp_path / "cache"), 10 ** 9))
+
+    # Path through the centres of a few pixels of the tile
+    rows, cols = np.array([3, 3, 20, 40, 63]), np.array([0, 1, 33, 50, 79])
+    with rio.open(tmp_path / "p1-dsm.tif") as tif:
+        x, y = tif.xy(rows, cols)
+    lon, lat = pyproj.Transformer.from_crs("EPSG:3857", "EPSG:4326", always_xy=True).transform(x, y)
+
+    indices, values, read_stats = read_hrdem_band("p1", "dsm", ProjectedPath((np.array(lat), np.array(lon))))
+    np.testing.assert_array_equal(indices, np.arange(5))
+    np.testing.assert_allclose(values, heights[rows, cols])